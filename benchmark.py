@@ -0,0 +1,109 @@
+import sys
+import json
+import time
+import argparse
+import tempfile
+from src.module_parser import InputParser
+from src.module_route_searcher import RouteSearcher, ROUTING_MODES
+from src.module_constraints import TruckDelegator, DELEGATION_STRATEGIES
+from src.module_data_generator import DataGenerator
+from src.module_instrumentation import Instrumentation
+
+def parse_arguments() -> argparse.Namespace:
+  """Parses the command line arguments of the benchmark.
+
+  Returns:
+      argparse.Namespace: Parsed command line arguments.
+  """
+  argParser = argparse.ArgumentParser(prog=sys.argv[0], \
+    description="Times parsing, routing and delegation on generated datasets and prints JSON results.")
+  argParser.add_argument("--nodes", metavar="count", type=int, nargs="+", default=[100, 1000, 10000], \
+    help="number of nodes of each generated dataset")
+  argParser.add_argument("--packages", metavar="count", type=int, nargs="+", default=None, \
+    help="number of packages of each dataset, defaults to the number of nodes")
+  argParser.add_argument("--seed", type=int, default=0, help="seed of the generated datasets")
+  argParser.add_argument("--degree", type=int, default=4, help="approximate connections per node")
+  argParser.add_argument("--routing-mode", choices=ROUTING_MODES.keys(), default="tree")
+  argParser.add_argument("--strategy", choices=DELEGATION_STRATEGIES.keys(), default="shared-routes")
+  argParser.add_argument("--data-dir", metavar="path", default=None, \
+    help="directory the datasets are written to, defaults to a temporary directory")
+  argParser.add_argument("--output", metavar="path", default=None, \
+    help="file the JSON results are written to, defaults to standard output")
+  return argParser.parse_args()
+
+def time_call(function, *args, **kwargs) -> tuple:
+  """Calls a function and measures how long it takes.
+
+  Returns:
+      tuple: A tuple of the function's result and the seconds it took.
+  """
+  startTime = time.perf_counter()
+  result = function(*args, **kwargs)
+  return (result, time.perf_counter() - startTime)
+
+def run_benchmark(data_dir: str, num_nodes: int, num_packages: int, args: argparse.Namespace) -> dict:
+  """Generates one dataset and times every stage of the pipeline on it.
+  Routing starts from an empty route cache. Delegation runs once the
+  routes of every package are cached, so it does not include routing,
+  and its own stages are timed as well.
+
+  Returns:
+      dict: Sizes of the dataset and the seconds each stage took.
+  """
+  generator = DataGenerator(args.seed)
+  (paths, generate_seconds) = time_call(generator.write_dataset, \
+    f"{data_dir}/{num_nodes}_{num_packages}", num_nodes, num_packages, args.degree)
+
+  (parser, parse_seconds) = time_call(InputParser, *paths)
+  parsedData = parser.get_parsed_data()
+
+  routeSearcher = RouteSearcher(parsedData, ROUTING_MODES[args.routing_mode])
+  (_, routing_seconds) = time_call(routeSearcher.getRoutesForEachPackage)
+
+  instrumentation = Instrumentation()
+  # The cache holds every route, so none is searched again during delegation
+  truckDelegator = TruckDelegator(parsedData, ROUTING_MODES[args.routing_mode], max(1024, num_packages), \
+    strategy=DELEGATION_STRATEGIES[args.strategy], instrumentation=instrumentation)
+  truckDelegator.routeSearcher.getRoutesForEachPackage()
+  instrumentation.reset()
+  (optimizedRoute, delegation_seconds) = time_call(truckDelegator.getOptimizedRoute)
+
+  return {
+    "nodes": num_nodes,
+    "arcs": parsedData.get_graph().get_arc_count(),
+    "packages": num_packages,
+    "seed": args.seed,
+    "routing_mode": args.routing_mode,
+    "strategy": args.strategy,
+    "generate_seconds": generate_seconds,
+    "parse_seconds": parse_seconds,
+    "routing_seconds": routing_seconds,
+    "delegation_seconds": delegation_seconds,
+    # Time of each delegation stage, e.g. distance_matrix, clustering, delegation and local_search
+    "delegation_stage_seconds": {name: timer["seconds"] \
+      for (name, timer) in instrumentation.get_report()["timers"].items()},
+    "trips": len(optimizedRoute),
+    "total_distance": truckDelegator.getTotalDistance(optimizedRoute)
+  }
+
+if __name__ == "__main__":
+
+  args = parse_arguments()
+  package_counts = args.packages or args.nodes
+  if len(package_counts) != len(args.nodes):
+    sys.exit("--packages needs one count per --nodes count")
+
+  with tempfile.TemporaryDirectory() as temporary_dir:
+    data_dir = args.data_dir or temporary_dir
+    results = []
+    for (num_nodes, num_packages) in zip(args.nodes, package_counts):
+      results.append(run_benchmark(data_dir, num_nodes, num_packages, args))
+      # Progress goes to standard error so the JSON output stays clean
+      print(f"{num_nodes} nodes, {num_packages} packages done", file=sys.stderr)
+
+  output = json.dumps(results, indent=2)
+  if args.output is None:
+    print(output)
+  else:
+    with open(args.output, "w") as output_file:
+      output_file.write(output + "\n")
@@ -1,34 +1,165 @@
 import sys
 import time
 import pprint
+import pstats
+import cProfile
+import asyncio
+import argparse
 from src.module_parser import InputParser
-from src.module_constraints import TruckDelegator
+from src.module_constraints import TruckDelegator, DELEGATION_STRATEGIES
+from src.module_route_searcher import ROUTING_MODES, HEURISTIC_MODES
+from src.module_multistart import MultiStartOptimizer
+from src.module_instrumentation import Instrumentation
+from src.module_service import OptimizationService
+
+def parse_arguments() -> argparse.Namespace:
+  """Parses the command line arguments of the program.
+
+  Returns:
+      argparse.Namespace: Parsed command line arguments.
+  """
+  argParser = argparse.ArgumentParser(prog=sys.argv[0])
+  argParser.add_argument("nodes_path", metavar="path_to_nodes_csv")
+  argParser.add_argument("connections_path", metavar="path_to_connections_csv")
+  argParser.add_argument("truck_path", metavar="path_to_truck_data")
+  argParser.add_argument("package_type_path", metavar="path_to_package_type_data")
+  argParser.add_argument("package_data_path", metavar="path_to_packages")
+  argParser.add_argument("--routing-mode", choices=ROUTING_MODES.keys(), default="search", \
+    help="'search' runs one A* Search per package, 'tree' reads every route from one shortest-path tree")
+  argParser.add_argument("--strategy", choices=DELEGATION_STRATEGIES.keys(), default="shared-routes", \
+    help="'shared-routes' merges packages on shared routes, 'savings' runs the Clarke-Wright savings heuristic, " \
+    "'bin-packing' packs the packages of each route subtree into as few trucks as possible, " \
+    "'clustered' groups goals into geographic clusters and runs savings within each")
+  argParser.add_argument("--improve", metavar="seconds", type=float, default=None, \
+    help="improve the delegated trips with 2-opt, relocate and swap moves for up to this many seconds")
+  argParser.add_argument("--heuristic", choices=HEURISTIC_MODES.keys(), default="euclidean", \
+    help="heuristic used by A* Search, 'landmarks' uses precomputed landmark (ALT) distances")
+  argParser.add_argument("--distance-matrix", metavar="path", default=None, \
+    help="precompute the all-pairs distance matrix into this file, or memory-map it if it matches the graph")
+  argParser.add_argument("--contraction-hierarchy", metavar="path", default=None, \
+    help="answer route searches with a contraction hierarchy saved in (or built into) this file")
+  argParser.add_argument("--graph-snapshot", metavar="path", default=None, \
+    help="compile the validated nodes and connections into this file, or memory-map it if the CSVs are unchanged")
+  argParser.add_argument("--bulk-load", action="store_true", \
+    help="read the nodes and connections in one pass with NumPy (if installed), fields must not be quoted")
+  argParser.add_argument("--chunk-size", metavar="packages", type=int, default=None, \
+    help="stream the packages file and delegate this many packages at a time, grouped by goal")
+  argParser.add_argument("--multi-start", metavar="passes", type=int, default=None, \
+    help="run this many differently ordered delegation passes in parallel and keep the shortest")
+  argParser.add_argument("--workers", type=int, default=None, \
+    help="number of worker processes used by --multi-start (defaults to the CPU count)")
+  argParser.add_argument("--profile", choices=["stages", "cprofile"], nargs="?", const="stages", default=None, \
+    help="print the time and counters of each stage, and with cprofile the slowest functions too")
+  argParser.add_argument("--serve", metavar="port", type=int, default=None, \
+    help="keep the graph loaded and optimize JSON package manifests sent to this local port, one per line")
+  return argParser.parse_args()
 
 if __name__ == "__main__":
 
-  if(len(sys.argv) != 6):
-    print("Missing Parameters!")
-    print(f"Usage: python {sys.argv[0]} <path_to_nodes_csv> <path_to_connections_csv> <path_to_truck_data> <path_to_package_type_data> <path_to_packages>")
-    quit()
+  args = parse_arguments()
 
   try:
+    instrumentation = Instrumentation(enabled=args.profile is not None)
+    profiler = cProfile.Profile() if args.profile == "cprofile" else None
+    if profiler is not None:
+      profiler.enable()
     startTime = time.time()
-    parser = InputParser(sys.argv[1], sys.argv[2], \
-      sys.argv[3], sys.argv[4], sys.argv[5])
-    truckDelegator = TruckDelegator(parser.get_parsed_data())
-    optimizedRoute = truckDelegator.getOptimizedRoute()
-    endTime = time.time()
+    parser = InputParser(args.nodes_path, args.connections_path, \
+      args.truck_path, args.package_type_path, args.package_data_path, \
+      args.graph_snapshot, args.bulk_load, stream_packages=args.chunk_size is not None or args.serve is not None, \
+      instrumentation=instrumentation)
+    delegatorOptions = {
+      "routing_mode": ROUTING_MODES[args.routing_mode],
+      "distance_matrix_path": args.distance_matrix,
+      "heuristic_mode": HEURISTIC_MODES[args.heuristic],
+      "strategy": DELEGATION_STRATEGIES[args.strategy],
+      "improvement_time_budget": args.improve
+    }
+    if args.serve is not None:
+      # Manifests are sent to the service, the packages file is not read
+      service = OptimizationService(parser.get_parsed_data(), args.workers, **delegatorOptions)
+      print(f"Serving on 127.0.0.1:{args.serve}")
+      try:
+        asyncio.run(service.serve(port=args.serve))
+      except KeyboardInterrupt:
+        pass
+      sys.exit()
+    # Passes of --multi-start run in other processes and are not instrumented
+    truckDelegator = TruckDelegator(parser.get_parsed_data(), instrumentation=instrumentation, **delegatorOptions)
+    if args.contraction_hierarchy is not None:
+      truckDelegator.routeSearcher.useContractionHierarchy(args.contraction_hierarchy)
+    if args.distance_matrix is not None:
+      truckDelegator.getDistanceMatrix()
+
+    if args.chunk_size is not None:
+      # Trips are delegated and printed one chunk at a time, so only one chunk is held in memory
+      optimizedRoutes = truckDelegator.getOptimizedRoutesInChunks( \
+        parser.read_packages_in_chunks(args.package_data_path, args.chunk_size))
+    elif args.multi_start is not None:
+      multiStartOptimizer = MultiStartOptimizer(parser.get_parsed_data(), args.multi_start, args.workers, \
+        **delegatorOptions)
+      optimizedRoutes = [multiStartOptimizer.optimize()]
+    else:
+      optimizedRoutes = [truckDelegator.getOptimizedRoute()]
+
     print("\n\n")
     print("Optimized Route:")
     print("----")
-    for truckId, truck_load_data in optimizedRoute.items():
-      packages, route = truck_load_data
-      print(f"Trip ID:\t{truckId}")
-      print(f"Packages:\t{packages}")
-      print(f"Route:\t\t{route}")
-      print("\n")
+    utilization = []
+    # Improvement of every chunk, added up
+    report = None
+    for optimizedRoute in optimizedRoutes:
+      for truckId, truck_load_data in optimizedRoute.items():
+        packages, route = truck_load_data
+        print(f"Trip ID:\t{truckId}")
+        print(f"Packages:\t{packages}")
+        print(f"Route:\t\t{route}")
+        print("\n")
+      if args.strategy == "bin-packing":
+        utilization.extend(truckDelegator.getTruckUtilization(optimizedRoute))
+      if truckDelegator.improvement_report is not None:
+        report = {key: value + (report[key] if report else 0) \
+          for (key, value) in truckDelegator.improvement_report.items()}
+    endTime = time.time()
+    if profiler is not None:
+      profiler.disable()
 
     # pprint.pprint(optimizedRoute)
+    if report is not None:
+      print("\n")
+      print("Local Search Improvement:")
+      print("----")
+      print(f"Distance:\t{report['distance_before']:g} -> {report['distance_after']:g}")
+      print(f"Moves:\t\t{report['moves_applied']} applied / {report['moves_evaluated']} evaluated in {report['seconds']:.4}s")
+
+    if args.strategy == "bin-packing":
+      print("\n")
+      print("Truck Utilization:")
+      print("----")
+      for truckId, percentage in enumerate(utilization):
+        print(f"Trip ID:\t{truckId}\t{percentage:.1f}%")
+      print(f"Average:\t{sum(utilization) / max(len(utilization), 1):.1f}%")
+
+    if args.multi_start is not None:
+      print("\n")
+      print("Multi-Start Passes:")
+      print("----")
+      print(f"Total Distance:\t{min(multiStartOptimizer.report.values()):g} best / " \
+        f"{multiStartOptimizer.report[0]:g} input order over {len(multiStartOptimizer.report)} passes")
+
+    if args.profile is not None:
+      profile = instrumentation.get_report()
+      print("\n")
+      print("Profile:")
+      print("----")
+      for (name, timer) in profile["timers"].items():
+        print(f"{name}:\t{timer['seconds']:.4}s over {timer['calls']} calls")
+      for (name, count) in profile["counters"].items():
+        print(f"{name}:\t{count}")
+      if profiler is not None:
+        print("\n")
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(20)
+
     print("\n")
     print("Time Taken (s):")
     print("----")
@@ -36,4 +167,4 @@ if __name__ == "__main__":
     print("\n\n")
 
   except ValueError as e:
-    print(e.message)
\ No newline at end of file
+    print(e)
\ No newline at end of file
@@ -3,6 +3,228 @@
   is utilized by the program.
 """
 
+from array import array
+from types import MappingProxyType
+from collections.abc import MutableMapping
+from src.model_graph import CompactGraph
+
+class DeliveryStop:
+  """
+  A class that represents a stop on a truck's trip, i.e. a set of packages
+  that are dropped off together at the same node.
+
+  ....
+
+  Attributes
+  ----------
+  node: int
+    Node ID the packages are delivered to.
+
+  packages: list
+    List of the IDs of the packages dropped off.
+
+  weight: int
+    Total weight of the packages dropped off.
+  """
+
+  node: int = None
+  packages: list = None
+  weight: int = None
+
+  def __init__(self, node: int, packages: list, weight: int) -> None:
+    self.node = node
+    self.packages = packages
+    self.weight = weight
+
+  def __repr__(self) -> str:
+    return f"DeliveryStop({self.node}, {self.packages}, {self.weight})"
+
+class PackageStore(MutableMapping):
+  """
+  A columnar store of packages. Package IDs are kept in a table and the
+  goal node ID, type and weight of every package are resolved once, when
+  it is added, into parallel arrays indexed by the package's row. Reading
+  a package's weight or goal is one dictionary lookup and one array read.
+
+  The store is also a dictionary of each package ID and its (Package Type,
+  Goal Node) tuple, in the order the packages were added. Removed packages
+  leave an empty row behind, and the rows are compacted once half of them
+  are empty. A frozen store cannot be modified, and a copy() of it is
+  modified instead.
+
+  ....
+
+  Attributes
+  ----------
+  package_types: dict
+    A Dictionary of each package type and its weight.
+
+  graph: CompactGraph
+    Graph whose node IDs the goals are resolved to.
+
+  package_ids: list
+    List of the package ID of each row, None for removed packages.
+
+  goals: array
+    Array of the goal node ID of each row, -1 for removed packages.
+
+  types: array
+    Array of the index of each row's package type in the order of
+    package_types.
+
+  weights: array
+    Array of the weight of each row, 0 for removed packages.
+
+  frozen: bool
+    True if the store can no longer be modified.
+
+  Methods
+  -------
+  get_weight(package_id: str) -> int
+    Returns the weight of a package.
+
+  get_goal(package_id: str) -> int
+    Returns the goal node ID of a package.
+
+  get_total_weight(package_ids) -> int
+    Returns the total weight of a set of packages.
+
+  freeze()
+    Stops the store from being modified.
+
+  copy() -> PackageStore
+    Returns a modifiable copy of the store.
+  """
+
+  package_types: dict = None
+  graph: CompactGraph = None
+  package_ids: list = None
+  goals: array = None
+  types: array = None
+  weights: array = None
+  frozen: bool = False
+
+  def __init__(self, package_types: dict, graph: CompactGraph, packages: dict = None) -> None:
+    self.package_types = dict(package_types)
+    self.graph = graph
+    self._type_names = list(package_types.keys())
+    self._type_index = {name: index for (index, name) in enumerate(self._type_names)}
+    self.clear()
+    if packages is not None:
+      self.update(packages)
+
+  def freeze(self) -> None:
+    """Stops the store from being modified. Adding or removing
+    packages raises a TypeError afterwards."""
+    self.frozen = True
+
+  def copy(self) -> "PackageStore":
+    """Returns a modifiable copy of the store.
+
+    Returns:
+        PackageStore: Copy of the store.
+    """
+    store = PackageStore(self.package_types, self.graph)
+    store.package_ids = list(self.package_ids)
+    store.goals = array('q', self.goals)
+    store.types = array('q', self.types)
+    store.weights = array('q', self.weights)
+    store._rows = dict(self._rows)
+    return store
+
+  def _check_writable(self) -> None:
+    if self.frozen:
+      raise TypeError("The package store is frozen, modify a copy() of it instead")
+
+  def clear(self) -> None:
+    self._check_writable()
+    self.package_ids = []
+    self.goals = array('q')
+    self.types = array('q')
+    self.weights = array('q')
+    # Package ID -> Row
+    self._rows = dict()
+
+  def __len__(self) -> int:
+    return len(self._rows)
+
+  def __contains__(self, package_id) -> bool:
+    return package_id in self._rows
+
+  def __iter__(self):
+    return (package_id for package_id in self.package_ids if package_id is not None)
+
+  def __getitem__(self, package_id: str) -> tuple:
+    row = self._rows[package_id]
+    return (self._type_names[self.types[row]], self.graph.node_names[self.goals[row]])
+
+  def __setitem__(self, package_id: str, package: tuple) -> None:
+    """Adds a package or replaces its type and goal.
+
+    Raises:
+        ValueError: If the package type or goal node is unknown.
+        TypeError: If the store is frozen.
+    """
+    self._check_writable()
+    (category, goal_name) = package
+    if category not in self._type_index:
+      raise ValueError(f"Package {package_id} has unknown package type {category}")
+    goal = self.graph.node_index.get(goal_name)
+    if goal is None:
+      raise ValueError(f"Package {package_id} is delivered to unknown node {goal_name}")
+
+    row = self._rows.get(package_id)
+    if row is None:
+      row = len(self.package_ids)
+      self._rows[package_id] = row
+      self.package_ids.append(package_id)
+      self.goals.append(goal)
+      self.types.append(self._type_index[category])
+      self.weights.append(self.package_types[category])
+    else:
+      self.goals[row] = goal
+      self.types[row] = self._type_index[category]
+      self.weights[row] = self.package_types[category]
+
+  def __delitem__(self, package_id: str) -> None:
+    self._check_writable()
+    row = self._rows.pop(package_id)
+    self.package_ids[row] = None
+    self.goals[row] = -1
+    self.weights[row] = 0
+    if len(self._rows) * 2 < len(self.package_ids):
+      self._compact()
+
+  def _compact(self) -> None:
+    """Drops the rows of removed packages."""
+    kept = [self._rows[package_id] for package_id in self]
+    self.package_ids = [self.package_ids[row] for row in kept]
+    self.goals = array('q', (self.goals[row] for row in kept))
+    self.types = array('q', (self.types[row] for row in kept))
+    self.weights = array('q', (self.weights[row] for row in kept))
+    self._rows = {package_id: row for (row, package_id) in enumerate(self.package_ids)}
+
+  def get_weight(self, package_id: str) -> int:
+    """Returns the weight of a package."""
+    return self.weights[self._rows[package_id]]
+
+  def get_goal(self, package_id: str) -> int:
+    """Returns the goal node ID of a package."""
+    return self.goals[self._rows[package_id]]
+
+  def get_total_weight(self, package_ids) -> int:
+    """Returns the total weight of a set of packages.
+
+    Args:
+        package_ids (Iterable[str]): IDs of the packages.
+
+    Returns:
+        int: Sum of the packages' weights.
+    """
+    rows = self._rows
+    weights = self.weights
+    return sum(weights[rows[package_id]] for package_id in package_ids)
+
 class ParsedData:
   """
   A class used act as a container to handle parsed data. This is
@@ -31,8 +253,11 @@ class ParsedData:
   pack_types: dict
     A Dictionary that stores data relating types of packages and their respective weights.
   
-  pack_data: dict
-    A Dictionary that stores data regarding each individual package and its associated data.
+  pack_data: PackageStore
+    A columnar store of each individual package and its associated data.
+
+  graph: CompactGraph
+    The integer-indexed CSR representation of the nodes and connections.
 
 
   Methods
@@ -52,8 +277,11 @@ class ParsedData:
   get_package_type_data() -> dict
     Returns data representing package classifications.
   
-  get_package_data() -> dict
+  get_package_data() -> PackageStore
     Returns data representing input packages.
+
+  get_graph() -> CompactGraph
+    Returns the compact graph of nodes and connections.
   """
 
   # Stores the coordinates of each node
@@ -68,16 +296,38 @@ class ParsedData:
   pack_types = None
   # Package Data
   pack_data = None
+  # Compact Graph of the Nodes and Connections
+  graph = None
 
   def __init__(self, node_coords: dict, coord_connections: dict, existing_connections: dict, truck_max_units: int, \
-    pack_types: dict, pack_data: dict):
+    pack_types: dict, pack_data: dict, graph: CompactGraph = None):
     self.node_coords = node_coords
     self.coord_connections = coord_connections
     self.existing_connections = existing_connections
     self.truck_max_units = truck_max_units
     self.pack_types = pack_types
+    # Build the compact graph when only plain dictionaries were given
+    if graph is None:
+      graph = CompactGraph.from_connections(node_coords, coord_connections)
+    self.graph = graph
+    if not isinstance(pack_data, PackageStore):
+      pack_data = PackageStore(pack_types, graph, pack_data)
     self.pack_data = pack_data
 
+  def __getstate__(self) -> dict:
+    # Read-only mapping proxies cannot be pickled, so they are sent as dictionaries
+    state = dict(self.__dict__)
+    for name in ("node_coords", "pack_types"):
+      if isinstance(state[name], MappingProxyType):
+        state[name] = dict(state[name])
+        state.setdefault("_read_only", []).append(name)
+    return state
+
+  def __setstate__(self, state: dict) -> None:
+    for name in state.pop("_read_only", []):
+      state[name] = MappingProxyType(state[name])
+    self.__dict__.update(state)
+
   def get_node_data(self) -> dict:
     """Returns Node Data.
 
@@ -121,11 +371,20 @@ class ParsedData:
     """
     return self.pack_types
 
-  def get_package_data(self) -> dict:
+  def get_package_data(self) -> PackageStore:
     """Returns data representing input packages.
 
     Returns:
-        dict: Dictionary data containing each all input packages,
-        their type and goal location.
+        PackageStore: Dictionary-like store containing each all input
+        packages, their type and goal location.
     """
     return self.pack_data
+
+  def get_graph(self) -> CompactGraph:
+    """Returns the compact graph of nodes and connections.
+
+    Returns:
+        CompactGraph: Integer-indexed CSR graph that is searched
+        for routes.
+    """
+    return self.graph
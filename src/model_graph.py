@@ -0,0 +1,560 @@
+"""
+  This module handles the compact representation of the graph of nodes
+  and connections that is searched by the program.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  CompactGraph
+    A class that stores the graph as integer node IDs and compressed
+    sparse row (CSR) adjacency arrays.
+
+  ConnectionView
+    A dictionary-like view of a CompactGraph keyed by (node, node) tuples.
+
+  NeighbourView
+    A dictionary-like view of a CompactGraph mapping each node to its neighbours.
+"""
+
+import math
+import hashlib
+from array import array
+from collections.abc import Mapping, MutableMapping
+from src.module_storage import write_arrays, map_arrays
+
+# Marks an arc of the CSR arrays that was removed from the graph
+_REMOVED_ARC = -1
+
+class CompactGraph:
+  """
+  A class that stores the graph of nodes and connections with every node
+  name interned to an integer ID. The arcs leaving node `i` are stored at
+  positions `offsets[i]` to `offsets[i + 1]` of the `targets` and `weights`
+  arrays (compressed sparse row layout). Undirected connections are stored
+  as 2 arcs.
+
+  Arcs added after the graph was built are kept in a small overflow
+  dictionary and removed arcs are marked in place, so the CSR arrays never
+  have to be rebuilt when the graph changes.
+
+  A graph loaded from a snapshot reads its CSR arrays straight from the
+  memory-mapped file, and copies them into memory the first time it is
+  modified. A frozen graph cannot be modified at all, so it can be shared
+  safely, and a copy() of it is modified instead.
+
+  ....
+
+  Attributes
+  ----------
+  node_names: list
+    List of node names where the index of a name is its node ID.
+
+  node_index: dict
+    A Dictionary mapping each node name to its node ID.
+
+  coords_x: array
+    Array of the X coordinate of each node ID.
+
+  coords_y: array
+    Array of the Y coordinate of each node ID.
+
+  offsets: array
+    Array of the position of the first arc of each node ID.
+
+  targets: array
+    Array of the node ID each arc leads to.
+
+  weights: array
+    Array of the distance of each arc.
+
+  version: int
+    An Integer that increases every time the graph is modified.
+
+  frozen: bool
+    True if the graph can no longer be modified.
+
+  Methods
+  -------
+  from_arcs(node_names: list, coords: list, sources, targets, weights) -> CompactGraph
+    Builds a graph from parallel sequences of arcs.
+
+  from_connections(node_coords: dict, coord_connections: dict) -> CompactGraph
+    Builds a graph from dictionaries of nodes and connections.
+
+  get_node_count() -> int
+    Returns the number of nodes.
+
+  get_arc_count() -> int
+    Returns the number of arcs.
+
+  get_index(node: str) -> int
+    Returns the node ID of a node name.
+
+  get_name(node_id: int) -> str
+    Returns the node name of a node ID.
+
+  neighbours(node_id: int) -> list
+    Returns the (node ID, distance) pairs of the arcs leaving a node.
+
+  get_arc_weight(source: int, target: int) -> int
+    Returns the distance of an arc, or None if it does not exist.
+
+  set_arc(source: int, target: int, weight: int)
+    Adds an arc or changes its distance.
+
+  remove_arc(source: int, target: int)
+    Removes an arc.
+
+  freeze()
+    Stops the graph from being modified.
+
+  copy() -> CompactGraph
+    Returns a modifiable copy of the graph.
+
+  fingerprint() -> str
+    Returns a digest that identifies the nodes and arcs of the graph.
+
+  get_distance_scale() -> float
+    Returns the factor that keeps straight-line distances from overestimating.
+
+  save(path: str, metadata: dict)
+    Saves the graph as a binary snapshot.
+
+  load(path: str) -> tuple
+    Memory-maps a graph snapshot saved by save().
+  """
+
+  node_names: list = None
+  node_index: dict = None
+  coords_x: array = None
+  coords_y: array = None
+  offsets: array = None
+  targets: array = None
+  weights: array = None
+  version: int = 0
+  frozen: bool = False
+
+  def __init__(self, node_names: list, coords_x: array, coords_y: array, \
+    offsets: array, targets: array, weights: array) -> None:
+    self.node_names = node_names
+    self.node_index = {name: node_id for node_id, name in enumerate(node_names)}
+    self.coords_x = coords_x
+    self.coords_y = coords_y
+    self.offsets = offsets
+    self.targets = targets
+    self.weights = weights
+    self.version = 0
+    self.frozen = False
+    # Arcs added after the CSR arrays were built, source -> {target: weight}
+    self._extra_arcs = dict()
+    self._arc_count = len(targets)
+    # Number of CSR arcs marked as removed
+    self._removed_count = 0
+    # (Version, Digest) of the last fingerprint() computed
+    self._fingerprint = None
+    # (Version, Scale) of the last get_distance_scale() computed
+    self._distance_scale = None
+
+  @classmethod
+  def from_arcs(cls, node_names: list, coords: list, sources, targets, weights) -> "CompactGraph":
+    """Builds a graph from parallel sequences of arcs. If the same
+    arc appears more than once the last distance is kept.
+
+    Args:
+        node_names (list): List of node names ordered by node ID.
+        coords (list): List of (X, Y) coordinates ordered by node ID.
+        sources: Sequence of the node ID each arc starts at.
+        targets: Sequence of the node ID each arc leads to.
+        weights: Sequence of the distance of each arc.
+
+    Returns:
+        CompactGraph: Graph containing the arcs.
+    """
+    num_nodes = len(node_names)
+
+    # Counting sort of the arcs by their source node
+    offsets = array('q', bytes(8 * (num_nodes + 1)))
+    for source in sources:
+      offsets[source + 1] += 1
+    for node_id in range(num_nodes):
+      offsets[node_id + 1] += offsets[node_id]
+
+    num_arcs = len(sources)
+    sorted_targets = array('l', bytes(array('l').itemsize * num_arcs))
+    sorted_weights = array('q', bytes(8 * num_arcs))
+    fill = offsets[:-1]
+    for arc in range(num_arcs):
+      position = fill[sources[arc]]
+      sorted_targets[position] = targets[arc]
+      sorted_weights[position] = weights[arc]
+      fill[sources[arc]] = position + 1
+
+    # Drop repeated arcs, keeping the last distance read for each
+    compact_offsets = array('q', [0])
+    compact_targets = array('l')
+    compact_weights = array('q')
+    for node_id in range(num_nodes):
+      node_arcs = dict()
+      for position in range(offsets[node_id], offsets[node_id + 1]):
+        node_arcs[sorted_targets[position]] = sorted_weights[position]
+      compact_targets.extend(node_arcs.keys())
+      compact_weights.extend(node_arcs.values())
+      compact_offsets.append(len(compact_targets))
+
+    coords_x = array('d', (x for (x, _) in coords))
+    coords_y = array('d', (y for (_, y) in coords))
+    return cls(node_names, coords_x, coords_y, compact_offsets, compact_targets, compact_weights)
+
+  @classmethod
+  def from_connections(cls, node_coords: dict, coord_connections: dict) -> "CompactGraph":
+    """Builds a graph from dictionaries of nodes and connections.
+
+    Args:
+        node_coords (dict): Dictionary of each node and its coordinates.
+        coord_connections (dict): Dictionary of (node, node) tuples and
+        their connection distances.
+
+    Returns:
+        CompactGraph: Graph containing the nodes and connections.
+    """
+    node_names = list(node_coords.keys())
+    node_index = {name: node_id for node_id, name in enumerate(node_names)}
+    sources = array('l', (node_index[node_a] for (node_a, _) in coord_connections))
+    targets = array('l', (node_index[node_b] for (_, node_b) in coord_connections))
+    weights = array('q', coord_connections.values())
+    return cls.from_arcs(node_names, list(node_coords.values()), sources, targets, weights)
+
+  @classmethod
+  def load(cls, path: str) -> tuple:
+    """Memory-maps a graph snapshot saved by save().
+
+    Args:
+        path (str): Path of the snapshot.
+
+    Raises:
+        ValueError: If the file is not a saved graph snapshot.
+
+    Returns:
+        tuple: A tuple of the loaded graph and the metadata saved
+        with it.
+    """
+    (metadata, arrays) = map_arrays(path)
+    if metadata.get("kind") != "graph":
+      raise ValueError(f"'{path}' is not a saved graph snapshot")
+    graph = cls(metadata["node_names"], arrays["coords_x"], arrays["coords_y"], \
+      arrays["offsets"], arrays["targets"], arrays["weights"])
+    return (graph, metadata["metadata"])
+
+  def save(self, path: str, metadata: dict = None) -> None:
+    """Saves the graph as a binary snapshot that can be memory-mapped
+    by load(). Added and removed arcs are folded into the CSR arrays.
+
+    Args:
+        path (str): Path of the file to write.
+        metadata (dict, optional): JSON serializable data saved with
+        the graph.
+    """
+    graph = self
+    if self._extra_arcs or self._removed_count:
+      (sources, targets, weights) = zip(*self.iter_arcs()) if self._arc_count else ((), (), ())
+      graph = CompactGraph.from_arcs(self.node_names, list(zip(self.coords_x, self.coords_y)), \
+        sources, targets, weights)
+    write_arrays(path, {"kind": "graph", "node_names": graph.node_names, "metadata": metadata or dict()}, {
+      "coords_x": array('d', graph.coords_x),
+      "coords_y": array('d', graph.coords_y),
+      "offsets": array('q', graph.offsets),
+      "targets": array('q', graph.targets),
+      "weights": array('q', graph.weights)
+    })
+
+  def freeze(self) -> None:
+    """Stops the graph from being modified. set_arc and remove_arc
+    raise a TypeError afterwards."""
+    self.frozen = True
+
+  def copy(self) -> "CompactGraph":
+    """Returns a modifiable copy of the graph. Node names and
+    coordinates are shared, the arcs are copied.
+
+    Returns:
+        CompactGraph: Copy of the graph.
+    """
+    graph = CompactGraph(self.node_names, self.coords_x, self.coords_y, self.offsets, \
+      array('l', self.targets), array('q', self.weights))
+    graph.node_index = self.node_index
+    graph._extra_arcs = {source: dict(arcs) for (source, arcs) in self._extra_arcs.items()}
+    graph._arc_count = self._arc_count
+    graph._removed_count = self._removed_count
+    return graph
+
+  def _ensure_writable(self) -> None:
+    """Copies CSR arrays that are memory-mapped from a snapshot
+    into memory so they can be modified.
+
+    Raises:
+        TypeError: If the graph is frozen.
+    """
+    if self.frozen:
+      raise TypeError("The graph is frozen, modify a copy() of it instead")
+    if not isinstance(self.targets, array):
+      self.targets = array('l', self.targets)
+      self.weights = array('q', self.weights)
+
+  def __getstate__(self) -> dict:
+    # Memory-mapped arrays cannot be pickled, so they are copied first
+    state = dict(self.__dict__)
+    for name in ("coords_x", "coords_y"):
+      state[name] = array('d', state[name])
+    state["offsets"] = array('q', state["offsets"])
+    state["targets"] = array('l', state["targets"])
+    state["weights"] = array('q', state["weights"])
+    return state
+
+  def get_node_count(self) -> int:
+    """Returns the number of nodes in the graph."""
+    return len(self.node_names)
+
+  def get_arc_count(self) -> int:
+    """Returns the number of arcs in the graph."""
+    return self._arc_count
+
+  def get_index(self, node: str) -> int:
+    """Returns the node ID of a node name.
+
+    Raises:
+        KeyError: If the node is not part of the graph.
+    """
+    return self.node_index[node]
+
+  def get_name(self, node_id: int) -> str:
+    """Returns the node name of a node ID."""
+    return self.node_names[node_id]
+
+  def get_extra_arcs(self, source: int) -> dict:
+    """Returns the arcs of a node that were added after the graph
+    was built, or None if there are none.
+    """
+    return self._extra_arcs.get(source)
+
+  def neighbours(self, node_id: int) -> list:
+    """Returns every arc leaving a node.
+
+    Args:
+        node_id (int): Node ID.
+
+    Returns:
+        list: List of (node ID, distance) tuples.
+    """
+    start = self.offsets[node_id]
+    end = self.offsets[node_id + 1]
+    arcs = list(zip(self.targets[start:end], self.weights[start:end]))
+    if self._removed_count:
+      arcs = [(target, weight) for (target, weight) in arcs if target != _REMOVED_ARC]
+    if node_id in self._extra_arcs:
+      arcs.extend(self._extra_arcs[node_id].items())
+    return arcs
+
+  def _find_arc(self, source: int, target: int) -> int:
+    """Returns the CSR position of an arc, or -1 if it is not
+    stored in the CSR arrays.
+    """
+    for position in range(self.offsets[source], self.offsets[source + 1]):
+      if self.targets[position] == target:
+        return position
+    return -1
+
+  def get_arc_weight(self, source: int, target: int) -> int:
+    """Returns the distance of an arc.
+
+    Args:
+        source (int): Node ID the arc starts at.
+        target (int): Node ID the arc leads to.
+
+    Returns:
+        int: Distance of the arc, or None if it does not exist.
+    """
+    position = self._find_arc(source, target)
+    if position >= 0:
+      return self.weights[position]
+    return self._extra_arcs.get(source, {}).get(target)
+
+  def set_arc(self, source: int, target: int, weight: int) -> None:
+    """Adds an arc to the graph or changes its distance.
+
+    Args:
+        source (int): Node ID the arc starts at.
+        target (int): Node ID the arc leads to.
+        weight (int): Distance of the arc.
+
+    Raises:
+        TypeError: If the graph is frozen.
+    """
+    self._ensure_writable()
+    position = self._find_arc(source, target)
+    if position >= 0:
+      self.weights[position] = weight
+    else:
+      extra_arcs = self._extra_arcs.setdefault(source, dict())
+      if target not in extra_arcs:
+        self._arc_count += 1
+      extra_arcs[target] = weight
+    self.version += 1
+
+  def remove_arc(self, source: int, target: int) -> None:
+    """Removes an arc from the graph.
+
+    Args:
+        source (int): Node ID the arc starts at.
+        target (int): Node ID the arc leads to.
+
+    Raises:
+        KeyError: If the arc does not exist.
+        TypeError: If the graph is frozen.
+    """
+    self._ensure_writable()
+    position = self._find_arc(source, target)
+    if position >= 0:
+      self.targets[position] = _REMOVED_ARC
+      self._removed_count += 1
+    elif target in self._extra_arcs.get(source, {}):
+      del self._extra_arcs[source][target]
+    else:
+      raise KeyError((source, target))
+    self._arc_count -= 1
+    self.version += 1
+
+  def iter_arcs(self):
+    """Yields every arc of the graph as a (source, target, distance) tuple."""
+    for source in range(len(self.node_names)):
+      for (target, weight) in self.neighbours(source):
+        yield (source, target, weight)
+
+  def fingerprint(self) -> str:
+    """Returns a digest of the node names and arcs of the graph. Data
+    precomputed for a graph can be checked against it before reuse. The
+    digest is kept until the graph is next modified.
+
+    Returns:
+        str: Hexadecimal digest of the graph.
+    """
+    if self._fingerprint is not None and self._fingerprint[0] == self.version:
+      return self._fingerprint[1]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\n".join(self.node_names).encode("utf-8"))
+    for source in range(len(self.node_names)):
+      for (target, weight) in sorted(self.neighbours(source)):
+        digest.update(b"%d,%d,%d;" % (source, target, weight))
+    self._fingerprint = (self.version, digest.hexdigest())
+    return self._fingerprint[1]
+
+  def get_distance_scale(self) -> float:
+    """Returns the least ratio of an arc's distance to the straight-line
+    distance between its nodes, capped at 1. Every path is at least that
+    factor times the straight-line distance between its ends, so scaled
+    straight-line distances never overestimate. Connection distances need
+    not follow the node coordinates, so the factor can be well below 1.
+    The factor is kept until the graph is next modified.
+
+    Returns:
+        float: Factor between 0 and 1.
+    """
+    if self._distance_scale is not None and self._distance_scale[0] == self.version:
+      return self._distance_scale[1]
+    scale = 1
+    for (source, target, weight) in self.iter_arcs():
+      straight_line_distance = self.straight_line_distance(source, target)
+      if weight < scale * straight_line_distance:
+        scale = weight / straight_line_distance
+    self._distance_scale = (self.version, scale)
+    return scale
+
+  def straight_line_distance(self, node_a: int, node_b: int) -> float:
+    """Returns the straight-line distance between the coordinates of 2 nodes."""
+    return math.hypot(self.coords_x[node_a] - self.coords_x[node_b], \
+      self.coords_y[node_a] - self.coords_y[node_b])
+
+class ConnectionView(MutableMapping):
+  """
+  A dictionary-like view of a CompactGraph where each key is a tuple of
+  2 node names and the value is the distance between them, i.e.
+  `view[(A, B)] = (Dist Between A and B)`. Modifying the view modifies
+  the graph.
+
+  ....
+
+  Attributes
+  ----------
+  graph: CompactGraph
+    The graph being viewed.
+
+  version: int
+    The modification count of the graph being viewed.
+  """
+
+  graph: CompactGraph = None
+
+  def __init__(self, graph: CompactGraph) -> None:
+    self.graph = graph
+
+  @property
+  def version(self) -> int:
+    return self.graph.version
+
+  def _get_ids(self, key: tuple) -> tuple:
+    (node_a, node_b) = key
+    try:
+      return (self.graph.node_index[node_a], self.graph.node_index[node_b])
+    except KeyError:
+      raise KeyError(key) from None
+
+  def __getitem__(self, key: tuple) -> int:
+    weight = self.graph.get_arc_weight(*self._get_ids(key))
+    if weight is None:
+      raise KeyError(key)
+    return weight
+
+  def __setitem__(self, key: tuple, value: int) -> None:
+    self.graph.set_arc(*self._get_ids(key), value)
+
+  def __delitem__(self, key: tuple) -> None:
+    try:
+      self.graph.remove_arc(*self._get_ids(key))
+    except KeyError:
+      raise KeyError(key) from None
+
+  def __iter__(self):
+    node_names = self.graph.node_names
+    for (source, target, _) in self.graph.iter_arcs():
+      yield (node_names[source], node_names[target])
+
+  def __len__(self) -> int:
+    return self.graph.get_arc_count()
+
+class NeighbourView(Mapping):
+  """
+  A read-only dictionary-like view of a CompactGraph where each key is a
+  node name and the value is a list of the names of its neighbouring nodes.
+
+  ....
+
+  Attributes
+  ----------
+  graph: CompactGraph
+    The graph being viewed.
+  """
+
+  graph: CompactGraph = None
+
+  def __init__(self, graph: CompactGraph) -> None:
+    self.graph = graph
+
+  def __getitem__(self, node: str) -> list:
+    node_names = self.graph.node_names
+    return [node_names[target] for (target, _) in self.graph.neighbours(self.graph.node_index[node])]
+
+  def __iter__(self):
+    return iter(self.graph.node_names)
+
+  def __len__(self) -> int:
+    return self.graph.get_node_count()
@@ -0,0 +1,97 @@
+"""
+  This module holds the bin packing used to consolidate packages into as
+  few truck loads as possible.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  BinPacker
+    A class that packs weighted items into trucks with the
+    best-fit-decreasing heuristic.
+"""
+
+import heapq
+from bisect import bisect_left, insort
+
+class BinPacker:
+  """
+  A class that packs weighted items into trucks with the best-fit-decreasing
+  heuristic. Items are taken heaviest first and each goes into the open truck
+  with the least remaining capacity that can still carry it, or a new truck
+  if none can.
+
+  The open trucks are kept in one heap of truck indexes per remaining
+  capacity, and the distinct remaining capacities in a sorted list, so the
+  least one that can carry an item is found with a binary search instead
+  of a scan over every truck. The list only changes when the first truck
+  takes or the last truck leaves a remaining capacity, and never holds
+  more values than there are open trucks, whatever the truck's maximum
+  weight. Among trucks with the same remaining capacity the earliest one
+  is used. Trucks that cannot carry even the lightest item are closed.
+
+  ....
+
+  Attributes
+  ----------
+  truck_max_weight: int
+    Maximum weight a single truck load can carry.
+
+  Methods
+  -------
+  pack(weights: list) -> list
+    Returns the item indexes packed into each truck.
+  """
+
+  truck_max_weight: int = None
+
+  def __init__(self, truck_max_weight: int) -> None:
+    self.truck_max_weight = truck_max_weight
+
+  def pack(self, weights: list) -> list:
+    """Packs items into trucks, heaviest first. Items of equal weight
+    are packed in the order given, so callers can keep items that are
+    close to each other together.
+
+    Args:
+        weights (list): Weight of every item. An item heavier than a truck
+        can carry is given a truck of its own.
+
+    Returns:
+        list: List of trucks, each a list of the indexes of the items
+        packed into it.
+    """
+    if not weights:
+      return []
+    order = sorted(range(len(weights)), key=lambda index: -weights[index])
+    min_weight = weights[order[-1]]
+
+    trucks = []
+    # Per remaining capacity, a heap of the indexes of the open trucks with it
+    open_trucks = dict()
+    # Sorted remaining capacities of the open trucks, each listed once
+    capacities = []
+    for index in order:
+      weight = weights[index]
+      position = bisect_left(capacities, weight)
+      if position == len(capacities):
+        truck = len(trucks)
+        trucks.append([index])
+        remaining = self.truck_max_weight - weight
+      else:
+        remaining = capacities[position]
+        trucks_with_room = open_trucks[remaining]
+        truck = heapq.heappop(trucks_with_room)
+        if not trucks_with_room:
+          del open_trucks[remaining]
+          del capacities[position]
+        trucks[truck].append(index)
+        remaining -= weight
+      if remaining >= min_weight:
+        if remaining in open_trucks:
+          heapq.heappush(open_trucks[remaining], truck)
+        else:
+          open_trucks[remaining] = [truck]
+          insort(capacities, remaining)
+
+    return trucks
@@ -0,0 +1,131 @@
+"""
+  This module holds the clustering used to split delivery stops into
+  geographic groups that are routed separately.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  CapacitatedClusterer
+    A class that groups weighted points into nearby clusters of limited
+    weight with capacity-aware k-means.
+"""
+
+import math
+from src.module_spatial_index import KDTree
+
+class CapacitatedClusterer:
+  """
+  A class that groups weighted points into nearby clusters of limited
+  weight with capacity-aware k-means. Enough clusters are made to carry
+  the total weight with each cluster filled to fill_ratio of its
+  capacity, seeded with the centroids of the balanced cells of a KDTree
+  over the points. The spare room keeps points from being pushed far
+  from their nearest cluster once the clusters around them fill up.
+
+  Each round assigns the points closest to their nearest centroid first.
+  A point whose nearest cluster is full goes to the nearest cluster with
+  room, found with k-nearest queries on a KDTree of the centroids, or to
+  its nearest cluster if none has room. Centroids then move to the
+  weighted mean of their points, until the assignment stops changing.
+
+  ....
+
+  Attributes
+  ----------
+  capacity: int
+    Weight each cluster is filled up to.
+
+  max_iterations: int
+    Maximum number of assignment rounds.
+
+  fill_ratio: float
+    Share of the capacity the number of clusters is planned for.
+
+  Methods
+  -------
+  cluster(xs: list, ys: list, weights: list) -> list
+    Returns the point indexes of each cluster.
+  """
+
+  capacity: int = None
+  max_iterations: int = None
+  fill_ratio: float = None
+
+  def __init__(self, capacity: int, max_iterations: int = 10, fill_ratio: float = 0.9) -> None:
+    self.capacity = capacity
+    self.max_iterations = max_iterations
+    self.fill_ratio = fill_ratio
+
+  def cluster(self, xs: list, ys: list, weights: list) -> list:
+    """Groups points into nearby clusters of limited weight.
+
+    Args:
+        xs (list): X coordinate of every point.
+        ys (list): Y coordinate of every point.
+        weights (list): Weight of every point.
+
+    Returns:
+        list: List of clusters, each a list of the indexes of its points.
+    """
+    if not weights:
+      return []
+    num_points = len(weights)
+    num_clusters = max(1, math.ceil(sum(weights) / (self.capacity * self.fill_ratio)))
+    seeds = KDTree(range(num_points), xs, ys).partition(num_clusters)
+    centroids = [self._get_centroid(points, xs, ys, weights) for points in seeds]
+
+    assignment = None
+    for _ in range(self.max_iterations):
+      new_assignment = self._assign(centroids, xs, ys, weights)
+      if new_assignment == assignment:
+        break
+      assignment = new_assignment
+      clusters = self._get_clusters(assignment, len(centroids))
+      # Clusters left empty keep their centroid
+      centroids = [self._get_centroid(points, xs, ys, weights) if points else centroid \
+        for (points, centroid) in zip(clusters, centroids)]
+
+    return [points for points in self._get_clusters(assignment, len(centroids)) if points]
+
+  def _assign(self, centroids: list, xs: list, ys: list, weights: list) -> list:
+    """Assigns every point to a cluster, points closest to their
+    nearest centroid first.
+
+    Returns:
+        list: Cluster index of every point.
+    """
+    num_clusters = len(centroids)
+    centroid_index = KDTree(range(num_clusters), [x for (x, _) in centroids], [y for (_, y) in centroids])
+    nearest = [centroid_index.nearest(x, y) for (x, y) in zip(xs, ys)]
+    loads = [0] * num_clusters
+    assignment = [0] * len(weights)
+
+    for point in sorted(range(len(weights)), key=lambda point: nearest[point][1]):
+      weight = weights[point]
+      (cluster, _) = nearest[point]
+      num_candidates = min(8, num_clusters)
+      while loads[cluster] + weight > self.capacity:
+        # Widen the search until a cluster with room is found, or every cluster was tried
+        candidates = centroid_index.k_nearest(xs[point], ys[point], num_candidates)
+        cluster = next((candidate for candidate in candidates if loads[candidate] + weight <= self.capacity), \
+          candidates[0])
+        if num_candidates == num_clusters:
+          break
+        num_candidates = min(2 * num_candidates, num_clusters)
+      loads[cluster] += weight
+      assignment[point] = cluster
+    return assignment
+
+  def _get_clusters(self, assignment: list, num_clusters: int) -> list:
+    """Returns the point indexes of each cluster of an assignment."""
+    clusters = [[] for _ in range(num_clusters)]
+    for (point, cluster) in enumerate(assignment):
+      clusters[cluster].append(point)
+    return clusters
+
+  def _get_centroid(self, points: list, xs: list, ys: list, weights: list) -> tuple:
+    """Returns the weighted mean of the coordinates of points."""
+    total_weight = sum(weights[point] for point in points) or 1
+    return (sum(xs[point] * weights[point] for point in points) / total_weight, \
+      sum(ys[point] * weights[point] for point in points) / total_weight)
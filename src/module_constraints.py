@@ -11,8 +11,15 @@
 """
 
 from enum import Enum
-from src.module_route_searcher import RouteSearcher
-from src.model_data import ParsedData
+from src.module_route_searcher import RouteSearcher, RoutingModes, HeuristicModes
+from src.module_distance_matrix import DistanceMatrix
+from src.module_shortest_paths import shortest_path_tree
+from src.module_savings import SavingsSolver
+from src.module_local_search import LocalSearchImprover
+from src.module_bin_packing import BinPacker
+from src.module_clustering import CapacitatedClusterer
+from src.model_data import ParsedData, DeliveryStop, PackageStore
+from src.module_instrumentation import Instrumentation, NO_INSTRUMENTATION
 
 class _ConstraintRules(Enum):
   """Enumeration to Easily identify the index of
@@ -23,6 +30,149 @@ class _ConstraintRules(Enum):
   """
   OVERWEIGHT = 0
 
+class DelegationStrategies(Enum):
+  """Enumeration to Easily identify how packages are
+  delegated into truck loads.
+
+  Args:
+      Enum (int): Describes the delegation strategy.
+  """
+  # Merge packages whose routes from the SupplyDepot are prefixes of each other
+  SHARED_ROUTES = 0
+  # Clarke-Wright savings heuristic over the SupplyDepot and package goals
+  SAVINGS = 1
+  # Best-fit-decreasing packing of the packages of each route subtree
+  BIN_PACKING = 2
+  # Capacity-aware k-means over the goal coordinates, then savings within each cluster
+  CLUSTERED = 3
+
+# Maps command line strategy names to their DelegationStrategies
+DELEGATION_STRATEGIES = {
+  "shared-routes": DelegationStrategies.SHARED_ROUTES,
+  "savings": DelegationStrategies.SAVINGS,
+  "bin-packing": DelegationStrategies.BIN_PACKING,
+  "clustered": DelegationStrategies.CLUSTERED
+}
+
+class _RouteTrieNode:
+  """
+  A node of a _RouteTrie, standing for the route from the SupplyDepot to
+  one graph node.
+
+  ....
+
+  Attributes
+  ----------
+  parent: _RouteTrieNode
+    Trie node of the route one step shorter, None for the SupplyDepot.
+
+  children: dict
+    A Dictionary of the next graph node and the trie node of the route
+    extended by it.
+
+  loads: set
+    IDs of the open truck loads whose route ends at this trie node.
+
+  subtree_loads: set
+    IDs of the open truck loads whose route ends at this trie node or
+    any trie node below it.
+  """
+
+  __slots__ = ("parent", "children", "loads", "subtree_loads")
+
+  def __init__(self, parent: "_RouteTrieNode" = None) -> None:
+    self.parent = parent
+    self.children = dict()
+    self.loads = set()
+    self.subtree_loads = set()
+
+class _RouteTrie:
+  """
+  A prefix trie of routes that all begin at the SupplyDepot. A truck load
+  is kept at the trie node its route ends at, so the loads whose route is
+  a prefix of a route are found on the path to the route's trie node, and
+  the loads whose route extends it are found in the trie node's subtree.
+
+  ....
+
+  Methods
+  -------
+  insert(route: list) -> _RouteTrieNode
+    Returns the trie node of a route, adding it if needed.
+
+  add_load(load_id: int, trie_node: _RouteTrieNode)
+    Keeps a truck load at a trie node.
+
+  remove_load(load_id: int, trie_node: _RouteTrieNode)
+    Drops a truck load from a trie node.
+
+  get_shared_route_loads(trie_node: _RouteTrieNode) -> set
+    Returns the truck loads whose route is a prefix or an extension of a route.
+  """
+
+  def __init__(self) -> None:
+    self._root = _RouteTrieNode()
+
+  def insert(self, route: list) -> _RouteTrieNode:
+    """Returns the trie node of a route, adding any missing
+    trie nodes along the way.
+
+    Args:
+        route (list): List of nodes starting at the SupplyDepot.
+
+    Returns:
+        _RouteTrieNode: Trie node of the route.
+    """
+    trie_node = self._root
+    for node in route:
+      child = trie_node.children.get(node)
+      if child is None:
+        child = _RouteTrieNode(trie_node)
+        trie_node.children[node] = child
+      trie_node = child
+    return trie_node
+
+  def add_load(self, load_id: int, trie_node: _RouteTrieNode) -> None:
+    """Keeps a truck load at the trie node its route ends at.
+
+    Args:
+        load_id (int): Truck load ID.
+        trie_node (_RouteTrieNode): Trie node of the load's route.
+    """
+    trie_node.loads.add(load_id)
+    while trie_node is not None:
+      trie_node.subtree_loads.add(load_id)
+      trie_node = trie_node.parent
+
+  def remove_load(self, load_id: int, trie_node: _RouteTrieNode) -> None:
+    """Drops a truck load from the trie node its route ends at.
+
+    Args:
+        load_id (int): Truck load ID.
+        trie_node (_RouteTrieNode): Trie node of the load's route.
+    """
+    trie_node.loads.discard(load_id)
+    while trie_node is not None:
+      trie_node.subtree_loads.discard(load_id)
+      trie_node = trie_node.parent
+
+  def get_shared_route_loads(self, trie_node: _RouteTrieNode) -> set:
+    """Returns the truck loads whose route is a prefix of the route of
+    a trie node or extends it.
+
+    Args:
+        trie_node (_RouteTrieNode): Trie node of a route.
+
+    Returns:
+        set: Set of truck load IDs.
+    """
+    shared_route_loads = set(trie_node.subtree_loads)
+    ancestor = trie_node.parent
+    while ancestor is not None:
+      shared_route_loads.update(ancestor.loads)
+      ancestor = ancestor.parent
+    return shared_route_loads
+
 class TruckDelegator:
   """
     This class will primarily handle solving constraints related
@@ -43,49 +193,458 @@ class TruckDelegator:
     package_types: dict
       A Dictionary that stores data relating types of packages and their respective weights.
 
-    package_data: dict
-      A Dictionary that stores data regarding each individual package and its associated data.
+    package_data: PackageStore
+      A columnar store of each individual package, its goal node ID and its weight.
 
     constraints: dict
       A Dictionary containing a set of constraints that must be abided by to form a valid truck
       load for delivery.
 
+    distance_matrix_path: str
+      Path the all-pairs distance matrix is saved to and loaded from. If None, a matrix
+      covering only the SupplyDepot and package goals is computed in memory.
+
+    strategy: DelegationStrategies
+      Describes how packages are delegated into truck loads.
+
+    improvement_time_budget: float
+      Seconds spent improving the delegated trips with local search. None skips
+      the improvement stage.
+
+    trucks_per_cluster: int
+      Number of full truck loads each cluster of the clustered strategy is filled up to.
+
+    improvement_report: dict
+      Distances before and after the last improvement stage, and the moves it made.
+
+    instrumentation: Instrumentation
+      Collects the time spent in each delegation stage and the merge comparisons and
+      constraint checks made. It is shared with the routeSearcher.
+
     Methods
     -------
-    getOptimizedRoute() -> dict:
+    getOptimizedRoute(package_order: list) -> dict:
       A Function that optimizes the delivery routes for all packages.
 
+    getDistanceMatrix() -> DistanceMatrix:
+      Returns the precomputed node-to-node distances, computing them on first use.
+
+    getTotalDistance(optimized_route: dict) -> int:
+      Returns the total distance travelled by all trips of an optimized route.
+
+    getTruckUtilization(optimized_route: dict) -> list:
+      Returns the percentage of each truck's capacity used by an optimized route.
+
+    getOptimizedRoutesInChunks(package_chunks: Iterator[dict]) -> Iterator[dict]:
+      Optimizes the delivery routes of packages one chunk at a time.
+
+    addPackages(packages: dict) -> dict:
+      Adds packages to the live shared-route truck loads and returns the changed trips.
+
+    removePackages(package_ids: list) -> dict:
+      Removes packages from the live shared-route truck loads and returns the changed trips.
+
+    getDelegatedLoads() -> dict:
+      Returns the live shared-route truck loads by truck load ID.
+
+    updateConnections(changes: dict, optimized_route: dict) -> list:
+      Changes, adds or removes connections and returns the trips they affect.
+
   """
 
   routeSearcher: RouteSearcher = None
   truck_max_weight: int = None
   package_types: dict = None
-  package_data: dict = None
+  package_data: PackageStore = None
   # Key refers to Rule Description, Value is Rule
   contraints = None
-
-  def __init__(self, parsedData: ParsedData) -> None:
-    self.routeSearcher = RouteSearcher(parsedData)
+  distance_matrix_path: str = None
+  strategy: DelegationStrategies = None
+  improvement_time_budget: float = None
+  trucks_per_cluster: int = None
+  improvement_report: dict = None
+  instrumentation: Instrumentation = None
+
+  def __init__(self, parsedData: ParsedData, routing_mode: RoutingModes = RoutingModes.PER_PACKAGE_SEARCH, \
+    route_cache_size: int = 1024, distance_matrix_path: str = None, \
+    heuristic_mode: HeuristicModes = HeuristicModes.EUCLIDEAN, \
+    strategy: DelegationStrategies = DelegationStrategies.SHARED_ROUTES, \
+    improvement_time_budget: float = None, instrumentation: Instrumentation = None, \
+    trucks_per_cluster: int = 10) -> None:
+    self.instrumentation = NO_INSTRUMENTATION if instrumentation is None else instrumentation
+    self.routeSearcher = RouteSearcher(parsedData, routing_mode, route_cache_size, heuristic_mode, \
+      instrumentation=self.instrumentation)
+    self.distance_matrix_path = distance_matrix_path
+    self._distance_matrix = None
+    # Live shared-route delegation state, kept for incremental updates
+    self._route_trie = None
+    self._combined_loads = None
+    self._package_loads = None
+    self._known_load_count = 0
+    self.strategy = strategy
+    self.improvement_time_budget = improvement_time_budget
+    self.trucks_per_cluster = trucks_per_cluster
     self.truck_max_weight = parsedData.get_max_truck_weight()
     self.package_types = parsedData.get_package_type_data()
-    self.package_data = parsedData.get_package_data()
+    # Packages are added and removed on a copy, so the parsed data can be shared
+    self.package_data = parsedData.get_package_data().copy()
+    self.routeSearcher.package_data = self.package_data
     # Key refers to Rule Description, Value is Rule
     self.contraints = {
       _ConstraintRules.OVERWEIGHT.value: self._isTruckOverweight
     }
 
-  def getOptimizedRoute(self) -> dict:
+  def getOptimizedRoute(self, package_order: list = None) -> dict:
     """Optimizes the delivery route of a set number of packages.
 
+    Args:
+        package_order (list, optional): IDs of all packages in the order
+        they are delegated. Delegation is greedy, so different orders can
+        give different results. Defaults to input order.
+
+    Returns:
+        dict: Dictionary containing truck loads and their individual
+        optimized paths.
+    """
+    if package_order is None:
+      package_order = list(self.package_data.keys())
+    timer = self.instrumentation.timer
+
+    if self.strategy == DelegationStrategies.SAVINGS:
+      trips = self._solveWithSavings(package_order)
+    elif self.strategy == DelegationStrategies.BIN_PACKING:
+      trips = self._solveWithBinPacking(package_order)
+    elif self.strategy == DelegationStrategies.CLUSTERED:
+      # Each cluster is improved and routed with its own distance matrix
+      optimized_route = self._solveWithClusters(package_order)
+      self.instrumentation.count("trips", len(optimized_route))
+      return optimized_route
+    else:
+      truck_loads = self.routeSearcher.getRoutesForEachPackage(package_order)
+      with timer("delegation"):
+        optimized_route = self._combineSharedRoutes(truck_loads)
+      if self.improvement_time_budget is None:
+        self.instrumentation.count("trips", len(optimized_route))
+        return optimized_route
+      trips = self._getStopsOfTrips(optimized_route)
+
+    if self.improvement_time_budget is not None:
+      distance_matrix = self.getDistanceMatrix()
+      with timer("local_search"):
+        improver = LocalSearchImprover(distance_matrix, 0, self.truck_max_weight, \
+          self.improvement_time_budget)
+        (trips, self.improvement_report) = improver.improve(trips)
+    self.instrumentation.count("trips", len(trips))
+    return self._buildTripsFromStops(trips)
+
+  def getOptimizedRoutesInChunks(self, package_chunks):
+    """Optimizes the delivery routes of packages one chunk at a time,
+    so only one chunk of packages is held in memory. Each chunk replaces
+    the packages of the TruckDelegator and its packages are delegated
+    grouped by goal node. Routes stay cached across chunks, so memory
+    grows with the number of distinct goals, not the number of packages.
+    Packages of different chunks never share a truck load.
+
+    Args:
+        package_chunks (Iterator[dict]): Chunks of package IDs and their
+        (Package Type, Goal Node) tuples.
+
+    Yields:
+        dict: Dictionary containing the truck loads of a chunk and their
+        individual optimized paths, numbered on from the previous chunk.
+    """
+    num_trips = 0
+    for package_chunk in package_chunks:
+      self.package_data.clear()
+      self.package_data.update(package_chunk)
+      packages_per_goal = dict()
+      for (package_id, (_, goal)) in package_chunk.items():
+        packages_per_goal.setdefault(goal, []).append(package_id)
+
+      optimized_route = self.getOptimizedRoute([package_id \
+        for package_ids in packages_per_goal.values() for package_id in package_ids])
+      yield {num_trips + trip_id: trip for (trip_id, trip) in enumerate(optimized_route.values())}
+      num_trips += len(optimized_route)
+
+  def getTotalDistance(self, optimized_route: dict) -> int:
+    """Returns the total distance travelled by all trips of
+    an optimized route.
+
+    Args:
+        optimized_route (dict): Dictionary containing truck loads and
+        their individual optimized paths.
+
+    Returns:
+        int: Sum of the distances of every trip's route.
+    """
+    connections = self.routeSearcher.coord_connections
+    return sum(connections[(node_a, node_b)] \
+      for (_, route) in optimized_route.values() for (node_a, node_b) in zip(route, route[1:]))
+
+  def getTruckUtilization(self, optimized_route: dict) -> list:
+    """Returns the percentage of each truck's capacity used by
+    an optimized route.
+
+    Args:
+        optimized_route (dict): Dictionary containing truck loads and
+        their individual optimized paths.
+
+    Returns:
+        list: Percentage of the maximum truck weight carried on every
+        trip, in trip order.
+    """
+    return [100 * self.package_data.get_total_weight(packages) / self.truck_max_weight \
+      for (packages, _) in optimized_route.values()]
+
+  def _solveWithSavings(self, package_order: list) -> list:
+    """Delegates packages to truck loads with the Clarke-Wright
+    savings heuristic.
+
+    Args:
+        package_order (list): IDs of the packages to delegate.
+
+    Returns:
+        list: List of trips, each a list of DeliveryStops in the order
+        they are visited.
+    """
+    solver = SavingsSolver(self.getDistanceMatrix(), 0, self.truck_max_weight)
+    stops = self._groupPackagesIntoStops(package_order)
+    with self.instrumentation.timer("delegation"):
+      return solver.solve(stops)
+
+  def _solveWithClusters(self, package_order: list) -> dict:
+    """Delegates packages cluster first, route second. The stops are
+    grouped into geographic clusters of about trucks_per_cluster full
+    truck loads, and each cluster is solved with the savings heuristic
+    and improved on its own, splitting the improvement time budget
+    evenly. Savings compares every pair of stops of a cluster instead of
+    every pair of stops. Without a distance_matrix_path each cluster gets
+    a matrix whose runs of Dijkstra's Algorithm stop once the cluster's
+    goals are reached, plus the SupplyDepot's row, which is computed once
+    and shared by every cluster. The matrix is dropped once the cluster
+    is routed.
+
+    Args:
+        package_order (list): IDs of the packages to delegate.
+
+    Returns:
+        dict: Dictionary containing truck loads and their individual
+        optimized paths.
+    """
+    timer = self.instrumentation.timer
+    graph = self.routeSearcher.graph
+    stops = self._groupPackagesIntoStops(package_order)
+    clusterer = CapacitatedClusterer(self.trucks_per_cluster * self.truck_max_weight)
+    with timer("clustering"):
+      clusters = clusterer.cluster([graph.coords_x[stop.node] for stop in stops], \
+        [graph.coords_y[stop.node] for stop in stops], [stop.weight for stop in stops])
+
+    depot = 0
+    if self.distance_matrix_path is None:
+      with timer("distance_matrix"):
+        depot_row = {depot: shortest_path_tree(graph, depot)}
+
+    optimized_route = dict()
+    self.improvement_report = None
+    for cluster in clusters:
+      cluster_stops = [stops[index] for index in cluster]
+      if self.distance_matrix_path is not None:
+        distance_matrix = self.getDistanceMatrix()
+      else:
+        goals = [stop.node for stop in cluster_stops]
+        with timer("distance_matrix"):
+          distance_matrix = DistanceMatrix.compute(graph, [depot, *goals], goals, depot_row)
+      with timer("delegation"):
+        trips = SavingsSolver(distance_matrix, 0, self.truck_max_weight).solve(cluster_stops)
+
+      if self.improvement_time_budget is not None:
+        with timer("local_search"):
+          improver = LocalSearchImprover(distance_matrix, 0, self.truck_max_weight, \
+            self.improvement_time_budget / len(clusters))
+          (trips, report) = improver.improve(trips)
+        # Reports of the clusters are added up
+        self.improvement_report = {key: value + (self.improvement_report[key] if self.improvement_report else 0) \
+          for (key, value) in report.items()}
+      for trip in self._buildTripsFromStops(trips, distance_matrix).values():
+        optimized_route[len(optimized_route)] = trip
+    return optimized_route
+
+  def _solveWithBinPacking(self, package_order: list) -> list:
+    """Delegates packages to truck loads by packing the packages of
+    each route subtree, i.e. those whose routes leave the SupplyDepot
+    through the same neighbour, with the best-fit-decreasing heuristic.
+
+    Packages are ordered depth-first by route before packing, so packages
+    of equal weight on the same branch end up on the same truck, and
+    every trip visits its stops in that order.
+
+    Args:
+        package_order (list): IDs of the packages to delegate.
+
+    Returns:
+        list: List of trips, each a list of DeliveryStops in the order
+        they are visited.
+    """
+    graph = self.routeSearcher.graph
+    # Per route subtree, (Route as Node IDs, Package ID) of its packages
+    subtrees = dict()
+    for (package_id, route) in self.routeSearcher.getRoutesForEachPackage(package_order).values():
+      if isinstance(route, list):
+        subtrees.setdefault(tuple(route[:2]), []).append((list(map(graph.get_index, route)), package_id))
+      else:
+        # Routes that were not found cannot be shared
+        subtrees[package_id] = [([self.package_data.get_goal(package_id)], package_id)]
+
+    packer = BinPacker(self.truck_max_weight)
+    trips = []
+    with self.instrumentation.timer("delegation"):
+      for packages in subtrees.values():
+        packages.sort()
+        weights = [self.package_data.get_weight(package_id) for (_, package_id) in packages]
+        for truck in packer.pack(weights):
+          stops = dict()
+          for index in sorted(truck):
+            (route, package_id) = packages[index]
+            goal = route[-1]
+            if goal not in stops:
+              stops[goal] = DeliveryStop(goal, [], 0)
+            stops[goal].packages.append(package_id)
+            stops[goal].weight += weights[index]
+          trips.append(list(stops.values()))
+    return trips
+
+  def _groupPackagesIntoStops(self, package_ids) -> list:
+    """Groups packages going to the same goal into stops. A goal
+    whose packages are too heavy for one truck is split over several
+    stops, packed heaviest package first.
+
+    Args:
+        package_ids (Iterable[str]): IDs of the packages to group.
+
+    Returns:
+        list: List of DeliveryStops.
+    """
+    packages_per_goal = dict()
+    for package_id in package_ids:
+      packages_per_goal.setdefault(self.package_data.get_goal(package_id), []).append(package_id)
+
+    stops = []
+    for (goal, package_ids) in packages_per_goal.items():
+      goal_stops = []
+      for package_id in sorted(package_ids, key=self._extract_package_weight, reverse=True):
+        package_weight = self._extract_package_weight(package_id)
+        for stop in goal_stops:
+          if stop.weight + package_weight <= self.truck_max_weight:
+            stop.packages.append(package_id)
+            stop.weight += package_weight
+            break
+        else:
+          goal_stops.append(DeliveryStop(goal, [package_id], package_weight))
+      stops.extend(goal_stops)
+    return stops
+
+  def _getStopsOfTrips(self, optimized_route: dict) -> list:
+    """Converts truck loads into trips of stops, ordered by where
+    their goal first appears on the load's route.
+
+    Args:
+        optimized_route (dict): Dictionary containing truck loads and
+        their individual optimized paths.
+
+    Returns:
+        list: List of trips, each a list of DeliveryStops in the order
+        they are visited.
+    """
+    graph = self.routeSearcher.graph
+    trips = []
+    for (packages, route) in optimized_route.values():
+      route_positions = dict()
+      for (position, node) in enumerate(route):
+        route_positions.setdefault(node, position)
+      stops = dict()
+      for package_id in packages:
+        goal = self.package_data.get_goal(package_id)
+        if goal not in stops:
+          stops[goal] = DeliveryStop(goal, [], 0)
+        stops[goal].packages.append(package_id)
+        stops[goal].weight += self.package_data.get_weight(package_id)
+      trips.append(sorted(stops.values(), key=lambda stop: route_positions[graph.node_names[stop.node]]))
+    return trips
+
+  def _buildTripsFromStops(self, trips: list, distance_matrix: DistanceMatrix = None) -> dict:
+    """Converts trips of stops into truck loads and the route from
+    the SupplyDepot through every stop of the trip.
+
+    Args:
+        trips (list): List of trips, each a list of DeliveryStops in
+        the order they are visited.
+        distance_matrix (DistanceMatrix, optional): Matrix covering the
+        stops of the trips. Defaults to getDistanceMatrix().
+
     Returns:
         dict: Dictionary containing truck loads and their individual
         optimized paths.
     """
-    truck_loads = self.routeSearcher.getRoutesForEachPackage()
-    return self._combineSharedRoutes(truck_loads)
+    if distance_matrix is None:
+      distance_matrix = self.getDistanceMatrix()
+    node_names = self.routeSearcher.graph.node_names
+    optimized_route = dict()
+    for trip in trips:
+      route = [0]
+      packages = []
+      for stop in trip:
+        path = distance_matrix.get_path(route[-1], stop.node)
+        if path is None:
+          path = [route[-1], stop.node]
+        route.extend(path[1:])
+        packages.extend(stop.packages)
+      optimized_route[len(optimized_route)] = (packages, [node_names[node_id] for node_id in route])
+    return optimized_route
+
+  def getDistanceMatrix(self) -> DistanceMatrix:
+    """Returns the precomputed shortest distances between nodes,
+    computing them on first use. Without a distance_matrix_path the
+    matrix covers the SupplyDepot and package goals, and is recomputed
+    once packages go to goals it does not cover. With a distance_matrix_path the
+    all-pairs matrix is memory-mapped from disk when it matches the
+    current graph, and recomputed and saved otherwise.
+
+    Returns:
+        DistanceMatrix: Matrix of shortest distances and next hops.
+    """
+    graph = self.routeSearcher.graph
+    if self._distance_matrix is not None and self._distance_matrix.graph_fingerprint != graph.fingerprint():
+      self._distance_matrix = None
+
+    if self.distance_matrix_path is not None:
+      if self._distance_matrix is None:
+        with self.instrumentation.timer("distance_matrix"):
+          self._distance_matrix = DistanceMatrix.load_or_compute(self.distance_matrix_path, graph)
+    else:
+      # The in-memory matrix only covers the goals of the packages it was computed for
+      goals = self._getGoalNodes()
+      if self._distance_matrix is None or not all(map(self._distance_matrix.has_destination, goals)):
+        depot = 0
+        with self.instrumentation.timer("distance_matrix"):
+          self._distance_matrix = DistanceMatrix.compute(graph, [depot, *goals])
+    return self._distance_matrix
+
+  def _getGoalNodes(self) -> set:
+    """Returns the node IDs of the goals of every package."""
+    return {goal for (package_id, goal) in zip(self.package_data.package_ids, self.package_data.goals) \
+      if package_id is not None}
 
   def _combineSharedRoutes(self, individual_truck_loads: dict) -> dict:
-    """Combines a set of truck loads if any of them share a common route
+    """Combines a set of truck loads if any of them share a common route.
+    Each package joins the earliest truck load whose route is a prefix
+    of its own route or extends it, as long as the load stays within the
+    weight limit. Otherwise it starts its own load.
+
+    Candidate loads are found by walking a prefix trie of the routes and
+    the weight of every load is kept as a running total, so packages are
+    never compared against loads that do not share their route. The trie
+    and loads are kept afterwards so packages can be added and removed
+    incrementally.
 
     Args:
         individual_truck_loads (dict): Dictionary containing individidual
@@ -94,45 +653,248 @@ class TruckDelegator:
     Returns:
         dict: Dictionary containing combined truck load information.
     """
-    combined_package_routes = dict()
+    self._route_trie = _RouteTrie()
+    # Per truck load, [Packages, Route, Trie Node of Route, Weight], None once emptied
+    self._combined_loads = []
+    # Per package, (Truck Load ID, Route)
+    self._package_loads = dict()
 
-    for truck_load_id, load_data in individual_truck_loads.items():
+    for (individual_package, individual_route) in individual_truck_loads.values():
+      self._delegatePackage(individual_package, individual_route)
+    self._known_load_count = len(self._combined_loads)
 
-        isMerged = False
-        (individual_package, individual_route) = load_data
-        
-        for newtruck_id, (combined_packages, combined_route) in combined_package_routes.items():
-          hypothetical_new_package_load = combined_packages + [individual_package]
+    return self.getDelegatedLoads()
 
-          """  If merging these 2 packages into a single truck load causes a constraint fail then don't bother. """
-          if self.contraints[_ConstraintRules.OVERWEIGHT.value](hypothetical_new_package_load):
-            continue
-          
-          """ Find overlapping route and merge them together. """
-          if self._isSubList(individual_route, combined_route):
-            combined_package_routes[newtruck_id] = (hypothetical_new_package_load, combined_route)
-            isMerged = True
-          elif self._isSubList(combined_route, individual_route):
-            combined_package_routes[newtruck_id] = (hypothetical_new_package_load, individual_route)
-            isMerged = True
-          
-        """ If overlapping route not found, for now package will be in its own load. """
-        if not isMerged:
-          combined_package_routes[len(combined_package_routes.keys())] = ([individual_package], individual_route)
+  def _delegatePackage(self, package_id: str, route) -> int:
+    """Puts a package into the earliest open truck load sharing its
+    route that can carry it, or a new truck load.
+
+    Args:
+        package_id (str): Package ID.
+        route (list | str): Route of the package from the SupplyDepot, or
+        the error message if it was not found.
 
-    return combined_package_routes
+    Returns:
+        int: ID of the truck load the package was put into.
+    """
+    route_trie = self._route_trie
+    combined_loads = self._combined_loads
+    package_weight = self._extract_package_weight(package_id)
+
+    # Routes that were not found cannot be shared
+    if not isinstance(route, list):
+      load_id = len(combined_loads)
+      combined_loads.append([[package_id], route, None, package_weight])
+      self._package_loads[package_id] = (load_id, route)
+      return load_id
+
+    trie_node = route_trie.insert(route)
+    shared_route_loads = route_trie.get_shared_route_loads(trie_node)
+    fitting_loads = [load_id for load_id in shared_route_loads \
+      if combined_loads[load_id][3] + package_weight <= self.truck_max_weight]
+    if self.instrumentation.enabled:
+      # Every load sharing the route is compared and weight checked once
+      self.instrumentation.count("merge_comparisons", len(shared_route_loads))
+      self.instrumentation.count("constraint_checks", len(shared_route_loads))
+
+    """ If overlapping route not found, for now package will be in its own load. """
+    if not fitting_loads:
+      load_id = len(combined_loads)
+      combined_loads.append([[package_id], route, trie_node, package_weight])
+      route_trie.add_load(load_id, trie_node)
+    else:
+      """ Merge into the earliest load sharing the route, keeping the longer route. """
+      load_id = min(fitting_loads)
+      load = combined_loads[load_id]
+      load[0].append(package_id)
+      load[3] += package_weight
+      if len(route) > len(load[1]):
+        route_trie.remove_load(load_id, load[2])
+        load[1] = route
+        load[2] = trie_node
+        route_trie.add_load(load_id, trie_node)
+
+    # Loads that cannot take even the lightest package are closed
+    load = combined_loads[load_id]
+    if load[3] + min(self.package_types.values(), default=0) > self.truck_max_weight:
+      route_trie.remove_load(load_id, load[2])
+
+    self._package_loads[package_id] = (load_id, route)
+    return load_id
+
+  def getDelegatedLoads(self) -> dict:
+    """Returns the truck loads currently held by shared-route
+    delegation, keyed by their stable truck load IDs.
+
+    Returns:
+        dict: Dictionary containing truck loads and their individual
+        optimized paths.
+    """
+    return {load_id: (list(load[0]), load[1]) \
+      for (load_id, load) in enumerate(self._combined_loads) if load is not None}
+
+  def updateConnections(self, changes: dict, optimized_route: dict = None) -> list:
+    """Changes the distance of connections, adds new ones or removes
+    them through the RouteSearcher, which repairs only the routes they
+    affect, and reports the trips of an optimized route they affect.
+    Affected trips keep their routes until they are delegated again,
+    e.g. by removing and adding back their packages.
+
+    Args:
+        changes (dict): A Dictionary of (Node A, Node B) connections and
+        their new distance, or None to remove the connection.
+        optimized_route (dict, optional): Dictionary containing truck
+        loads and their individual optimized paths. Defaults to the live
+        shared-route truck loads.
+
+    Raises:
+        ValueError: If a node is unknown, a distance is not positive or
+        a removed connection does not exist.
+
+    Returns:
+        list: IDs of the trips whose route uses a changed connection, or
+        is shortened by a connection that got shorter or was added.
+    """
+    changed_arcs = self.routeSearcher.updateConnections(changes)
+    if optimized_route is None:
+      optimized_route = self.getDelegatedLoads() if self._combined_loads is not None else dict()
+    if not changed_arcs:
+      return []
+    # Routes that were not found are left out
+    return [trip_id for (trip_id, (_, route)) in optimized_route.items() \
+      if isinstance(route, list) and self.routeSearcher.isRouteAffected(route, changed_arcs)]
+
+  def addPackages(self, packages: dict) -> dict:
+    """Adds packages to the live shared-route truck loads, updating
+    only the loads they join. Routes come from the RouteSearcher's
+    cache, so already seen goals are never searched again.
 
-  def _extract_package_weight(self, package_id: str) -> str:
-    """Extracts a package's category from its ID
+    Args:
+        packages (dict): Dictionary of new package IDs and their
+        (Package Type, Goal Node) tuples.
+
+    Raises:
+        ValueError: A package ID already exists, or its type or goal
+        is unknown.
+
+    Returns:
+        dict: Diff of the trips, see _getLoadsDiff.
+    """
+    self._ensureLiveLoads()
+    for (package_id, (category, goal)) in packages.items():
+      if package_id in self.package_data:
+        raise ValueError(f"Package {package_id} already exists")
+      if category not in self.package_types:
+        raise ValueError(f"Package {package_id} has unknown package type {category}")
+      if goal not in self.routeSearcher.graph.node_index:
+        raise ValueError(f"Package {package_id} is delivered to unknown node {goal}")
+
+    self.package_data.update(packages)
+
+    changed_loads = set()
+    for (package_id, route) in self.routeSearcher.getRoutesForEachPackage(list(packages)).values():
+      changed_loads.add(self._delegatePackage(package_id, route))
+    return self._getLoadsDiff(changed_loads)
+
+  def removePackages(self, package_ids: list) -> dict:
+    """Removes packages from the live shared-route truck loads,
+    updating only the loads that carried them. A load keeps the longest
+    route of its remaining packages, is dropped once empty and reopens
+    for new packages once it has room again.
+
+    Args:
+        package_ids (list): IDs of the packages to remove.
+
+    Raises:
+        ValueError: A package ID does not exist or is given more than
+        once. Nothing is removed then.
+
+    Returns:
+        dict: Diff of the trips, see _getLoadsDiff.
+    """
+    self._ensureLiveLoads()
+    # Every ID is checked before any package is removed
+    seen_package_ids = set()
+    for package_id in package_ids:
+      if package_id not in self._package_loads:
+        raise ValueError(f"Package {package_id} does not exist")
+      if package_id in seen_package_ids:
+        raise ValueError(f"Package {package_id} is removed more than once")
+      seen_package_ids.add(package_id)
+
+    route_trie = self._route_trie
+    min_package_weight = min(self.package_types.values(), default=0)
+    changed_loads = set()
+    for package_id in package_ids:
+      (load_id, _) = self._package_loads.pop(package_id)
+      load = self._combined_loads[load_id]
+      load[0].remove(package_id)
+      load[3] -= self._extract_package_weight(package_id)
+      del self.package_data[package_id]
+      changed_loads.add(load_id)
+
+      if load[2] is None:
+        if not load[0]:
+          self._combined_loads[load_id] = None
+        continue
+      route_trie.remove_load(load_id, load[2])
+      if not load[0]:
+        self._combined_loads[load_id] = None
+        continue
+      # Routes of a load's packages are prefixes of each other, so the longest covers them all
+      load[1] = max((self._package_loads[package][1] for package in load[0]), key=len)
+      load[2] = route_trie.insert(load[1])
+      if load[3] + min_package_weight <= self.truck_max_weight:
+        route_trie.add_load(load_id, load[2])
+
+    return self._getLoadsDiff(changed_loads)
+
+  def _ensureLiveLoads(self) -> None:
+    """Delegates every current package with shared-route delegation
+    if no live truck loads exist yet.
+
+    Raises:
+        ValueError: The delegation strategy does not keep live loads.
+    """
+    if self.strategy != DelegationStrategies.SHARED_ROUTES:
+      raise ValueError(f"Incremental delegation needs {DelegationStrategies.SHARED_ROUTES}, not {self.strategy}")
+    if self._combined_loads is None:
+      self._combineSharedRoutes(self.routeSearcher.getRoutesForEachPackage())
+
+  def _getLoadsDiff(self, changed_loads: set) -> dict:
+    """Describes how a set of truck loads changed.
+
+    Args:
+        changed_loads (set): IDs of the truck loads that changed.
+
+    Returns:
+        dict: A Dictionary with "added" and "changed" Dictionaries of the
+        new and updated truck loads (packages and route) by truck load ID,
+        and a sorted "removed" list of the IDs of emptied truck loads.
+    """
+    diff = {"added": dict(), "changed": dict(), "removed": []}
+    for load_id in sorted(changed_loads):
+      load = self._combined_loads[load_id]
+      if load is None:
+        if load_id < self._known_load_count:
+          diff["removed"].append(load_id)
+      elif load_id >= self._known_load_count:
+        diff["added"][load_id] = (list(load[0]), load[1])
+      else:
+        diff["changed"][load_id] = (list(load[0]), load[1])
+    self._known_load_count = len(self._combined_loads)
+    return diff
+
+  def _extract_package_weight(self, package_id: str) -> int:
+    """Extracts a package's weight from its ID
 
     Args:
         package_id (str): Package ID
 
     Returns:
-        str: String representing the package's category
+        int: Weight of the package's category
     """
-    (category, _) = self.package_data[package_id]
-    return self.package_types[category]
+    return self.package_data.get_weight(package_id)
 
   def _isTruckOverweight(self, truck_packages: list) -> bool:
     """Checks if a particular set of packages abide by the
@@ -144,8 +906,8 @@ class TruckDelegator:
     Returns:
         bool: True if they abide by weight constraint, false otherwise.
     """
-    # [Pack_1, Pack_3] -> (map) -> [1, 2] -> (sum) -> 3
-    return sum(map(self._extract_package_weight, truck_packages)) > self.truck_max_weight
+    # [Pack_1, Pack_3] -> [1, 2] -> (sum) -> 3
+    return self.package_data.get_total_weight(truck_packages) > self.truck_max_weight
 
           
   def _isSubList(self, list1: list, list2: list) -> bool:
@@ -0,0 +1,378 @@
+"""
+  This module holds the code for contraction hierarchies, a preprocessing
+  of the graph that answers point-to-point route queries by searching
+  only a small part of it.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  ContractionHierarchy
+    A class that contracts every node of a graph in order of importance
+    and answers shortest route queries with bidirectional upward searches.
+"""
+
+import math
+import heapq
+import os
+from array import array
+from src.model_graph import CompactGraph
+from src.module_storage import write_arrays, map_arrays
+
+# Middle node of an edge that is an original connection and not a shortcut
+_NO_MIDDLE = -1
+
+class ContractionHierarchy:
+  """
+  A class that contracts the nodes of a graph one at a time, from least to
+  most important. When a node is contracted, a shortcut is added between
+  each pair of its remaining neighbours unless a path that avoids the node
+  (a witness) is at least as short. Every shortest path then climbs to a
+  node of highest rank and descends again, so a query only searches
+  upwards from both of its ends.
+
+  Node importance is the edge difference (shortcuts added minus edges
+  removed) plus the number of already contracted neighbours, updated
+  lazily as nodes are contracted. Connections are assumed to be travelled
+  in both directions at the same distance, as InputParser reads them.
+
+  ....
+
+  Attributes
+  ----------
+  node_names: list
+    List of node names where the index of a name is its node ID.
+
+  ranks: array
+    Array of the contraction order of each node ID.
+
+  up_offsets: array
+    Array of the position of the first upward edge of each node ID.
+
+  up_targets: array
+    Array of the higher ranked node ID each upward edge leads to.
+
+  up_weights: array
+    Array of the distance of each upward edge.
+
+  up_middles: array
+    Array of the contracted node each shortcut skips, -1 for original
+    connections.
+
+  graph_fingerprint: str
+    Fingerprint of the graph the hierarchy was built for.
+
+  Methods
+  -------
+  build(graph: CompactGraph, witness_settle_limit: int) -> ContractionHierarchy
+    Contracts every node of a graph.
+
+  load(path: str, graph: CompactGraph) -> ContractionHierarchy
+    Memory-maps a saved hierarchy.
+
+  load_or_build(path: str, graph: CompactGraph) -> ContractionHierarchy
+    Loads a saved hierarchy if it matches the graph, otherwise builds and saves it.
+
+  save(path: str)
+    Saves the hierarchy to disk.
+
+  query(start_node: int, goal_node: int) -> tuple
+    Returns the shortest path between 2 node IDs and its distance.
+  """
+
+  node_names: list = None
+  ranks: array = None
+  up_offsets: array = None
+  up_targets: array = None
+  up_weights: array = None
+  up_middles: array = None
+  graph_fingerprint: str = None
+
+  def __init__(self, node_names: list, ranks, up_offsets, up_targets, up_weights, up_middles, \
+    graph_fingerprint: str) -> None:
+    self.node_names = node_names
+    self.ranks = ranks
+    self.up_offsets = up_offsets
+    self.up_targets = up_targets
+    self.up_weights = up_weights
+    self.up_middles = up_middles
+    self.graph_fingerprint = graph_fingerprint
+    # Nodes settled by the last query
+    self.last_nodes_expanded = 0
+
+  @classmethod
+  def build(cls, graph: CompactGraph, witness_settle_limit: int = 64) -> "ContractionHierarchy":
+    """Contracts every node of a graph and keeps the upward edges
+    (original connections and shortcuts) of each node.
+
+    Args:
+        graph (CompactGraph): Graph to contract.
+        witness_settle_limit (int, optional): Maximum nodes settled by
+        each witness search. Lower limits preprocess faster but may add
+        unnecessary (still correct) shortcuts. Defaults to 64.
+
+    Returns:
+        ContractionHierarchy: The built hierarchy.
+    """
+    num_nodes = graph.get_node_count()
+    # Remaining edges of each node, neighbour -> (distance, middle node)
+    adjacency = [dict() for _ in range(num_nodes)]
+    for (source, target, weight) in graph.iter_arcs():
+      if source != target and weight < adjacency[source].get(target, (math.inf,))[0]:
+        adjacency[source][target] = (weight, _NO_MIDDLE)
+        adjacency[target][source] = (weight, _NO_MIDDLE)
+
+    contracted_neighbours = array('q', bytes(8 * num_nodes))
+    ranks = array('q', bytes(8 * num_nodes))
+    upward_edges = [None] * num_nodes
+
+    def get_priority(node: int) -> int:
+      shortcuts = cls._find_shortcuts(adjacency, node, witness_settle_limit)
+      return len(shortcuts) - len(adjacency[node]) + contracted_neighbours[node]
+
+    heap = [(get_priority(node), node) for node in range(num_nodes)]
+    heapq.heapify(heap)
+    next_rank = 0
+
+    while heap:
+      (_, node) = heapq.heappop(heap)
+      # Lazy update, contract only if the node is still the least important
+      priority = get_priority(node)
+      if heap and priority > heap[0][0]:
+        heapq.heappush(heap, (priority, node))
+        continue
+
+      for (neighbour_a, neighbour_b, distance) in cls._find_shortcuts(adjacency, node, witness_settle_limit):
+        adjacency[neighbour_a][neighbour_b] = (distance, node)
+        adjacency[neighbour_b][neighbour_a] = (distance, node)
+
+      upward_edges[node] = adjacency[node]
+      for neighbour in adjacency[node]:
+        del adjacency[neighbour][node]
+        contracted_neighbours[neighbour] += 1
+      adjacency[node] = dict()
+      ranks[node] = next_rank
+      next_rank += 1
+
+    up_offsets = array('q', [0])
+    up_targets = array('q')
+    up_weights = array('q')
+    up_middles = array('q')
+    for node in range(num_nodes):
+      for (neighbour, (distance, middle)) in upward_edges[node].items():
+        up_targets.append(neighbour)
+        up_weights.append(distance)
+        up_middles.append(middle)
+      up_offsets.append(len(up_targets))
+
+    return cls(list(graph.node_names), ranks, up_offsets, up_targets, up_weights, up_middles, graph.fingerprint())
+
+  @staticmethod
+  def _find_shortcuts(adjacency: list, node: int, witness_settle_limit: int) -> list:
+    """Finds the shortcuts needed to contract a node, i.e. the pairs of
+    its neighbours whose shortest path may pass through it.
+
+    Args:
+        adjacency (list): Remaining edges of each node.
+        node (int): Node ID being contracted.
+        witness_settle_limit (int): Maximum nodes settled by each
+        witness search.
+
+    Returns:
+        list: List of (neighbour, neighbour, distance) shortcuts.
+    """
+    neighbours = list(adjacency[node].items())
+    shortcuts = []
+    for (index, (neighbour_a, (distance_a, _))) in enumerate(neighbours):
+      targets = {neighbour_b: distance_a + distance_b for (neighbour_b, (distance_b, _)) in neighbours[index + 1:]}
+      if not targets:
+        continue
+      max_distance = max(targets.values())
+
+      # Witness search from neighbour_a that avoids the contracted node
+      witness_distances = {neighbour_a: 0}
+      heap = [(0, neighbour_a)]
+      settled = 0
+      while heap and settled < witness_settle_limit:
+        (distance, current_node) = heapq.heappop(heap)
+        if distance > witness_distances[current_node]:
+          continue
+        if distance > max_distance:
+          break
+        settled += 1
+        for (branch, (branch_distance, _)) in adjacency[current_node].items():
+          if branch == node:
+            continue
+          branch_distance += distance
+          if branch_distance < witness_distances.get(branch, math.inf):
+            witness_distances[branch] = branch_distance
+            heapq.heappush(heap, (branch_distance, branch))
+
+      for (neighbour_b, via_distance) in targets.items():
+        if witness_distances.get(neighbour_b, math.inf) > via_distance:
+          shortcuts.append((neighbour_a, neighbour_b, via_distance))
+    return shortcuts
+
+  @classmethod
+  def load(cls, path: str, graph: CompactGraph = None) -> "ContractionHierarchy":
+    """Memory-maps a hierarchy saved by save().
+
+    Args:
+        path (str): Path of the saved hierarchy.
+        graph (CompactGraph, optional): If given, the hierarchy must
+        have been built for this graph.
+
+    Raises:
+        ValueError: If the file is not a saved hierarchy or it was
+        built for a different graph.
+
+    Returns:
+        ContractionHierarchy: The loaded hierarchy.
+    """
+    (metadata, arrays) = map_arrays(path)
+    if metadata.get("kind") != "contraction_hierarchy":
+      raise ValueError(f"'{path}' is not a saved contraction hierarchy")
+    if graph is not None and metadata["graph_fingerprint"] != graph.fingerprint():
+      raise ValueError(f"Contraction hierarchy '{path}' was built for a different graph")
+    return cls(metadata["node_names"], arrays["ranks"], arrays["up_offsets"], arrays["up_targets"], \
+      arrays["up_weights"], arrays["up_middles"], metadata["graph_fingerprint"])
+
+  @classmethod
+  def load_or_build(cls, path: str, graph: CompactGraph) -> "ContractionHierarchy":
+    """Loads a saved hierarchy if it was built for the graph, otherwise
+    builds and saves a new one.
+
+    Args:
+        path (str): Path of the saved hierarchy.
+        graph (CompactGraph): Graph the hierarchy is needed for.
+
+    Returns:
+        ContractionHierarchy: The loaded or built hierarchy.
+    """
+    if os.path.exists(path):
+      try:
+        return cls.load(path, graph)
+      except ValueError:
+        pass
+    hierarchy = cls.build(graph)
+    hierarchy.save(path)
+    return hierarchy
+
+  def save(self, path: str) -> None:
+    """Saves the hierarchy so it can be memory-mapped by load().
+
+    Args:
+        path (str): Path of the file to write.
+    """
+    metadata = {
+      "kind": "contraction_hierarchy",
+      "node_names": self.node_names,
+      "graph_fingerprint": self.graph_fingerprint
+    }
+    write_arrays(path, metadata, {
+      "ranks": self.ranks,
+      "up_offsets": self.up_offsets,
+      "up_targets": self.up_targets,
+      "up_weights": self.up_weights,
+      "up_middles": self.up_middles
+    })
+
+  def query(self, start_node: int, goal_node: int) -> tuple:
+    """Finds the shortest path between 2 node IDs with a search upwards
+    from each end, stopping once neither search can improve on the best
+    meeting node found.
+
+    Args:
+        start_node (int): Starting Node ID.
+        goal_node (int): Ending Node ID.
+
+    Returns:
+        tuple: A tuple of the list of node IDs on the shortest path and
+        its total distance, or None if no path exists.
+    """
+    up_offsets = self.up_offsets
+    up_targets = self.up_targets
+    up_weights = self.up_weights
+
+    # Index 0 searches from the start, index 1 from the goal
+    distances = ({start_node: 0}, {goal_node: 0})
+    parents = ({start_node: _NO_MIDDLE}, {goal_node: _NO_MIDDLE})
+    heaps = ([(0, start_node)], [(0, goal_node)])
+    best_distance = math.inf
+    meeting_node = _NO_MIDDLE
+    expanded = 0
+
+    while heaps[0] or heaps[1]:
+      for side in (0, 1):
+        heap = heaps[side]
+        if not heap:
+          continue
+        if heap[0][0] >= best_distance:
+          heap.clear()
+          continue
+        (distance, current_node) = heapq.heappop(heap)
+        if distance > distances[side][current_node]:
+          continue
+        expanded += 1
+
+        other_distance = distances[1 - side].get(current_node)
+        if other_distance is not None and distance + other_distance < best_distance:
+          best_distance = distance + other_distance
+          meeting_node = current_node
+
+        for position in range(up_offsets[current_node], up_offsets[current_node + 1]):
+          branch = up_targets[position]
+          branch_distance = distance + up_weights[position]
+          if branch_distance < distances[side].get(branch, math.inf):
+            distances[side][branch] = branch_distance
+            parents[side][branch] = current_node
+            heapq.heappush(heap, (branch_distance, branch))
+
+    self.last_nodes_expanded = expanded
+    if meeting_node == _NO_MIDDLE:
+      return None
+
+    # Climb from the meeting node back down to each end
+    upward_path = [meeting_node]
+    while parents[0][upward_path[-1]] != _NO_MIDDLE:
+      upward_path.append(parents[0][upward_path[-1]])
+    upward_path.reverse()
+    current_node = meeting_node
+    while parents[1][current_node] != _NO_MIDDLE:
+      current_node = parents[1][current_node]
+      upward_path.append(current_node)
+
+    return (self._unpack_path(upward_path), best_distance)
+
+  def _find_middle(self, node_a: int, node_b: int) -> int:
+    """Returns the node skipped by the edge between 2 node IDs, or -1
+    if the edge is an original connection.
+    """
+    # An edge is stored with whichever end was contracted first
+    (lower, upper) = (node_a, node_b) if self.ranks[node_a] < self.ranks[node_b] else (node_b, node_a)
+    for position in range(self.up_offsets[lower], self.up_offsets[lower + 1]):
+      if self.up_targets[position] == upper:
+        return self.up_middles[position]
+    raise KeyError((node_a, node_b))
+
+  def _unpack_path(self, path: list) -> list:
+    """Replaces every shortcut of a path with the nodes it skips.
+
+    Args:
+        path (list): Node IDs of a path through the hierarchy.
+
+    Returns:
+        list: Node IDs of the same path through the original graph.
+    """
+    unpacked = [path[0]]
+    # Edges still to unpack, the next edge is at the end
+    pending = [(path[index], path[index + 1]) for index in range(len(path) - 2, -1, -1)]
+    while pending:
+      (node_a, node_b) = pending.pop()
+      middle = self._find_middle(node_a, node_b)
+      if middle == _NO_MIDDLE:
+        unpacked.append(node_b)
+      else:
+        pending.append((middle, node_b))
+        pending.append((node_a, middle))
+    return unpacked
@@ -0,0 +1,195 @@
+"""
+  This module holds the code that generates random datasets in the same
+  .csv formats the program reads, so it can be tested and benchmarked on
+  graphs and manifests of any size.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  DataGenerator
+    A class that generates reproducible nodes, connections, truck,
+    package type and package data files from a seed.
+"""
+
+import os
+import csv
+import math
+import random
+
+# Package types of the README and their weights
+DEFAULT_PACKAGE_TYPES = {"S": 1, "M": 2, "L": 3}
+
+class DataGenerator:
+  """
+  A class that generates reproducible datasets from a seed. The same seed
+  and sizes always give the same files.
+
+  Nodes are scattered over a square whose area grows with the number of
+  nodes, so the density stays the same at every size. The first node is
+  the SupplyDepot. To keep the graph connected at any size without
+  comparing every pair of nodes, the nodes are bucketed into grid cells
+  and each node is connected to the next node in a snake-order walk over
+  the cells. Extra connections go to random nodes in the same or
+  neighbouring cells. Every distance is at least the straight-line
+  distance between its nodes, so the A* Search heuristics stay
+  admissible. Some connections are written as unavailable, as in the
+  sample data.
+
+  ....
+
+  Attributes
+  ----------
+  seed: int
+    Seed of the random number generator.
+
+  Methods
+  -------
+  generate_nodes(num_nodes: int) -> list
+    Returns the name and coordinates of every node.
+
+  generate_connections(nodes: list, average_degree: int, unavailable_ratio: float) -> Iterator[tuple]
+    Yields the connections between the nodes.
+
+  generate_packages(nodes: list, num_packages: int, package_types: dict) -> Iterator[tuple]
+    Yields packages delivered to random nodes.
+
+  write_dataset(directory: str, num_nodes: int, num_packages: int) -> tuple
+    Writes a whole dataset and returns the paths of its files.
+  """
+
+  seed: int = None
+
+  def __init__(self, seed: int = 0) -> None:
+    self.seed = seed
+    self._random = random.Random(seed)
+
+  def generate_nodes(self, num_nodes: int) -> list:
+    """Returns the name and coordinates of every node, the
+    SupplyDepot first.
+
+    Args:
+        num_nodes (int): Number of nodes, including the SupplyDepot.
+
+    Returns:
+        list: List of (Node, X Coord, Y Coord) tuples.
+    """
+    side = max(1, math.isqrt(num_nodes)) * 10
+    randint = self._random.randint
+    nodes = [("SupplyDepot", randint(0, side), randint(0, side))]
+    nodes.extend((f"N{index}", randint(0, side), randint(0, side)) for index in range(1, num_nodes))
+    return nodes
+
+  def generate_connections(self, nodes: list, average_degree: int = 4, unavailable_ratio: float = 0.1):
+    """Yields the connections of a connected graph over the nodes.
+
+    Args:
+        nodes (list): List of (Node, X Coord, Y Coord) tuples.
+        average_degree (int, optional): Approximate number of available
+        connections per node. Defaults to 4.
+        unavailable_ratio (float, optional): Share of extra rows written
+        as unavailable connections. Defaults to 0.1.
+
+    Yields:
+        tuple: A (Node A, Node B, Connection, Distance) row.
+    """
+    rand = self._random
+    cell_size = 20
+    cells = dict()
+    for (index, (_, x, y)) in enumerate(nodes):
+      cells.setdefault((x // cell_size, y // cell_size), []).append(index)
+
+    def distance(index_a: int, index_b: int) -> int:
+      (_, x_a, y_a) = nodes[index_a]
+      (_, x_b, y_b) = nodes[index_b]
+      # At least the straight-line distance, so heuristics stay admissible
+      return max(1, math.ceil(math.hypot(x_a - x_b, y_a - y_b) * rand.uniform(1.0, 1.5)))
+
+    # Snake-order walk over the cells so consecutive nodes are close to each other
+    walk = []
+    for (cell_x, cell_y) in sorted(cells, key=lambda cell: (cell[1], -cell[0] if cell[1] % 2 else cell[0])):
+      walk.extend(cells[(cell_x, cell_y)])
+    for (index_a, index_b) in zip(walk, walk[1:]):
+      yield (nodes[index_a][0], nodes[index_b][0], 1, distance(index_a, index_b))
+
+    # The walk gives every node about 2 connections, the rest are extra
+    num_extra = max(0, (average_degree - 2) * len(nodes) // 2)
+    for _ in range(num_extra):
+      index_a = rand.randrange(len(nodes))
+      (_, x, y) = nodes[index_a]
+      cell = cells.get((x // cell_size + rand.randint(-1, 1), y // cell_size + rand.randint(-1, 1)))
+      if not cell:
+        continue
+      index_b = rand.choice(cell)
+      if index_b == index_a:
+        continue
+      yield (nodes[index_a][0], nodes[index_b][0], 1, distance(index_a, index_b))
+      if rand.random() < unavailable_ratio:
+        index_c = rand.randrange(len(nodes))
+        if index_c != index_a:
+          yield (nodes[index_a][0], nodes[index_c][0], 0, distance(index_a, index_c))
+
+  def generate_packages(self, nodes: list, num_packages: int, package_types: dict = DEFAULT_PACKAGE_TYPES):
+    """Yields packages of random types delivered to random nodes
+    other than the SupplyDepot.
+
+    Args:
+        nodes (list): List of (Node, X Coord, Y Coord) tuples.
+        num_packages (int): Number of packages.
+        package_types (dict, optional): Package types and their weights.
+        Defaults to the types of the README.
+
+    Yields:
+        tuple: A (Package ID, Package Type, Goal Node) row.
+    """
+    rand = self._random
+    categories = list(package_types.keys())
+    for index in range(1, num_packages + 1):
+      yield (f"Pack_{index}", rand.choice(categories), nodes[rand.randrange(1, len(nodes))][0])
+
+  def write_dataset(self, directory: str, num_nodes: int, num_packages: int, average_degree: int = 4, \
+    truck_max_units: int = 10, package_types: dict = DEFAULT_PACKAGE_TYPES) -> tuple:
+    """Writes a whole dataset to a directory.
+
+    Args:
+        directory (str): Directory the files are written to, created
+        if needed.
+        num_nodes (int): Number of nodes, including the SupplyDepot.
+        Must be at least 2.
+        num_packages (int): Number of packages.
+        average_degree (int, optional): Approximate number of available
+        connections per node. Defaults to 4.
+        truck_max_units (int, optional): Maximum weight of a truck load.
+        Defaults to 10.
+        package_types (dict, optional): Package types and their weights.
+        Defaults to the types of the README.
+
+    Raises:
+        ValueError: If there are fewer than 2 nodes.
+
+    Returns:
+        tuple: Paths of the nodes, connections, truck, package type and
+        package data files, in the order InputParser takes them.
+    """
+    if num_nodes < 2:
+      raise ValueError("A dataset needs the SupplyDepot and at least 1 other node")
+    os.makedirs(directory, exist_ok=True)
+    paths = tuple(os.path.join(directory, name) for name in \
+      ("nodes.csv", "connections.csv", "truck.csv", "package_units.csv", "packages.csv"))
+    nodes = self.generate_nodes(num_nodes)
+
+    self._write_csv(paths[0], ("Node", "X_Coord", "Y_Coord"), nodes)
+    self._write_csv(paths[1], ("Node_A", "Node_B", "Connection", "Distance"), \
+      self.generate_connections(nodes, average_degree))
+    self._write_csv(paths[2], ("truck_units",), [(truck_max_units,)])
+    self._write_csv(paths[3], ("package_type", "weight"), package_types.items())
+    self._write_csv(paths[4], ("package_id", "package_size", "package_goal"), \
+      self.generate_packages(nodes, num_packages, package_types))
+    return paths
+
+  def _write_csv(self, path: str, header: tuple, rows) -> None:
+    """Writes a header and rows to a .csv file."""
+    with open(path, "w", newline="") as output_file:
+      writer = csv.writer(output_file, lineterminator="\n")
+      writer.writerow(header)
+      writer.writerows(rows)
@@ -0,0 +1,271 @@
+"""
+  This module holds the code that precomputes shortest distances between
+  many pairs of nodes so multi-stop optimizers can look them up instead
+  of searching for routes repeatedly.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  DistanceMatrix
+    A class that holds the shortest distance and next hop between every
+    node and a set of destination nodes.
+"""
+
+import math
+import os
+from array import array
+from src.model_graph import CompactGraph
+from src.module_shortest_paths import shortest_path_tree
+from src.module_storage import write_arrays, map_arrays
+
+class DistanceMatrix:
+  """
+  A class that holds the shortest distance and next hop from every node
+  of the graph to a set of destination nodes (all nodes by default, which
+  makes it an all-pairs matrix). Each destination has one row, computed
+  with a single run of Dijkstra's Algorithm rooted at the destination.
+  Connections are travelled in both directions, so the parent of a node
+  in that tree is its next hop towards the destination.
+
+  The matrix can be saved to disk and memory-mapped on later runs, as
+  long as the graph has not changed since it was computed.
+
+  A matrix only needed between a few nearby nodes can stop each run once
+  those nodes are reached. A pair is then looked up in whichever of its
+  2 rows reached the other node.
+
+  ....
+
+  Attributes
+  ----------
+  node_names: list
+    List of node names where the index of a name is its node ID.
+
+  destinations: list
+    List of the node IDs that have a row in the matrix.
+
+  distances: array
+    Flat array of the shortest distances, row by row. Unreachable pairs
+    are infinity.
+
+  next_hops: array
+    Flat array of the node ID to travel to next, row by row. It is -1 for
+    the destination itself and unreachable nodes.
+
+  graph_fingerprint: str
+    Fingerprint of the graph the matrix was computed for.
+
+  Methods
+  -------
+  compute(graph: CompactGraph, destinations: list, sources: list, rows: dict) -> DistanceMatrix
+    Computes the matrix for a graph.
+
+  load(path: str, graph: CompactGraph) -> DistanceMatrix
+    Memory-maps a saved matrix.
+
+  load_or_compute(path: str, graph: CompactGraph, destinations: list) -> DistanceMatrix
+    Loads a saved matrix if it matches the graph, otherwise computes and saves it.
+
+  save(path: str)
+    Saves the matrix to disk.
+
+  get_distance(node_a: int, node_b: int) -> float
+    Returns the shortest distance between 2 node IDs.
+
+  get_next_hop(node_a: int, node_b: int) -> int
+    Returns the node ID after node_a on the shortest path to node_b.
+
+  get_path(node_a: int, node_b: int) -> list
+    Returns the node IDs on the shortest path between 2 node IDs.
+  """
+
+  node_names: list = None
+  destinations: list = None
+  distances: array = None
+  next_hops: array = None
+  graph_fingerprint: str = None
+
+  def __init__(self, node_names: list, destinations: list, distances, next_hops, graph_fingerprint: str) -> None:
+    self.node_names = node_names
+    self.destinations = destinations
+    self.distances = distances
+    self.next_hops = next_hops
+    self.graph_fingerprint = graph_fingerprint
+    # Row of each destination node ID
+    self._rows = {destination: row for row, destination in enumerate(destinations)}
+
+  @classmethod
+  def compute(cls, graph: CompactGraph, destinations: list = None, sources: list = None, \
+    rows: dict = None) -> "DistanceMatrix":
+    """Computes the shortest distance and next hop from every node
+    to each destination.
+
+    Args:
+        graph (CompactGraph): Graph to compute the matrix for.
+        destinations (list, optional): Node IDs that get a row in the
+        matrix. Defaults to every node of the graph.
+        sources (list, optional): Node IDs the rows are needed for. Each
+        row stops once they are all reached, so only the distances
+        between sources and destinations are kept. Defaults to every node.
+        rows (dict, optional): Rows already computed with
+        shortest_path_tree(), as (distances, parents) tuples keyed by
+        their destination, which are copied instead of recomputed.
+
+    Returns:
+        DistanceMatrix: The computed matrix.
+    """
+    if destinations is None:
+      destinations = range(graph.get_node_count())
+    # Repeated destinations only need 1 row
+    destinations = list(dict.fromkeys(destinations))
+    rows = rows or dict()
+
+    distances = array('d')
+    next_hops = array('q')
+    for destination in destinations:
+      if destination in rows:
+        (row_distances, row_parents) = rows[destination]
+      else:
+        (row_distances, row_parents) = shortest_path_tree(graph, destination, sources)
+      distances.extend(row_distances)
+      next_hops.extend(row_parents)
+    return cls(list(graph.node_names), destinations, distances, next_hops, graph.fingerprint())
+
+  @classmethod
+  def load(cls, path: str, graph: CompactGraph = None) -> "DistanceMatrix":
+    """Memory-maps a matrix saved by save().
+
+    Args:
+        path (str): Path of the saved matrix.
+        graph (CompactGraph, optional): If given, the matrix must
+        have been computed for this graph.
+
+    Raises:
+        ValueError: If the file is not a saved matrix or it was
+        computed for a different graph.
+
+    Returns:
+        DistanceMatrix: The loaded matrix.
+    """
+    (metadata, arrays) = map_arrays(path)
+    if metadata.get("kind") != "distance_matrix":
+      raise ValueError(f"'{path}' is not a saved distance matrix")
+    if graph is not None and metadata["graph_fingerprint"] != graph.fingerprint():
+      raise ValueError(f"Distance matrix '{path}' was computed for a different graph")
+    return cls(metadata["node_names"], list(arrays["destinations"]), arrays["distances"], \
+      arrays["next_hops"], metadata["graph_fingerprint"])
+
+  @classmethod
+  def load_or_compute(cls, path: str, graph: CompactGraph, destinations: list = None) -> "DistanceMatrix":
+    """Loads a saved matrix if it was computed for the graph and
+    covers the destinations, otherwise computes and saves a new one.
+
+    Args:
+        path (str): Path of the saved matrix.
+        graph (CompactGraph): Graph the matrix is needed for.
+        destinations (list, optional): Node IDs that need a row in
+        the matrix. Defaults to every node of the graph.
+
+    Returns:
+        DistanceMatrix: The loaded or computed matrix.
+    """
+    if os.path.exists(path):
+      try:
+        matrix = cls.load(path, graph)
+        wanted = range(graph.get_node_count()) if destinations is None else destinations
+        if all(destination in matrix._rows for destination in wanted):
+          return matrix
+      except ValueError:
+        pass
+    matrix = cls.compute(graph, destinations)
+    matrix.save(path)
+    return matrix
+
+  def save(self, path: str) -> None:
+    """Saves the matrix so it can be memory-mapped by load().
+
+    Args:
+        path (str): Path of the file to write.
+    """
+    metadata = {
+      "kind": "distance_matrix",
+      "node_names": self.node_names,
+      "graph_fingerprint": self.graph_fingerprint
+    }
+    write_arrays(path, metadata, {
+      "destinations": array('q', self.destinations),
+      "distances": self.distances,
+      "next_hops": self.next_hops
+    })
+
+  def has_destination(self, node_id: int) -> bool:
+    """Returns True if a node ID has a row in the matrix."""
+    return node_id in self._rows
+
+  def _get_row_and_column(self, node_a: int, node_b: int) -> tuple:
+    """Returns the row and column holding the pair of node IDs,
+    preferring node_b's row unless only node_a's row reached the pair.
+
+    Raises:
+        KeyError: If neither node has a row in the matrix.
+    """
+    if node_b in self._rows:
+      row = self._rows[node_b]
+      if node_a in self._rows and self.distances[row * len(self.node_names) + node_a] == math.inf:
+        return (self._rows[node_a], node_b)
+      return (row, node_a)
+    return (self._rows[node_a], node_b)
+
+  def get_distance(self, node_a: int, node_b: int) -> float:
+    """Returns the shortest distance between 2 node IDs. At least
+    one of them must have a row in the matrix.
+
+    Args:
+        node_a (int): Node ID.
+        node_b (int): Node ID.
+
+    Returns:
+        float: Shortest distance, infinity if there is no path.
+    """
+    (row, column) = self._get_row_and_column(node_a, node_b)
+    return self.distances[row * len(self.node_names) + column]
+
+  def get_next_hop(self, node_a: int, node_b: int) -> int:
+    """Returns the node ID after node_a on the shortest path to
+    node_b. node_b must have a row in the matrix.
+
+    Args:
+        node_a (int): Node ID the path starts at.
+        node_b (int): Node ID the path ends at.
+
+    Returns:
+        int: Next node ID, -1 if node_a is node_b or there is no path.
+    """
+    return self.next_hops[self._rows[node_b] * len(self.node_names) + node_a]
+
+  def get_path(self, node_a: int, node_b: int) -> list:
+    """Returns the node IDs on the shortest path between 2 node IDs.
+    At least one of them must have a row in the matrix.
+
+    Args:
+        node_a (int): Node ID the path starts at.
+        node_b (int): Node ID the path ends at.
+
+    Returns:
+        list: Node IDs from node_a to node_b, or None if there is no path.
+    """
+    (row, column) = self._get_row_and_column(node_a, node_b)
+    if self.distances[row * len(self.node_names) + column] == math.inf:
+      return None
+    # Walk towards whichever end's row holds the pair and flip the path if needed
+    reverse = self._rows.get(node_b) != row
+    (current_node, destination) = (node_b, node_a) if reverse else (node_a, node_b)
+
+    path = [current_node]
+    while current_node != destination:
+      current_node = self.get_next_hop(current_node, destination)
+      path.append(current_node)
+    if reverse:
+      path.reverse()
+    return path
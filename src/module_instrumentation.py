@@ -0,0 +1,127 @@
+"""
+  This module holds the lightweight instrumentation that the parser,
+  route searcher and truck delegator report their timers and counters to.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  Instrumentation
+    A class that collects named timers and counters of a run.
+
+  Accessible Variables
+  --------------------
+  NO_INSTRUMENTATION
+    A disabled Instrumentation used when none is given.
+"""
+
+import time
+from contextlib import nullcontext
+
+# Shared by every timer of a disabled Instrumentation
+_NO_TIMER = nullcontext()
+
+class _Timer:
+  """A context manager that adds the time spent inside it to a
+  timer of an Instrumentation."""
+
+  __slots__ = ("timers", "name", "started")
+
+  def __init__(self, timers: dict, name: str) -> None:
+    self.timers = timers
+    self.name = name
+
+  def __enter__(self) -> None:
+    self.started = time.perf_counter()
+
+  def __exit__(self, *_) -> None:
+    timer = self.timers.setdefault(self.name, [0.0, 0])
+    timer[0] += time.perf_counter() - self.started
+    timer[1] += 1
+
+class Instrumentation:
+  """
+  A class that collects named timers and counters of a run. When it is
+  disabled, count() returns at once and timer() hands out one shared
+  no-op context manager, so instrumented code costs a method call per
+  call site and nothing more. Hot loops count in bulk after the loop
+  instead of once per iteration.
+
+  ....
+
+  Attributes
+  ----------
+  enabled: bool
+    True if timers and counters are collected.
+
+  counters: dict
+    A Dictionary of each counter name and its count.
+
+  timers: dict
+    A Dictionary of each timer name and its [Seconds, Calls] list.
+
+  Methods
+  -------
+  count(name: str, amount: int)
+    Adds to a counter.
+
+  timer(name: str) -> ContextManager
+    Returns a context manager that times its block under a name.
+
+  get_report() -> dict
+    Returns the timers and counters collected so far.
+
+  reset()
+    Clears every timer and counter.
+  """
+
+  enabled: bool = None
+  counters: dict = None
+  timers: dict = None
+
+  def __init__(self, enabled: bool = True) -> None:
+    self.enabled = enabled
+    self.reset()
+
+  def count(self, name: str, amount: int = 1) -> None:
+    """Adds to a counter.
+
+    Args:
+        name (str): Name of the counter.
+        amount (int, optional): Amount added. Defaults to 1.
+    """
+    if self.enabled:
+      self.counters[name] = self.counters.get(name, 0) + amount
+
+  def timer(self, name: str):
+    """Returns a context manager that adds the time spent in its
+    block to a timer.
+
+    Args:
+        name (str): Name of the timer.
+
+    Returns:
+        ContextManager: Timer of the block.
+    """
+    if self.enabled:
+      return _Timer(self.timers, name)
+    return _NO_TIMER
+
+  def get_report(self) -> dict:
+    """Returns the timers and counters collected so far.
+
+    Returns:
+        dict: A Dictionary with a "timers" Dictionary of each timer's
+        seconds and calls, and a "counters" Dictionary of each counter.
+    """
+    return {
+      "timers": {name: {"seconds": seconds, "calls": calls} for (name, (seconds, calls)) in self.timers.items()},
+      "counters": dict(self.counters)
+    }
+
+  def reset(self) -> None:
+    """Clears every timer and counter."""
+    self.counters = dict()
+    self.timers = dict()
+
+NO_INSTRUMENTATION = Instrumentation(enabled=False)
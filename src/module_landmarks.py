@@ -0,0 +1,135 @@
+"""
+  This module holds the code for the landmark (ALT) heuristic used by
+  A* Search in place of the straight-line distance between nodes.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  LandmarkHeuristic
+    A class that precomputes distances from a set of landmark nodes and
+    derives lower bounds of the distance between any 2 nodes from them.
+"""
+
+import math
+from array import array
+from src.model_graph import CompactGraph
+from src.module_shortest_paths import shortest_path_tree
+
+class LandmarkHeuristic:
+  """
+  A class that precomputes the shortest distance from a few landmark
+  nodes to every node. By the triangle inequality, for any landmark L,
+  `|dist(L, goal) - dist(L, node)|` never overestimates `dist(node, goal)`,
+  so the largest of these bounds is an admissible heuristic that does
+  not depend on node coordinates. Connections are travelled in both
+  directions, so the distances from a landmark are also the distances
+  to it.
+
+  Landmarks are picked by farthest-point selection, which spreads them
+  around the edges of the graph where the bounds are tightest.
+
+  ....
+
+  Attributes
+  ----------
+  landmarks: list
+    List of the landmark node IDs.
+
+  distances: array
+    Flat array of the distance from each landmark to each node, landmark
+    by landmark.
+
+  graph_version: int
+    Version of the graph the distances were computed for.
+
+  Methods
+  -------
+  compute(graph: CompactGraph, num_landmarks: int) -> LandmarkHeuristic
+    Picks the landmarks and computes their distances.
+
+  get_lower_bound(node_a: int, node_b: int) -> float
+    Returns a lower bound of the distance between 2 node IDs.
+
+  heuristic_to(goal_node: int) -> Callable[[int], float]
+    Returns the heuristic function of A* Search towards a goal node ID.
+  """
+
+  landmarks: list = None
+  distances: array = None
+  graph_version: int = None
+
+  def __init__(self, landmarks: list, distances: array, num_nodes: int, graph_version: int) -> None:
+    self.landmarks = landmarks
+    self.distances = distances
+    self.graph_version = graph_version
+    self._num_nodes = num_nodes
+
+  @classmethod
+  def compute(cls, graph: CompactGraph, num_landmarks: int = 8) -> "LandmarkHeuristic":
+    """Picks landmarks by farthest-point selection, starting from the
+    node farthest from the SupplyDepot, and computes the distance from
+    each landmark to every node.
+
+    Args:
+        graph (CompactGraph): Graph to compute the landmarks for.
+        num_landmarks (int, optional): Number of landmarks. Defaults to 8.
+
+    Returns:
+        LandmarkHeuristic: The computed landmarks.
+    """
+    num_nodes = graph.get_node_count()
+    num_landmarks = min(num_landmarks, num_nodes)
+
+    # Distance from each node to the closest landmark picked so far
+    (closest_distances, _) = shortest_path_tree(graph, 0)
+    landmarks = []
+    distances = array('d')
+    while len(landmarks) < num_landmarks:
+      next_landmark = max((distance, node_id) for node_id, distance in enumerate(closest_distances) \
+        if distance != math.inf and node_id not in landmarks)[1]
+      (landmark_distances, _) = shortest_path_tree(graph, next_landmark)
+      landmarks.append(next_landmark)
+      distances.extend(landmark_distances)
+      closest_distances = array('d', map(min, closest_distances, landmark_distances))
+
+    return cls(landmarks, distances, num_nodes, graph.version)
+
+  def get_lower_bound(self, node_a: int, node_b: int) -> float:
+    """Returns a lower bound of the shortest distance between 2 node IDs.
+
+    Args:
+        node_a (int): Node ID.
+        node_b (int): Node ID.
+
+    Returns:
+        float: Largest landmark lower bound of the distance.
+    """
+    return self.heuristic_to(node_b)(node_a)
+
+  def heuristic_to(self, goal_node: int):
+    """Returns the heuristic function of A* Search towards a goal
+    node ID. The goal's landmark distances are looked up once here
+    instead of on every call.
+
+    Args:
+        goal_node (int): Goal Node ID.
+
+    Returns:
+        Callable[[int], float]: Function returning a lower bound of the
+        distance from a node ID to the goal.
+    """
+    num_nodes = self._num_nodes
+    distances = self.distances
+    # (Row start, Distance from landmark to goal) of landmarks that reach the goal
+    goal_rows = [(row * num_nodes, distances[row * num_nodes + goal_node]) \
+      for row in range(len(self.landmarks)) if distances[row * num_nodes + goal_node] != math.inf]
+
+    def heuristic(node_id: int) -> float:
+      bound = 0
+      for (row_start, goal_distance) in goal_rows:
+        node_bound = abs(goal_distance - distances[row_start + node_id])
+        if node_bound > bound and node_bound != math.inf:
+          bound = node_bound
+      return bound
+    return heuristic
@@ -0,0 +1,249 @@
+"""
+  This module holds the local search stage that improves truck trips
+  after packages have been delegated to them.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  LocalSearchImprover
+    A class that shortens trips with 2-opt, relocate and swap moves
+    within a time budget.
+"""
+
+import time
+from src.module_distance_matrix import DistanceMatrix
+
+# Number of moves evaluated between checks of the time budget
+_TIME_CHECK_INTERVAL = 256
+
+class _TimeBudgetExceeded(Exception):
+  """Raised to stop the local search once its time budget is used up."""
+
+class LocalSearchImprover:
+  """
+  A class that improves trips of DeliveryStops with local search moves:
+
+  - 2-opt reverses a section of a single trip.
+  - Relocate moves a stop from one trip into another trip.
+  - Swap exchanges 2 stops between 2 trips.
+
+  Trips start at the SupplyDepot and end at their last stop. Every move is
+  evaluated by the change in distance of the few connections it replaces,
+  looked up in a precomputed distance matrix, so no trip is re-measured in
+  full. Moves between trips must keep both trucks within the weight limit.
+  Improving moves are applied as soon as they are found, until no move
+  improves the trips or the time budget runs out.
+
+  ....
+
+  Attributes
+  ----------
+  distance_matrix: DistanceMatrix
+    Shortest distances between the SupplyDepot and every stop.
+
+  depot: int
+    Node ID of the SupplyDepot.
+
+  truck_max_weight: int
+    Maximum weight a single truck load can carry.
+
+  time_budget: float
+    Maximum number of seconds spent improving.
+
+  Methods
+  -------
+  improve(trips: list) -> tuple
+    Returns the improved trips and a report of the distance saved.
+
+  get_trip_distance(trip: list) -> float
+    Returns the distance travelled by a trip.
+  """
+
+  distance_matrix: DistanceMatrix = None
+  depot: int = None
+  truck_max_weight: int = None
+  time_budget: float = None
+
+  def __init__(self, distance_matrix: DistanceMatrix, depot: int, truck_max_weight: int, \
+    time_budget: float = 1.0) -> None:
+    self.distance_matrix = distance_matrix
+    self.depot = depot
+    self.truck_max_weight = truck_max_weight
+    self.time_budget = time_budget
+
+  def get_trip_distance(self, trip: list) -> float:
+    """Returns the distance travelled by a trip.
+
+    Args:
+        trip (list): List of DeliveryStops in the order they are visited.
+
+    Returns:
+        float: Distance from the SupplyDepot through every stop.
+    """
+    get_distance = self.distance_matrix.get_distance
+    nodes = [self.depot] + [stop.node for stop in trip]
+    return sum(get_distance(node_a, node_b) for (node_a, node_b) in zip(nodes, nodes[1:]))
+
+  def improve(self, trips: list) -> tuple:
+    """Applies improving moves to the trips until none are left or
+    the time budget runs out.
+
+    Args:
+        trips (list): List of trips, each a list of DeliveryStops in
+        the order they are visited.
+
+    Returns:
+        tuple: A tuple of the improved trips (empty trips removed) and
+        a Dictionary reporting the distance before and after, the moves
+        evaluated and applied, and the seconds spent.
+    """
+    trips = [list(trip) for trip in trips if trip]
+    weights = [sum(stop.weight for stop in trip) for trip in trips]
+    distance_before = sum(map(self.get_trip_distance, trips))
+
+    self._deadline = time.perf_counter() + self.time_budget
+    self._started = time.perf_counter()
+    self._moves_evaluated = 0
+    moves_applied = 0
+
+    try:
+      improved = True
+      while improved:
+        improved = False
+        for trip in trips:
+          while self._apply_two_opt(trip):
+            moves_applied += 1
+            improved = True
+        while self._apply_relocate(trips, weights):
+          moves_applied += 1
+          improved = True
+        while self._apply_swap(trips, weights):
+          moves_applied += 1
+          improved = True
+    except _TimeBudgetExceeded:
+      pass
+
+    trips = [trip for trip in trips if trip]
+    report = {
+      "distance_before": distance_before,
+      "distance_after": sum(map(self.get_trip_distance, trips)),
+      "moves_evaluated": self._moves_evaluated,
+      "moves_applied": moves_applied,
+      "seconds": time.perf_counter() - self._started
+    }
+    return (trips, report)
+
+  def _count_move(self) -> None:
+    """Counts an evaluated move and stops the search if the
+    time budget has run out."""
+    self._moves_evaluated += 1
+    if self._moves_evaluated % _TIME_CHECK_INTERVAL == 0 and time.perf_counter() > self._deadline:
+      raise _TimeBudgetExceeded()
+
+  def _node_at(self, trip: list, position: int) -> int:
+    """Returns the node ID at a position of a trip, where position -1
+    is the SupplyDepot and positions past the end are None."""
+    if position < 0:
+      return self.depot
+    if position >= len(trip):
+      return None
+    return trip[position].node
+
+  def _distance(self, node_a: int, node_b: int) -> float:
+    """Returns the distance between 2 node IDs, 0 if either is None
+    (i.e. past the end of an open trip)."""
+    if node_a is None or node_b is None:
+      return 0
+    return self.distance_matrix.get_distance(node_a, node_b)
+
+  def _apply_two_opt(self, trip: list) -> bool:
+    """Reverses the first section of a trip whose reversal shortens it.
+
+    Returns:
+        bool: True if a move was applied.
+    """
+    for start in range(len(trip) - 1):
+      before = self._node_at(trip, start - 1)
+      first = trip[start].node
+      for end in range(start + 1, len(trip)):
+        self._count_move()
+        last = trip[end].node
+        after = self._node_at(trip, end + 1)
+        delta = self._distance(before, last) + self._distance(first, after) \
+          - self._distance(before, first) - self._distance(last, after)
+        if delta < 0:
+          trip[start:end + 1] = reversed(trip[start:end + 1])
+          return True
+    return False
+
+  def _removal_delta(self, trip: list, position: int) -> float:
+    """Returns the change in distance of removing the stop at a position."""
+    before = self._node_at(trip, position - 1)
+    node = trip[position].node
+    after = self._node_at(trip, position + 1)
+    return self._distance(before, after) - self._distance(before, node) - self._distance(node, after)
+
+  def _apply_relocate(self, trips: list, weights: list) -> bool:
+    """Moves the first stop whose move into another trip that can
+    carry it shortens the trips.
+
+    Returns:
+        bool: True if a move was applied.
+    """
+    for (source, source_trip) in enumerate(trips):
+      for (position, stop) in enumerate(source_trip):
+        removal_delta = self._removal_delta(source_trip, position)
+        for (target, target_trip) in enumerate(trips):
+          if target == source or not target_trip or weights[target] + stop.weight > self.truck_max_weight:
+            # Rejected moves are counted too, so the time budget is checked on constrained trips
+            self._count_move()
+            continue
+          for insert_at in range(len(target_trip) + 1):
+            self._count_move()
+            before = self._node_at(target_trip, insert_at - 1)
+            after = self._node_at(target_trip, insert_at)
+            insertion_delta = self._distance(before, stop.node) + self._distance(stop.node, after) \
+              - self._distance(before, after)
+            if removal_delta + insertion_delta < 0:
+              target_trip.insert(insert_at, source_trip.pop(position))
+              weights[source] -= stop.weight
+              weights[target] += stop.weight
+              return True
+    return False
+
+  def _replacement_delta(self, trip: list, position: int, node: int) -> float:
+    """Returns the change in distance of replacing the stop at a
+    position with a stop at another node."""
+    before = self._node_at(trip, position - 1)
+    old_node = trip[position].node
+    after = self._node_at(trip, position + 1)
+    return self._distance(before, node) + self._distance(node, after) \
+      - self._distance(before, old_node) - self._distance(old_node, after)
+
+  def _apply_swap(self, trips: list, weights: list) -> bool:
+    """Exchanges the first pair of stops of different trips whose
+    exchange keeps both trips within the weight limit and shortens them.
+
+    Returns:
+        bool: True if a move was applied.
+    """
+    for trip_a in range(len(trips)):
+      for trip_b in range(trip_a + 1, len(trips)):
+        for (position_a, stop_a) in enumerate(trips[trip_a]):
+          for (position_b, stop_b) in enumerate(trips[trip_b]):
+            # Counted before the weight check, so the time budget is checked on constrained trips
+            self._count_move()
+            weight_change = stop_b.weight - stop_a.weight
+            if weights[trip_a] + weight_change > self.truck_max_weight \
+              or weights[trip_b] - weight_change > self.truck_max_weight:
+              continue
+            delta = self._replacement_delta(trips[trip_a], position_a, stop_b.node) \
+              + self._replacement_delta(trips[trip_b], position_b, stop_a.node)
+            if delta < 0:
+              trips[trip_a][position_a] = stop_b
+              trips[trip_b][position_b] = stop_a
+              weights[trip_a] += weight_change
+              weights[trip_b] -= weight_change
+              return True
+    return False
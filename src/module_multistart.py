@@ -0,0 +1,164 @@
+"""
+  This module holds the code that runs several delegation passes in
+  parallel and keeps the best one.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  MultiStartOptimizer
+    A class that runs differently ordered delegation passes across a
+    process pool and keeps the one with the least total distance.
+
+  Accessible Functions
+  --------------------
+  create_worker_pool(parsedData: ParsedData, delegator_options: dict, max_workers: int) -> ProcessPoolExecutor
+    Starts a process pool whose workers each keep one TruckDelegator.
+
+  get_worker_delegator() -> TruckDelegator
+    Returns the TruckDelegator of the current worker process.
+"""
+
+import os
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from src.model_data import ParsedData
+from src.module_constraints import TruckDelegator
+
+# State of the current process' delegation passes. The parent sets it before
+# the pool starts so forked workers inherit the parsed graph without pickling.
+_worker_state = dict()
+
+def _initialize_worker(parsedData: ParsedData, delegator_options: dict) -> None:
+  """Sets up a worker process. With the fork start method the parsed data
+  is already inherited and nothing is passed. Otherwise it is passed once
+  per worker, never per pass.
+  """
+  if parsedData is not None:
+    _worker_state["parsed_data"] = parsedData
+    _worker_state["delegator_options"] = delegator_options
+  _worker_state.pop("delegator", None)
+
+def get_worker_delegator() -> TruckDelegator:
+  """Returns the TruckDelegator of the current worker process, creating
+  it on first use so its route caches stay warm across the tasks the
+  worker runs."""
+  if "delegator" not in _worker_state:
+    _worker_state["delegator"] = TruckDelegator(_worker_state["parsed_data"], **_worker_state["delegator_options"])
+  return _worker_state["delegator"]
+
+def create_worker_pool(parsedData: ParsedData, delegator_options: dict, max_workers: int) -> ProcessPoolExecutor:
+  """Starts a process pool whose workers each create one TruckDelegator
+  on first use, see get_worker_delegator(). On platforms that fork
+  worker processes the parsed data is inherited from the parent,
+  otherwise it is sent to each worker once when the pool starts.
+
+  Forked workers are started right away instead of on the first task,
+  so they do not inherit sockets the parent opens later, e.g. client
+  connections of the OptimizationService, which would then stay open
+  after the parent closes them.
+
+  Args:
+      parsedData (ParsedData): Parsed data of every worker's TruckDelegator.
+      delegator_options (dict): Keyword arguments of every worker's TruckDelegator.
+      max_workers (int): Number of worker processes.
+
+  Returns:
+      ProcessPoolExecutor: The started pool, to be shut down by the caller.
+  """
+  if "fork" in multiprocessing.get_all_start_methods():
+    context = multiprocessing.get_context("fork")
+    _worker_state["parsed_data"] = parsedData
+    _worker_state["delegator_options"] = delegator_options
+    initializer_args = (None, None)
+  else:
+    context = multiprocessing.get_context()
+    initializer_args = (parsedData, delegator_options)
+  executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context, \
+    initializer=_initialize_worker, initargs=initializer_args)
+  # The first task starts every forked worker
+  executor.submit(os.getpid).result()
+  return executor
+
+def _run_pass(seed: int) -> tuple:
+  """Runs one delegation pass with packages shuffled by a seed. Seed 0
+  keeps the input order.
+
+  Args:
+      seed (int): Seed of the package order.
+
+  Returns:
+      tuple: A tuple of the total distance, the seed and the optimized
+      route of the pass.
+  """
+  truckDelegator = get_worker_delegator()
+  package_order = list(truckDelegator.package_data.keys())
+  if seed:
+    random.Random(seed).shuffle(package_order)
+  optimized_route = truckDelegator.getOptimizedRoute(package_order)
+  return (truckDelegator.getTotalDistance(optimized_route), seed, optimized_route)
+
+class MultiStartOptimizer:
+  """
+  A class that runs several delegation passes, each with the packages in a
+  different order, across a process pool and keeps the one with the least
+  total distance. Delegation is greedy, so the package order changes the
+  result.
+
+  On platforms that fork worker processes the parsed graph is inherited
+  from the parent, otherwise it is sent to each worker once when the pool
+  starts. Each worker reuses one TruckDelegator for all of its passes.
+
+  ....
+
+  Attributes
+  ----------
+  parsedData: ParsedData
+    Parsed data shared by all passes.
+
+  num_starts: int
+    Number of delegation passes to run. The first pass keeps input order.
+
+  max_workers: int
+    Number of worker processes.
+
+  delegator_options: dict
+    Keyword arguments passed to each worker's TruckDelegator.
+
+  report: dict
+    Total distance of every pass of the last run, keyed by seed.
+
+  Methods
+  -------
+  optimize() -> dict
+    Returns the optimized route of the best pass.
+  """
+
+  parsedData: ParsedData = None
+  num_starts: int = None
+  max_workers: int = None
+  delegator_options: dict = None
+  report: dict = None
+
+  def __init__(self, parsedData: ParsedData, num_starts: int, max_workers: int = None, **delegator_options) -> None:
+    self.parsedData = parsedData
+    self.num_starts = num_starts
+    self.max_workers = max_workers or os.cpu_count()
+    self.delegator_options = delegator_options
+
+  def optimize(self) -> dict:
+    """Runs the delegation passes and returns the best one.
+
+    Returns:
+        dict: Dictionary containing truck loads and their individual
+        optimized paths, from the pass with the least total distance.
+    """
+    with create_worker_pool(self.parsedData, self.delegator_options, \
+      min(self.max_workers, self.num_starts)) as executor:
+      results = list(executor.map(_run_pass, range(self.num_starts)))
+
+    self.report = {seed: total_distance for (total_distance, seed, _) in results}
+    # Least distance first, then fewest trips, then earliest seed
+    (_, _, best_route) = min(results, key=lambda result: (result[0], len(result[2]), result[1]))
+    return best_route
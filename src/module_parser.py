@@ -8,12 +8,31 @@
   InputParser
     A class that handles all the parsing of data files to extract information
     and pass on for further analysis.
+
+  Accessible Functions
+  --------------------
+  parse_datasets(datasets: list, max_workers: int, use_processes: bool) -> list
+    Parses several datasets concurrently.
 """
 
+import os
 import csv
+import hashlib
+from array import array
 from enum import Enum
-from queue import Queue
-from src.model_data import ParsedData
+from functools import partial
+from types import MappingProxyType
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from src.model_data import ParsedData, PackageStore
+from src.model_graph import CompactGraph, ConnectionView, NeighbourView
+from src.module_instrumentation import Instrumentation, NO_INSTRUMENTATION
+
+try:
+  import numpy as np
+except ImportError:
+  # Without NumPy the bulk loader falls back to reading rows one at a time
+  np = None
 
 class _NodeHeaders(Enum):
   """Enumeration to Easily identify the index of
@@ -73,35 +92,94 @@ class _PackageHeaders(Enum):
   PACKAGE_TYPE = 1
   PACKAGE_GOAL = 2
 
+def _checksum_files(paths: list) -> str:
+  """Returns a digest of the contents of a list of files.
+
+  Args:
+      paths (list): Paths of the files.
+
+  Returns:
+      str: Hexadecimal digest of the files' contents.
+  """
+  digest = hashlib.blake2b(digest_size=16)
+  for path in paths:
+    with open(path, 'rb') as source_file:
+      for chunk in iter(lambda: source_file.read(1 << 20), b""):
+        digest.update(chunk)
+    # Separates the files so moving bytes between them changes the digest
+    digest.update(b"\0%d\0" % os.path.getsize(path))
+  return digest.hexdigest()
+
+def _to_array(typecode: str, values) -> array:
+  """Copies a NumPy array into an array of a typecode.
+
+  Args:
+      typecode (str): Typecode of the array.
+      values (numpy.ndarray): Values to copy.
+
+  Returns:
+      array: Array of the values.
+  """
+  copied = array(typecode)
+  copied.frombytes(values.astype(f"i{copied.itemsize}" if typecode in "lq" else "f8").tobytes())
+  return copied
+
+def _summarize(values: list, limit: int = 20) -> str:
+  """Returns a list as a string, cut short after a number of values.
+
+  Args:
+      values (list): List of values.
+      limit (int, optional): Maximum number of values shown. Defaults to 20.
+
+  Returns:
+      str: String listing the values.
+  """
+  if len(values) <= limit:
+    return str(values)
+  return f"{values[:limit]} and {len(values) - limit} more"
+
 class InputParser:
   """
   A class that handles all the parsing of data files to extract information
   and pass on for further analysis.
 
+  Every instance holds its own parsed data, which is frozen once parsing
+  is done: node coordinates and package types become read-only mappings,
+  and the graph and package store refuse modification. Consumers that
+  need to modify them work on a copy.
+
   ....
 
   Attributes
   ----------
-  node_coords: dict
-    A Dictionary containing information about a Node and its Coordinates
+  node_coords: Mapping
+    A read-only Dictionary containing information about a Node and its Coordinates
   
-  coord_connections: dict.
-    A Dictionary containing information about tuples of Nodes and their respective
-    connection distances.
+  coord_connections: ConnectionView
+    A dictionary-like view of the graph containing information about tuples of Nodes
+    and their respective connection distances.
   
-  existing_connections: dict
-    A dictionary containing information about each Node and its possible Neighbouring
-    Nodes.
+  existing_connections: NeighbourView
+    A dictionary-like view of the graph containing information about each Node and
+    its possible Neighbouring Nodes.
   
   truck_max_units: int
     An Integer value that represents the maximum amount of data that can be stored
     on a truck.
   
-  pack_types: dict
-    A Dictionary that stores data relating types of packages and their respective weights.
+  pack_types: Mapping
+    A read-only Dictionary that stores data relating types of packages and their respective weights.
   
-  pack_data: dict
-    A Dictionary that stores data regarding each individual package and its associated data.
+  pack_data: PackageStore
+    A columnar store of each individual package and its associated data, with goals
+    resolved to node IDs and types to weights.
+
+  graph: CompactGraph
+    The nodes and connections with node names interned to integer IDs and the
+    connections stored as CSR adjacency arrays.
+
+  instrumentation: Instrumentation
+    Collects the time spent reading each file and the number of rows read.
 
 
   Methods
@@ -114,6 +192,9 @@ class InputParser:
   
   read_packages()
     Reads package data from external file.
+
+  read_packages_in_chunks(package_data_path: str, chunk_size: int) -> Iterator[dict]
+    Reads package data from external file a fixed number of packages at a time.
   
   read_nodes()
     Reads node data from external file.
@@ -121,32 +202,92 @@ class InputParser:
   read_connections()
     Reads connections data from external file.
 
+  read_nodes_bulk()
+    Reads node data from external file in one pass with NumPy.
+
+  read_connections_bulk()
+    Reads connections data from external file in one pass with NumPy.
+
+  read_graph_snapshot(snapshot_path: str, source_checksum: str) -> bool
+    Loads the nodes and connections from a compiled graph snapshot.
+
+  write_graph_snapshot(snapshot_path: str, source_checksum: str)
+    Compiles the validated nodes and connections into a graph snapshot.
+
   get_parsed_data() -> ParsedData
     Returns a ParsedData Package
   """
 
   # Stores the coordinates of each node
-  node_coords: dict = dict()
+  node_coords: dict = None
   # Stores the distance between 2 coordinates
-  coord_connections: dict = dict()
+  coord_connections: ConnectionView = None
   # Stores the list of possible connections to each node
-  existing_connections: dict = dict()
+  existing_connections: NeighbourView = None
   # Truck Max Units
   truck_max_units: int = None
   # Package Types
-  pack_types: dict = dict()
+  pack_types: dict = None
   # Package Data
-  pack_data: dict = dict()
+  pack_data: PackageStore = None
+  # Compact Graph of the Nodes and Connections
+  graph: CompactGraph = None
+  # Timers and Counters of the parsing stages
+  instrumentation: Instrumentation = None
 
   def __init__(self, nodes_path: str, connections_path: str, \
-    truck_path: str, package_type_path: str, package_data_path: str):
-    self.read_nodes(nodes_path)
-    self.read_connections(connections_path)
+    truck_path: str, package_type_path: str, package_data_path: str, \
+    graph_snapshot_path: str = None, bulk_load: bool = False, stream_packages: bool = False, \
+    instrumentation: Instrumentation = None):
+    self.node_coords = dict()
+    self.pack_types = dict()
+    self.instrumentation = NO_INSTRUMENTATION if instrumentation is None else instrumentation
+    timer = self.instrumentation.timer
+    source_checksum = None
+    is_graph_validated = False
+    if graph_snapshot_path is not None:
+      # The snapshot is only used while the node and connection files are unchanged
+      with timer("parse.graph_snapshot"):
+        source_checksum = _checksum_files([nodes_path, connections_path])
+        is_graph_validated = self.read_graph_snapshot(graph_snapshot_path, source_checksum)
+
+    if not is_graph_validated:
+      if bulk_load and np is not None:
+        with timer("parse.nodes"):
+          self.read_nodes_bulk(nodes_path)
+        with timer("parse.connections"):
+          self.read_connections_bulk(connections_path)
+      else:
+        with timer("parse.nodes"):
+          self.read_nodes(nodes_path)
+        with timer("parse.connections"):
+          self.read_connections(connections_path)
     self.read_truck_data(truck_path)
     self.read_package_types(package_type_path)
-    self.read_packages(package_data_path)
-    self.__validateGraphConnectedness()
-
+    self.pack_data = PackageStore(self.pack_types, self.graph)
+    # Streamed packages are read later with read_packages_in_chunks
+    if not stream_packages:
+      with timer("parse.packages"):
+        self.read_packages(package_data_path)
+
+    if not is_graph_validated:
+      with timer("parse.validation"):
+        self.__validateGraphConnectedness()
+      if graph_snapshot_path is not None:
+        with timer("parse.graph_snapshot"):
+          self.write_graph_snapshot(graph_snapshot_path, source_checksum)
+    self.__freeze()
+
+    self.instrumentation.count("nodes_parsed", self.graph.get_node_count())
+    self.instrumentation.count("arcs_parsed", self.graph.get_arc_count())
+    self.instrumentation.count("packages_parsed", len(self.pack_data))
+
+  def __freeze(self) -> None:
+    """Makes the parsed data read-only so it can be shared."""
+    self.node_coords = MappingProxyType(self.node_coords)
+    self.pack_types = MappingProxyType(self.pack_types)
+    self.graph.freeze()
+    self.pack_data.freeze()
 
   def read_truck_data(self, truck_path: str):
     """Reads Truck data from .csv file.
@@ -180,21 +321,62 @@ class InputParser:
       # print(f"Package Type Details: {self.pack_types}") # NOTE: For Debugging
 
   def read_packages(self, package_data_path: str) -> None:
-    """Reads Package Data from .csv file.
+    """Reads Package Data from .csv file. Package types and goals
+    are resolved to weights and node IDs as they are read.
 
     Args:
         package_data_path (string): String representing the
         path to the relevant .csv file.
+
+    Raises:
+        ValueError: If a package type is unknown, or listing the
+        packages whose goals are not nodes of the graph.
     """
+    node_index = self.graph.node_index
+    unknown_goals = []
     with open(package_data_path, 'r') as package_data_file:
       package_data_reader = csv.reader(package_data_file)
       next(package_data_reader)
       for row in package_data_reader:
+        package_id = row[_PackageHeaders.PACKAGE_ID.value]
+        goal = row[_PackageHeaders.PACKAGE_GOAL.value]
+        # Every package with an unknown goal is reported at once
+        if goal not in node_index:
+          unknown_goals.append(f"{package_id} ({goal})")
+          continue
         # Stores a dictionary where the key is a package id and
         # the tuple of its corresponding type and goal destination.
         # node_coords['Pack_1'] = (M, A)
-        self.pack_data[row[_PackageHeaders.PACKAGE_ID.value]] = (row[_PackageHeaders.PACKAGE_TYPE.value], row[_PackageHeaders.PACKAGE_GOAL.value])
+        self.pack_data[package_id] = (row[_PackageHeaders.PACKAGE_TYPE.value], goal)
       # print(f"Package Type Details: {self.pack_data}") # NOTE: For Debugging
+    if unknown_goals:
+      raise ValueError(f"Packages delivered to unknown nodes: {_summarize(unknown_goals)}")
+
+  def read_packages_in_chunks(self, package_data_path: str, chunk_size: int):
+    """Reads Package Data from .csv file a fixed number of packages
+    at a time, so manifests larger than memory can be processed. The
+    packages are not kept in pack_data.
+
+    Args:
+        package_data_path (string): String representing the
+        path to the relevant .csv file.
+        chunk_size (int): Maximum number of packages per chunk.
+
+    Yields:
+        dict: A Dictionary of up to chunk_size package IDs and their
+        (Package Type, Goal Node) tuples, in file order.
+    """
+    with open(package_data_path, 'r') as package_data_file:
+      package_data_reader = csv.reader(package_data_file)
+      next(package_data_reader)
+      chunk = dict()
+      for row in package_data_reader:
+        chunk[row[_PackageHeaders.PACKAGE_ID.value]] = (row[_PackageHeaders.PACKAGE_TYPE.value], row[_PackageHeaders.PACKAGE_GOAL.value])
+        if len(chunk) == chunk_size:
+          yield chunk
+          chunk = dict()
+      if chunk:
+        yield chunk
 
   def read_nodes(self, nodes_path: str) -> None:
     """Reads Node Data from .csv file.
@@ -220,6 +402,16 @@ class InputParser:
         connections_path (string): String representing the
         path to the relevant .csv file.
     """
+    node_names = list(self.node_coords.keys())
+    node_index = {name: node_id for node_id, name in enumerate(node_names)}
+    # Parallel arrays of the arcs read, every connection is stored
+    # as 2 arcs so it can be travelled in both directions.
+    # E.g. Arc (A, B) = (Dist Between A and B)
+    # & Arc (B, A) = (Dist Between A and B)
+    arc_sources = array('l')
+    arc_targets = array('l')
+    arc_weights = array('q')
+
     with open(connections_path, 'r') as nodes_file:
       connection_reader = csv.reader(nodes_file)
       next(connection_reader)
@@ -228,59 +420,176 @@ class InputParser:
         # Skip reading their distance
         if(not int(row[_ConnectionHeaders.IS_AVAIL.value])):
           continue
-        
-        if(row[_ConnectionHeaders.NODE_A.value] not in self.existing_connections):
-          self.existing_connections[row[_ConnectionHeaders.NODE_A.value]] = list()
-        
-        if(row[_ConnectionHeaders.NODE_B.value] not in self.existing_connections):
-          self.existing_connections[row[_ConnectionHeaders.NODE_B.value]] = list()
-
-        self.existing_connections[row[_ConnectionHeaders.NODE_A.value]].append(row[_ConnectionHeaders.NODE_B.value])
-        self.existing_connections[row[_ConnectionHeaders.NODE_B.value]].append(row[_ConnectionHeaders.NODE_A.value])
-
-        # Stores a dictionary where the key is a tuple that
-        # consists of 2 nodes and and the value is the actual
-        # distance between them.
-        # E.g. coord_connections[(A, B)] = (Dist Between A and B)
-        # & coord_connections[(B, A)] = (Dist Between A and B)
-        # (I'm increasing the space complexity here so it doesn't look too efficient lol)
-        self.coord_connections[(row[_ConnectionHeaders.NODE_A.value], row[_ConnectionHeaders.NODE_B.value])] \
-          = int(row[_ConnectionHeaders.DIST.value])
-        self.coord_connections[(row[_ConnectionHeaders.NODE_B.value], row[_ConnectionHeaders.NODE_A.value])] \
-          = int(row[_ConnectionHeaders.DIST.value])
+
+        try:
+          node_a = node_index[row[_ConnectionHeaders.NODE_A.value]]
+          node_b = node_index[row[_ConnectionHeaders.NODE_B.value]]
+        except KeyError as e:
+          raise ValueError(f"Connection references node {e} that is not in the nodes data") from None
+        distance = int(row[_ConnectionHeaders.DIST.value])
+
+        arc_sources.append(node_a)
+        arc_targets.append(node_b)
+        arc_weights.append(distance)
+        arc_sources.append(node_b)
+        arc_targets.append(node_a)
+        arc_weights.append(distance)
+
+    self.graph = CompactGraph.from_arcs(node_names, list(self.node_coords.values()), \
+      arc_sources, arc_targets, arc_weights)
+    self.coord_connections = ConnectionView(self.graph)
+    self.existing_connections = NeighbourView(self.graph)
     # print(self.coord_connections) # NOTE: For Debugging
 
-  def __getAllTraversableNodes(self, startNode: str, maxNodes:int = 0) -> list:
-    """Performs a DFS from start node to check if all
-    nodes in the graph can be reached.
+  def read_nodes_bulk(self, nodes_path: str) -> None:
+    """Reads Node Data from .csv file in one pass into NumPy
+    arrays. Gives the same node coordinates as read_nodes, but fields
+    must not be quoted.
 
     Args:
-        startNode (string): String representing the starting node.
-        maxNodes (int, optional): Number of nodes expected to be
-        present for a fully connected graph. Defaults to 0.
+        nodes_path (string): String representing the
+        path to the relevant .csv file.
+    """
+    rows = np.loadtxt(nodes_path, delimiter=",", skiprows=1, dtype=str, ndmin=2)
+    names = rows[:, _NodeHeaders.NODE.value].tolist()
+    coords_x = rows[:, _NodeHeaders.X_CO.value].astype(np.int64).tolist()
+    coords_y = rows[:, _NodeHeaders.Y_CO.value].astype(np.int64).tolist()
+    # node_coords['A'] = (X Coord of A, Y Coord of A)
+    self.node_coords = dict(zip(names, zip(coords_x, coords_y)))
+
+  def read_connections_bulk(self, connections_path: str) -> None:
+    """Read node connections from .csv file in one pass into NumPy
+    arrays. Unavailable connections are dropped with a mask, node names
+    are turned into node IDs by a binary search over the sorted names
+    and the CSR arrays are built with array operations, so no Python
+    code runs per row. Gives the same graph as read_connections, but
+    fields must not be quoted.
+
+    Args:
+        connections_path (string): String representing the
+        path to the relevant .csv file.
+
+    Raises:
+        ValueError: A connection references a node that is not in the
+        nodes data.
+    """
+    node_names = list(self.node_coords.keys())
+    num_nodes = len(node_names)
+    rows = np.loadtxt(connections_path, delimiter=",", skiprows=1, dtype=str, ndmin=2)
+    if len(rows):
+      rows = rows[rows[:, _ConnectionHeaders.IS_AVAIL.value].astype(np.int64) != 0]
+
+    name_array = np.array(node_names, dtype=str)
+    name_order = np.argsort(name_array, kind="stable")
+    sorted_names = name_array[name_order]
+
+    def get_node_ids(column: "np.ndarray") -> "np.ndarray":
+      positions = np.minimum(np.searchsorted(sorted_names, column), max(num_nodes - 1, 0))
+      is_known = sorted_names[positions] == column if num_nodes else np.zeros(len(column), dtype=bool)
+      if not is_known.all():
+        raise ValueError(f"Connection references node '{column[~is_known][0]}' that is not in the nodes data")
+      return name_order[positions]
+
+    node_a = get_node_ids(rows[:, _ConnectionHeaders.NODE_A.value]) if len(rows) else np.zeros(0, np.int64)
+    node_b = get_node_ids(rows[:, _ConnectionHeaders.NODE_B.value]) if len(rows) else np.zeros(0, np.int64)
+    distances = rows[:, _ConnectionHeaders.DIST.value].astype(np.int64) if len(rows) else np.zeros(0, np.int64)
+
+    # Every connection is 2 arcs, in the same order read_connections adds them
+    sources = np.column_stack((node_a, node_b)).ravel()
+    targets = np.column_stack((node_b, node_a)).ravel()
+    weights = np.repeat(distances, 2)
+
+    # Repeated arcs keep the position they were first read at and the last distance read
+    arc_keys = sources * num_nodes + targets
+    (_, first_read) = np.unique(arc_keys, return_index=True)
+    (_, last_read_reversed) = np.unique(arc_keys[::-1], return_index=True)
+    last_read = len(arc_keys) - 1 - last_read_reversed
+    read_order = np.argsort(first_read)
+    kept = first_read[read_order]
+    kept_weights = weights[last_read[read_order]]
+
+    # Stable sort of the arcs by their source node gives the CSR layout
+    csr_order = np.argsort(sources[kept], kind="stable")
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources[kept], minlength=num_nodes), out=offsets[1:])
+
+    coords = np.array(list(self.node_coords.values()), dtype=np.float64).reshape(-1, 2)
+    self.graph = CompactGraph(node_names, _to_array('d', coords[:, 0]), _to_array('d', coords[:, 1]), \
+      _to_array('q', offsets), _to_array('l', targets[kept][csr_order]), _to_array('q', kept_weights[csr_order]))
+    self.coord_connections = ConnectionView(self.graph)
+    self.existing_connections = NeighbourView(self.graph)
+
+  def read_graph_snapshot(self, snapshot_path: str, source_checksum: str) -> bool:
+    """Loads the nodes and connections from a graph snapshot written
+    by write_graph_snapshot. The snapshot's arrays are memory-mapped, so
+    nothing is parsed or validated again.
+
+    Args:
+        snapshot_path (string): String representing the path to
+        the snapshot.
+        source_checksum (string): Checksum of the node and connection
+        files the snapshot must have been compiled from.
+
+    Returns:
+        bool: True if the snapshot was loaded, False if it does not exist
+        or was compiled from different files.
+    """
+    if not os.path.exists(snapshot_path):
+      return False
+    try:
+      (graph, metadata) = CompactGraph.load(snapshot_path)
+    except ValueError:
+      return False
+    if metadata.get("source_checksum") != source_checksum:
+      return False
+
+    self.graph = graph
+    self.node_coords = {name: (int(x), int(y)) \
+      for (name, x, y) in zip(graph.node_names, graph.coords_x, graph.coords_y)}
+    self.coord_connections = ConnectionView(self.graph)
+    self.existing_connections = NeighbourView(self.graph)
+    return True
+
+  def write_graph_snapshot(self, snapshot_path: str, source_checksum: str) -> None:
+    """Compiles the validated nodes and connections into a binary
+    graph snapshot that read_graph_snapshot can memory-map.
+
+    Args:
+        snapshot_path (string): String representing the path to
+        the snapshot.
+        source_checksum (string): Checksum of the node and connection
+        files the graph was parsed from.
+    """
+    self.graph.save(snapshot_path, {"source_checksum": source_checksum})
+
+  def __getConnectedComponents(self) -> tuple:
+    """Labels every node with the connected component it belongs to,
+    with one Breadth-First Search per component. Every node is queued
+    once and every arc followed once, so this runs in O(V + E).
 
     Returns:
-        list: List containing all nodes visited by DFS from the
-        startNode.
+        tuple: A tuple of an array of the component of each node ID,
+        where the SupplyDepot is in component 0, and the number of
+        components.
     """
-    visited = [startNode]
-    q = Queue()
-    list(map(q.put, self.existing_connections[startNode]))
-
-    while not q.empty():
-      # Check if the max number of nodes have been visited
-      # to cut short the DFS
-      if maxNodes:
-        if len(visited) == maxNodes:
-          return visited
-      
-      neighbour = q.get()
-      if neighbour not in visited:
-        visited.append(neighbour)
-      for node in self.existing_connections[neighbour]:
-        if node not in visited:
-          q.put(node)
-    return visited
+    graph = self.graph
+    num_nodes = graph.get_node_count()
+    components = array('q', [-1]) * num_nodes
+    num_components = 0
+
+    for root in range(num_nodes):
+      if components[root] != -1:
+        continue
+      components[root] = num_components
+      queue = deque([root])
+      while queue:
+        node = queue.popleft()
+        for (neighbour, _) in graph.neighbours(node):
+          if components[neighbour] == -1:
+            components[neighbour] = num_components
+            queue.append(neighbour)
+      num_components += 1
+    return (components, num_components)
 
   def __validateGraphConnectedness(self) -> None:
     """Ensures that the graph of nodes and connections
@@ -289,16 +598,26 @@ class InputParser:
 
     Raises:
         ValueError: Throws an error (To prevent program from
-        continuing) if the graph is not connected.
+        continuing) if the graph is not connected, listing its
+        connected components, the nodes unreachable from the
+        SupplyDepot and the packages whose goals are unreachable.
     """
-    # Get the first node on the list
-    allInputNodes = list(self.node_coords.keys())
-    numInputNodes = len(allInputNodes)
-    startNode = allInputNodes[0]
-    visitedNodes = self.__getAllTraversableNodes(startNode)
-
-    if len(visitedNodes) != numInputNodes:
-      raise ValueError("Input nodes and connections do NOT result in a connected graph")
+    (components, num_components) = self.__getConnectedComponents()
+    if num_components <= 1:
+      return
+
+    node_names = self.graph.node_names
+    component_sizes = [0] * num_components
+    for component in components:
+      component_sizes[component] += 1
+    unreachable_nodes = [name for (name, component) in zip(node_names, components) if component != 0]
+    unreachable_packages = [package_id for (package_id, goal) in zip(self.pack_data.package_ids, self.pack_data.goals) \
+      if package_id is not None and components[goal] != 0]
+
+    raise ValueError("Input nodes and connections do NOT result in a connected graph\n" \
+      f"Connected components: {num_components} (sizes {_summarize(component_sizes)})\n" \
+      f"Nodes unreachable from {node_names[0]}: {_summarize(unreachable_nodes)}\n" \
+      f"Packages with unreachable goals: {_summarize(unreachable_packages)}")
 
   def get_parsed_data(self) -> ParsedData:
     """Returns a parsed data object containing all
@@ -309,4 +628,38 @@ class InputParser:
         for all processed data.
     """
     return ParsedData(self.node_coords, self.coord_connections, self.existing_connections, \
-      self.truck_max_units, self.pack_types, self.pack_data)
+      self.truck_max_units, self.pack_types, self.pack_data, self.graph)
+
+def _parse_dataset(dataset: tuple, parser_options: dict) -> ParsedData:
+  """Parses one dataset, see parse_datasets."""
+  return InputParser(*dataset, **parser_options).get_parsed_data()
+
+def parse_datasets(datasets: list, max_workers: int = None, use_processes: bool = False, \
+  **parser_options) -> list:
+  """Parses several datasets, e.g. one per depot, concurrently in one
+  interpreter. Every dataset gets its own InputParser, so no parsed
+  data is shared between them.
+
+  Threads suit datasets that are mostly waiting on storage or loaded in
+  bulk with NumPy. Processes parse in parallel on every CPU, at the cost
+  of sending the parsed data back to this process.
+
+  Args:
+      datasets (list): List of tuples of the positional arguments of
+      InputParser, i.e. the nodes, connections, truck, package type and
+      package data paths, and optionally a graph snapshot path.
+      max_workers (int, optional): Number of threads or processes.
+      Defaults to the pool's default.
+      use_processes (bool, optional): Parse in a process pool instead
+      of a thread pool. Defaults to False.
+      **parser_options: Keyword arguments passed to every InputParser.
+
+  Raises:
+      ValueError: If a dataset is invalid.
+
+  Returns:
+      list: List of the ParsedData of every dataset, in order.
+  """
+  executor_type = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+  with executor_type(max_workers=max_workers) as executor:
+    return list(executor.map(partial(_parse_dataset, parser_options=parser_options), datasets))
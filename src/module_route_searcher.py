@@ -2,8 +2,180 @@
   This module holds all the code related route searching and optimization
 """
 import math
-from queue import PriorityQueue
+import heapq
+from enum import Enum
+from array import array
+from collections import OrderedDict
 from src.model_data import ParsedData
+from src.model_graph import CompactGraph, ConnectionView, NeighbourView
+from src.module_shortest_paths import shortest_path_tree, repair_shortest_path_tree
+from src.module_landmarks import LandmarkHeuristic
+from src.module_contraction import ContractionHierarchy
+from src.module_instrumentation import Instrumentation, NO_INSTRUMENTATION
+from src.module_spatial_index import KDTree
+
+def _is_shortened(changed_arc: tuple) -> bool:
+  """Returns True if a changed (Source, Target, Old Distance, New Distance)
+  arc was added or got shorter."""
+  (_, _, old_distance, distance) = changed_arc
+  return distance is not None and (old_distance is None or distance < old_distance)
+
+class RoutingModes(Enum):
+  """Enumeration to Easily identify how routes are computed
+  for a set of packages.
+
+  Args:
+      Enum (int): Describes the routing mode.
+  """
+  # One A* Search per package
+  PER_PACKAGE_SEARCH = 0
+  # One Dijkstra shortest-path tree from the SupplyDepot shared by all packages
+  SHORTEST_PATH_TREE = 1
+
+# Maps command line routing mode names to their RoutingModes
+ROUTING_MODES = {
+  "search": RoutingModes.PER_PACKAGE_SEARCH,
+  "tree": RoutingModes.SHORTEST_PATH_TREE
+}
+
+class HeuristicModes(Enum):
+  """Enumeration to Easily identify the heuristic used
+  by A* Search.
+
+  Args:
+      Enum (int): Describes the heuristic.
+  """
+  # Straight-line distance between node coordinates, scaled down to never overestimate
+  EUCLIDEAN = 0
+  # Triangle-inequality bounds from precomputed landmark distances (ALT)
+  LANDMARKS = 1
+
+# Maps command line heuristic names to their HeuristicModes
+HEURISTIC_MODES = {
+  "euclidean": HeuristicModes.EUCLIDEAN,
+  "landmarks": HeuristicModes.LANDMARKS
+}
+
+class _RouteCache:
+  """
+  A size bounded cache of routes keyed by their (start node, goal node)
+  that evicts the least recently used route once full.
+
+  ....
+
+  Attributes
+  ----------
+  max_size: int
+    Maximum number of routes kept. A size of 0 disables caching.
+
+  hits: int
+    Number of lookups that found a cached route.
+
+  misses: int
+    Number of lookups that did not find a cached route.
+
+  evictions: int
+    Number of routes dropped to stay within max_size.
+
+  Methods
+  -------
+  get(start_node: str, goal_node: str) -> list
+    Returns the cached route or None.
+
+  put(start_node: str, goal_node: str, route: list)
+    Stores a route, evicting the least recently used one if full.
+
+  clear()
+    Drops every cached route.
+
+  discard(is_stale: Callable[[list], bool]) -> int
+    Drops the cached routes a function marks as stale.
+
+  get_stats() -> dict
+    Returns the cache counters.
+  """
+
+  max_size: int = None
+  hits: int = 0
+  misses: int = 0
+  evictions: int = 0
+
+  def __init__(self, max_size: int) -> None:
+    self.max_size = max_size
+    self._routes = OrderedDict()
+
+  def __len__(self) -> int:
+    return len(self._routes)
+
+  def get(self, start_node: str, goal_node: str) -> list:
+    """Looks up a cached route and marks it as most recently used.
+
+    Args:
+        start_node (str): Starting Node.
+        goal_node (str): Ending Node.
+
+    Returns:
+        list: The cached route, or None if it is not cached.
+    """
+    key = (start_node, goal_node)
+    route = self._routes.get(key)
+    if route is None:
+      self.misses += 1
+      return None
+    self._routes.move_to_end(key)
+    self.hits += 1
+    return route
+
+  def put(self, start_node: str, goal_node: str, route: list) -> None:
+    """Stores a route, evicting the least recently used
+    route if the cache is full.
+
+    Args:
+        start_node (str): Starting Node.
+        goal_node (str): Ending Node.
+        route (list): Route between the 2 nodes.
+    """
+    if self.max_size <= 0:
+      return
+    key = (start_node, goal_node)
+    self._routes[key] = route
+    self._routes.move_to_end(key)
+    while len(self._routes) > self.max_size:
+      self._routes.popitem(last=False)
+      self.evictions += 1
+
+  def clear(self) -> None:
+    """Drops every cached route. Counters are kept."""
+    self._routes.clear()
+
+  def discard(self, is_stale) -> int:
+    """Drops the cached routes a function marks as stale.
+
+    Args:
+        is_stale (Callable[[list], bool]): Function returning True if
+        a cached route is stale.
+
+    Returns:
+        int: Number of routes dropped.
+    """
+    stale_keys = [key for (key, route) in self._routes.items() if is_stale(route)]
+    for key in stale_keys:
+      del self._routes[key]
+    return len(stale_keys)
+
+  def get_stats(self) -> dict:
+    """Returns the cache counters.
+
+    Returns:
+        dict: Dictionary containing the hits, misses, evictions
+        and current size of the cache.
+    """
+    return {
+      "hits": self.hits,
+      "misses": self.misses,
+      "evictions": self.evictions,
+      "size": len(self._routes)
+    }
 
 # Performs A* Search Given Data Points  & Start + Goal Node
 class RouteSearcher:
@@ -29,69 +201,428 @@ class RouteSearcher:
   package_data: dict
     A Dictionary that stores data regarding each individual package and its associated data.
 
+  graph: CompactGraph
+    The integer-indexed CSR graph that all searches run over.
+
+  routing_mode: RoutingModes
+    Describes whether package routes are found with one search per package or read
+    from a single shortest-path tree rooted at the SupplyDepot.
+
+  shortest_path_tree: tuple
+    A tuple of the (root node ID, distances, parents) of the last shortest-path tree built.
+
+  route_cache: _RouteCache
+    Size bounded LRU cache of optimal routes keyed by (start node, goal node). It is
+    cleared automatically whenever the graph (and so coord_connections) is modified.
+
+  search_stats: dict
+    Counters of the A* Searches run so far (searches, nodes expanded, heap pushes).
+
+  heuristic_mode: HeuristicModes
+    Describes which heuristic A* Search uses.
+
+  num_landmarks: int
+    Number of landmarks picked for the landmark heuristic.
+
+  landmark_heuristic: LandmarkHeuristic
+    Precomputed landmark distances, built on first use of the landmark heuristic.
+
+  contraction_hierarchy: ContractionHierarchy
+    Preprocessed hierarchy that answers route searches in place of A* Search when set.
+
+  spatial_index: KDTree
+    KD-tree over the node coordinates, built on first use of getNearestNode().
+
+  instrumentation: Instrumentation
+    Collects the time spent routing and the searches, expansions, heap pushes and
+    route cache hits of the run.
 
   Methods
   -------  
-  retrace_steps(start_node: str, goal_node: str, visited_node_pairs: list) -> list
+  getRoutesForEachPackage(package_ids: list) -> dict
+    Returns the optimal route for each package.
+
+  buildShortestPathTree(start_node: str) -> tuple
+    Returns the distances and parents of every node reachable from a start node.
+
+  getRouteFromShortestPathTree(start_node: str, goal_node: str) -> list
+    Returns the optimal route between 2 nodes read from a shortest-path tree.
+
+  retrace_steps(start_node: int, goal_node: int, parents: dict) -> list
     Returns a list of that starts and ends at the respective nodes.
   
   getOptimalRoute(start_node: str, goal_node: str) -> list
     Returns the an optimal route between 2 nodes.
+
+  getCacheStats() -> dict
+    Returns the hit, miss and eviction counters of the route cache.
+
+  getSearchStats() -> dict
+    Returns the expansion and heap push counters of the A* Searches run.
+
+  compareHeuristics(node_pairs: list) -> dict
+    Returns the nodes expanded by each heuristic when searching the same node pairs.
+
+  useContractionHierarchy(path: str) -> ContractionHierarchy
+    Answers route searches with a contraction hierarchy, loading or building it.
+
+  updateConnections(changes: dict) -> list
+    Changes, adds or removes connections and repairs the cached routes they affect.
+
+  isRouteAffected(route: list, changed_arcs: list) -> bool
+    Returns True if changed connections lengthen, shorten or close a route.
+
+  getNearestNode(x: float, y: float) -> str
+    Returns the node closest to a location.
   """
 
   node_coords: dict = None
   coord_connections: dict = None
   existing_connections: dict = None
   package_data: dict = None
+  graph: CompactGraph = None
+  routing_mode: RoutingModes = None
+  shortest_path_tree: tuple = None
+  route_cache: _RouteCache = None
+  search_stats: dict = None
+  heuristic_mode: HeuristicModes = None
+  num_landmarks: int = None
+  landmark_heuristic: LandmarkHeuristic = None
+  contraction_hierarchy: ContractionHierarchy = None
+  spatial_index: KDTree = None
+  instrumentation: Instrumentation = None
 
-
-  def __init__(self, parsedData: ParsedData) -> None:
+  def __init__(self, parsedData: ParsedData, routing_mode: RoutingModes = RoutingModes.PER_PACKAGE_SEARCH, \
+    cache_size: int = 1024, heuristic_mode: HeuristicModes = HeuristicModes.EUCLIDEAN, num_landmarks: int = 8, \
+    instrumentation: Instrumentation = None) -> None:
     self.node_coords = parsedData.get_node_data()
     self.coord_connections = parsedData.get_connection_data()
     self.existing_connections = parsedData.get_existing_connections()
     self.package_data = parsedData.get_package_data()
+    self.graph = parsedData.get_graph()
+    self.routing_mode = routing_mode
+    self.route_cache = _RouteCache(cache_size)
+    self.search_stats = {"searches": 0, "nodes_expanded": 0, "heap_pushes": 0, "last_nodes_expanded": 0}
+    self.heuristic_mode = heuristic_mode
+    self.num_landmarks = num_landmarks
+    self.instrumentation = NO_INSTRUMENTATION if instrumentation is None else instrumentation
+    self._connections_version = self._get_connections_version()
+    # Shortest-path trees of changed nodes, see _getDistancesFrom
+    self._distance_trees = dict()
+    self._distance_trees_version = self._connections_version
 
-  def getRoutesForEachPackage(self) -> dict:
+  def getRoutesForEachPackage(self, package_ids: list = None) -> dict:
     """Gets the optimal route for each package.
 
+    Args:
+        package_ids (list, optional): IDs of the packages to route, in
+        the order their routes are returned. Defaults to every package
+        in input order.
+
     Returns:
         dict: A Dictionary of arbitrary keys where each value
         is a tuple of a list of packages and their shared route.
     """
 
     package_route_combinations = dict()
+    start_node = next(iter(self.node_coords))
+
+    if self.routing_mode == RoutingModes.SHORTEST_PATH_TREE:
+      # Every route starts at the SupplyDepot so a single tree
+      # answers all of them.
+      find_route = self.getRouteFromShortestPathTree
+    else:
+      find_route = self.getOptimalRoute
     
-    for package_id, package_data in self.package_data.items():
-      (package_size, package_goal) = package_data
-      package_route = self.getOptimalRoute(list(self.node_coords.keys())[0], package_goal)
-      package_route_combinations[len(package_route_combinations.keys())] = (package_id, package_route)
+    if package_ids is None:
+      package_ids = self.package_data.keys()
+
+    with self.instrumentation.timer("routing"):
+      for package_id in package_ids:
+        (package_size, package_goal) = self.package_data[package_id]
+        package_route = find_route(start_node, package_goal)
+        package_route_combinations[len(package_route_combinations.keys())] = (package_id, package_route)
     
     return package_route_combinations
 
-  def _heuristic_distance(self, node_a: str, node_b: str) -> float:
+  def buildShortestPathTree(self, start_node: str) -> tuple:
+    """Runs Dijkstra's Algorithm from a start node to every
+    reachable node.
+
+    Args:
+        start_node (str): Root of the shortest-path tree.
+
+    Returns:
+        tuple: A tuple of 2 arrays indexed by node ID, the shortest
+        distance to each node (infinity if unreachable) and the parent
+        node ID of each node on its shortest path (-1 for the root and
+        unreachable nodes).
+    """
+    root = self.graph.get_index(start_node)
+    with self.instrumentation.timer("routing.shortest_path_tree"):
+      (distances, parents) = shortest_path_tree(self.graph, root)
+
+    self.shortest_path_tree = (root, distances, parents)
+    return (distances, parents)
+
+  def getRouteFromShortestPathTree(self, start_node: str, goal_node: str) -> list:
+    """Reads the optimal route between 2 nodes from the shortest-path
+    tree rooted at the start node, building the tree if needed.
+
+    Args:
+        start_node (str): Starting Node.
+        goal_node (str): Ending Node.
+
+    Returns:
+        list: List containing arrangement of nodes representing
+        the optimal path.
+    """
+    self._discard_stale_routes()
+    if self.shortest_path_tree is None or self.shortest_path_tree[0] != self.graph.get_index(start_node):
+      self.buildShortestPathTree(start_node)
+    (root, distances, parents) = self.shortest_path_tree
+
+    goal = self.graph.get_index(goal_node)
+    if distances[goal] == math.inf:
+      return "ERROR: Route NOT found"
+
+    steps = [goal]
+    while parents[steps[-1]] != -1:
+      steps.append(parents[steps[-1]])
+    steps.reverse()
+    return [self.graph.node_names[node_id] for node_id in steps]
+
+  def getNearestNode(self, x: float, y: float) -> str:
+    """Returns the node closest to a location, e.g. to snap a drop
+    point to the graph, in O(log n) time on average.
+
+    Args:
+        x (float): X coordinate of the location.
+        y (float): Y coordinate of the location.
+
+    Returns:
+        str: Name of the closest node.
+    """
+    # Connection changes never move nodes, so the index is never stale
+    if self.spatial_index is None:
+      self.spatial_index = KDTree.from_graph(self.graph)
+    (node_id, _) = self.spatial_index.nearest(x, y)
+    return self.graph.node_names[node_id]
+
+  def getCacheStats(self) -> dict:
+    """Returns the counters of the route cache.
+
+    Returns:
+        dict: Dictionary containing the hits, misses, evictions
+        and current size of the route cache.
+    """
+    return self.route_cache.get_stats()
+
+  def _get_connections_version(self) -> int:
+    """Returns the modification count of the graph."""
+    return self.graph.version
+
+  def _discard_stale_routes(self) -> None:
+    """Drops every cached route and shortest-path tree if
+    the connections were modified since they were computed.
+    """
+    version = self._get_connections_version()
+    if version != self._connections_version:
+      self.route_cache.clear()
+      self.shortest_path_tree = None
+      self.landmark_heuristic = None
+      # The hierarchy no longer matches the graph, A* Search takes over
+      self.contraction_hierarchy = None
+      self._connections_version = version
+
+  def updateConnections(self, changes: dict) -> list:
+    """Changes the distance of connections, adds new ones or removes
+    them, e.g. for road closures, without recomputing every route.
+
+    The parsed graph is shared, so it is copied the first time it is
+    changed. The shortest-path tree is repaired in place and only the
+    cached routes that use a connection that got longer or was removed,
+    or that a connection that got shorter or was added shortens, are
+    dropped. Landmarks and the contraction hierarchy cannot be repaired
+    and are dropped, so they are rebuilt on next use.
+
+    Args:
+        changes (dict): A Dictionary of (Node A, Node B) connections and
+        their new distance, or None to remove the connection. Connections
+        are changed in both directions, so (Node A, Node B) and (Node B,
+        Node A) are the same connection.
+
+    Raises:
+        ValueError: If a node is unknown, a distance is not positive, a
+        removed connection does not exist or a connection is given two
+        different distances.
+
+    Returns:
+        list: List of (Source, Target, Old Distance, New Distance) tuples
+        of every changed arc as node IDs, with None for an arc that did
+        not exist before or no longer exists.
+    """
+    self._discard_stale_routes()
+    graph = self.graph
+    arc_changes = []
+    # New distance of each connection, whichever way round it was given
+    connection_distances = dict()
+    for ((node_a, node_b), distance) in changes.items():
+      if node_a not in graph.node_index or node_b not in graph.node_index:
+        raise ValueError(f"Connection {node_a} - {node_b} refers to an unknown node")
+      if distance is not None and distance <= 0:
+        raise ValueError(f"Connection {node_a} - {node_b} must have a positive distance")
+      (source, target) = (graph.get_index(node_a), graph.get_index(node_b))
+      connection = (min(source, target), max(source, target))
+      if connection in connection_distances:
+        if connection_distances[connection] != distance:
+          raise ValueError(f"Connection {node_a} - {node_b} is given two different distances")
+        continue
+      connection_distances[connection] = distance
+      for arc in dict.fromkeys(((source, target), (target, source))):
+        old_distance = graph.get_arc_weight(*arc)
+        if distance is None and old_distance is None:
+          raise ValueError(f"Connection {node_a} - {node_b} does not exist")
+        if old_distance != distance:
+          arc_changes.append((*arc, old_distance, distance))
+    if not arc_changes:
+      return []
+
+    if graph.frozen:
+      # Copy on first write, the parsed graph stays untouched
+      self.graph = graph = graph.copy()
+      self.coord_connections = ConnectionView(graph)
+      self.existing_connections = NeighbourView(graph)
+    for (source, target, _, distance) in arc_changes:
+      if distance is None:
+        graph.remove_arc(source, target)
+      else:
+        graph.set_arc(source, target, distance)
+
+    if self.shortest_path_tree is not None:
+      (_, distances, parents) = self.shortest_path_tree
+      repaired = repair_shortest_path_tree(graph, distances, parents, arc_changes)
+      self.instrumentation.count("tree_nodes_repaired", len(repaired))
+    lengthened_arcs = {(source, target) for (source, target, old_distance, distance) in arc_changes \
+      if distance is None or (old_distance is not None and distance > old_distance)}
+    shortened_arcs = [arc for arc in arc_changes if _is_shortened(arc)]
+    node_index = graph.node_index
+    def is_stale(route: list) -> bool:
+      node_ids = [node_index[node] for node in route]
+      return not lengthened_arcs.isdisjoint(zip(node_ids, node_ids[1:])) \
+        or any(self._mayShortenRoute(node_ids, arc) for arc in shortened_arcs)
+    self.instrumentation.count("routes_invalidated", self.route_cache.discard(is_stale))
+
+    self.landmark_heuristic = None
+    self.contraction_hierarchy = None
+    # These changes are already accounted for
+    self._connections_version = self._get_connections_version()
+    return arc_changes
+
+  def isRouteAffected(self, route: list, changed_arcs: list) -> bool:
+    """Checks if changed connections change the distance of a route,
+    close it, or could give a shorter route through its nodes.
+
+    Args:
+        route (list): Route as a list of nodes.
+        changed_arcs (list): Changed arcs as returned by updateConnections().
+
+    Returns:
+        bool: True if the route uses a changed connection, or a connection
+        that got shorter or was added shortens part of it.
+    """
+    node_ids = [self.graph.get_index(node) for node in route]
+    route_arcs = set(zip(node_ids, node_ids[1:]))
+    if any(arc[:2] in route_arcs for arc in changed_arcs):
+      return True
+    return any(self._mayShortenRoute(node_ids, arc) for arc in changed_arcs if _is_shortened(arc))
+
+  def _mayShortenRoute(self, node_ids: list, changed_arc: tuple) -> bool:
+    """Checks if an arc that got shorter or was added shortens any part
+    of a route. The shortest detour from route node i to route node j
+    through the arc costs the shortest distance from i to the arc, its
+    new distance and the shortest distance from the arc to j, read from
+    shortest-path trees rooted at both ends of the arc. The route is
+    kept if that detour is never shorter than the distance between i and
+    j along the route. The best i for each j is carried along, so the
+    check takes one pass over the route. Straight-line distances cannot
+    be used here, as connections may be shorter than the straight line
+    between their nodes.
+
+    Args:
+        node_ids (list): Route as a list of node IDs.
+        changed_arc (tuple): (Source, Target, Old Distance, New Distance)
+        of the arc.
+
+    Returns:
+        bool: True if the arc shortens the route.
+    """
+    (source, target, _, distance) = changed_arc
+    graph = self.graph
+    # Connections are travelled in both directions, so distances from the source are also distances to it
+    distances_to_source = self._getDistancesFrom(source)
+    distances_from_target = self._getDistancesFrom(target)
+    # Least (distance along the route to i + shortest distance from i to the arc) so far
+    best_detour_start = math.inf
+    route_distance = 0
+    for (position, node) in enumerate(node_ids):
+      if position:
+        distance_between = graph.get_arc_weight(node_ids[position - 1], node)
+        # A route through a connection removed earlier is already closed
+        if distance_between is None:
+          return True
+        route_distance += distance_between
+      best_detour_start = min(best_detour_start, route_distance + distances_to_source[node])
+      if best_detour_start + distance + distances_from_target[node] < route_distance:
+        return True
+    return False
+
+  def _getDistancesFrom(self, node_id: int) -> array:
+    """Returns the shortest distance from a node ID to every node of the
+    current graph. Distances are kept until the graph changes again, so
+    checking many routes against the same changes runs Dijkstra's
+    Algorithm once per changed node.
+
+    Args:
+        node_id (int): Node ID the distances are measured from.
+
+    Returns:
+        array: Distance to each node ID, infinity if unreachable.
+    """
+    version = self._get_connections_version()
+    if self._distance_trees_version != version:
+      self._distance_trees = dict()
+      self._distance_trees_version = version
+    distances = self._distance_trees.get(node_id)
+    if distances is None:
+      (distances, _) = shortest_path_tree(self.graph, node_id)
+      self._distance_trees[node_id] = distances
+    return distances
+
+  def _heuristic_distance(self, node_a: int, node_b: int) -> float:
     """Calculates and returns the heuristic distance between
     2 nodes.
 
     Args:
-        node_a (str): Node to start heuristic calculation from.
-        node_b (str): Node to start heuristic calculation from.
+        node_a (int): Node ID to start heuristic calculation from.
+        node_b (int): Node ID to start heuristic calculation from.
 
     Returns:
-        float: Float representing distance between 2 nodes.
+        float: Float representing distance between 2 nodes, never
+        more than the shortest distance between them.
     """
-    (node_a_x, node_a_y) = self.node_coords[node_a]
-    (node_b_x, node_b_y) = self.node_coords[node_b]
-    return math.sqrt(math.pow((node_a_x - node_b_x), 2) + math.pow((node_a_y - node_b_y), 2))
+    # Connections can be shorter than the straight line between their nodes
+    return self.graph.get_distance_scale() * self.graph.straight_line_distance(node_a, node_b)
 
-  def retrace_steps(self, start_node: str, goal_node: str, visited_node_pairs: list) -> list:
+  def retrace_steps(self, start_node: int, goal_node: int, parents: dict) -> list:
     """Retrieve the exact stepts from a starting node to a goal node
-    given a list of visited nodes
+    given the parent of each visited node
 
     Args:
-        start_node (str): Starting Node.
-        goal_node (str): Ending Node.
-        visited_node_pairs (list): List of tuples representing the
-        currently visited node and immediate parent node.
+        start_node (int): Starting Node ID.
+        goal_node (int): Ending Node ID.
+        parents (dict): Dictionary of each visited node ID and the
+        node ID it was reached from.
 
     Returns:
         list: A list of nodes arranged from a start node and the
@@ -101,18 +632,39 @@ class RouteSearcher:
     current_node = goal_node
     
     while current_node != start_node:
-      for (parent, child) in visited_node_pairs:
-        if(child == current_node):
-          steps.append(parent)
-          current_node = parent
-          break
+      current_node = parents[current_node]
+      steps.append(current_node)
     steps.reverse()
     return steps
 
-  def _get_actual_distance_between_directly_connected_nodes(self, nodeA: str, nodeB:str) -> int:
-    return self.coord_connections[(nodeA, nodeB)]
+  def _get_actual_distance_between_directly_connected_nodes(self, nodeA: int, nodeB: int) -> int:
+    return self.graph.get_arc_weight(nodeA, nodeB)
 
   def getOptimalRoute(self, start_node: str, goal_node: str) -> list:
+    """Returns the optimal route from a start node to an end node,
+    reusing a cached route if the same pair was searched before.
+
+    Args:
+        start_node (str): Starting Node.
+        goal_node (str): Ending Node.
+
+    Returns:
+        list: List containing arrangement of nodes representing
+        the optimal path.
+    """
+    self._discard_stale_routes()
+    route = self.route_cache.get(start_node, goal_node)
+    self.instrumentation.count("route_cache_misses" if route is None else "route_cache_hits")
+    if route is None:
+      route = self._searchOptimalRoute(start_node, goal_node)
+      # Failed searches are not cached
+      if not isinstance(route, list):
+        return route
+      self.route_cache.put(start_node, goal_node, route)
+    # Callers get their own copy so the cached route cannot be altered
+    return list(route)
+
+  def _searchOptimalRoute(self, start_node: str, goal_node: str) -> list:
     """Calculates the optimal route from a start node to and end
     node using A* Search Algorithm
 
@@ -124,36 +676,161 @@ class RouteSearcher:
         list: List containing arrangement of nodes representing
         the optimal path.
     """
-    visited_node_pairs = []
-    pq = PriorityQueue()
-    root_branches = self.existing_connections[start_node]
-    for branch in root_branches:
-      heur_dist = self._heuristic_distance(branch, goal_node)
-      path_cost = self._get_actual_distance_between_directly_connected_nodes(start_node, branch)
-      # Fills priority queue with ((Heur Dist to Goal + Dist to Branch), Path Cost, Branch, Parent Node)
-      # so that Priority Queue can sort the closes branch
-      pq.put(((heur_dist + path_cost), path_cost, branch, start_node))
-    
-    while not pq.empty():
-      # Extract Queue Data
-      (calculated_dist, total_path_cost, current_node, parent_node) = pq.get()
+    graph = self.graph
+    start_node = graph.get_index(start_node)
+    goal_node = graph.get_index(goal_node)
+
+    if self.contraction_hierarchy is not None:
+      search_result = self.contraction_hierarchy.query(start_node, goal_node)
+      self._record_search(self.contraction_hierarchy.last_nodes_expanded, 0)
+    else:
+      search_result = self._a_star_search(start_node, goal_node, self._get_heuristic(goal_node))
+    if search_result is None:
+      return "ERROR: Route NOT found"
+
+    (steps, _) = search_result
+    return [graph.node_names[node_id] for node_id in steps]
+
+  def useContractionHierarchy(self, path: str = None) -> ContractionHierarchy:
+    """Answers later route searches with a contraction hierarchy of the
+    graph instead of A* Search. The hierarchy is dropped again if the
+    graph is modified.
+
+    Args:
+        path (str, optional): File the hierarchy is loaded from if it
+        matches the graph, or saved to once built. Defaults to building
+        it in memory only.
+
+    Returns:
+        ContractionHierarchy: The hierarchy in use.
+    """
+    self._discard_stale_routes()
+    if path is None:
+      self.contraction_hierarchy = ContractionHierarchy.build(self.graph)
+    else:
+      self.contraction_hierarchy = ContractionHierarchy.load_or_build(path, self.graph)
+    return self.contraction_hierarchy
+
+  def _get_heuristic(self, goal_node: int, heuristic_mode: HeuristicModes = None):
+    """Returns the heuristic function of A* Search towards a goal node.
+
+    Args:
+        goal_node (int): Goal Node ID.
+        heuristic_mode (HeuristicModes, optional): Heuristic to use.
+        Defaults to the searcher's heuristic_mode.
+
+    Returns:
+        Callable[[int], float]: Function returning the estimated
+        distance from a node ID to the goal.
+    """
+    if (heuristic_mode or self.heuristic_mode) == HeuristicModes.LANDMARKS:
+      if self.landmark_heuristic is None:
+        self.landmark_heuristic = LandmarkHeuristic.compute(self.graph, self.num_landmarks)
+      return self.landmark_heuristic.heuristic_to(goal_node)
+    return lambda node_id: self._heuristic_distance(node_id, goal_node)
+
+  def compareHeuristics(self, node_pairs: list) -> dict:
+    """Searches the same node pairs with each heuristic and reports
+    how many nodes each one expanded. Results are not cached and the
+    searcher's search statistics are left untouched.
 
-      # Set Visited Path
-      visited_node_pairs.append((parent_node, current_node))
+    Args:
+        node_pairs (list): List of (start node, goal node) tuples.
+
+    Returns:
+        dict: Dictionary of each heuristic's name and the total number
+        of nodes it expanded.
+    """
+    self._discard_stale_routes()
+    saved_stats = dict(self.search_stats)
+    comparison = dict()
+    for heuristic_mode in HeuristicModes:
+      self.search_stats["nodes_expanded"] = 0
+      for (start_node, goal_node) in node_pairs:
+        goal = self.graph.get_index(goal_node)
+        self._a_star_search(self.graph.get_index(start_node), goal, self._get_heuristic(goal, heuristic_mode))
+      comparison[heuristic_mode.name.lower()] = self.search_stats["nodes_expanded"]
+    self.search_stats = saved_stats
+    return comparison
+
+  def _a_star_search(self, start_node: int, goal_node: int, heuristic) -> tuple:
+    """Runs A* Search between 2 node IDs.
+
+    Every node keeps the lowest path cost found to it so far. Queue
+    entries that no longer match that cost are stale and skipped when
+    popped (lazy deletion) instead of being removed from the heap, and
+    expanded nodes are kept in a closed set. A closed node is only
+    re-opened if a strictly cheaper path to it is found.
+
+    Args:
+        start_node (int): Starting Node ID.
+        goal_node (int): Ending Node ID.
+        heuristic (Callable[[int], float]): Estimated distance from a
+        node ID to the goal node.
+
+    Returns:
+        tuple: A tuple of the list of node IDs on the optimal path
+        and the path's total distance, or None if no path exists.
+    """
+    neighbours = self.graph.neighbours
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+
+    best_costs = {start_node: 0}
+    parents = {start_node: start_node}
+    closed = set()
+    # Entries are (Path Cost + Heur Dist to Goal, Path Cost, Node)
+    heap = [(heuristic(start_node), 0, start_node)]
+    expanded = 0
+    pushes = 1
+
+    while heap:
+      (_, path_cost, current_node) = heappop(heap)
+
+      # Skip stale entries and nodes that were already expanded
+      if current_node in closed or path_cost > best_costs[current_node]:
+        continue
+      closed.add(current_node)
+      expanded += 1
 
       if current_node == goal_node:
-        return self.retrace_steps(start_node, goal_node, visited_node_pairs)
-      
-      # Add all possible newly possible routes
-      branches = self.existing_connections[current_node]
-      for branch in branches:
-        
-        # Don't want to backstep from to the node we came from
-        if branch == parent_node:
-          continue
-
-        heur_dist = self._heuristic_distance(branch, goal_node)
-        total_path_cost += self._get_actual_distance_between_directly_connected_nodes(current_node, branch)
-        pq.put(((heur_dist + total_path_cost), total_path_cost, branch, current_node))
-
-    return "ERROR: Route NOT found"
\ No newline at end of file
+        self._record_search(expanded, pushes)
+        return (self.retrace_steps(start_node, goal_node, parents), path_cost)
+
+      for (branch, branch_cost) in neighbours(current_node):
+        branch_path_cost = path_cost + branch_cost
+        if branch_path_cost < best_costs.get(branch, math.inf):
+          best_costs[branch] = branch_path_cost
+          parents[branch] = current_node
+          closed.discard(branch)
+          heappush(heap, (branch_path_cost + heuristic(branch), branch_path_cost, branch))
+          pushes += 1
+
+    self._record_search(expanded, pushes)
+    return None
+
+  def _record_search(self, expanded: int, pushes: int) -> None:
+    """Adds the counters of a finished search to the search statistics.
+
+    Args:
+        expanded (int): Number of nodes expanded by the search.
+        pushes (int): Number of entries pushed onto the search's heap.
+    """
+    self.search_stats["searches"] += 1
+    self.search_stats["nodes_expanded"] += expanded
+    self.search_stats["heap_pushes"] += pushes
+    self.search_stats["last_nodes_expanded"] = expanded
+    if self.instrumentation.enabled:
+      self.instrumentation.count("searches")
+      self.instrumentation.count("nodes_expanded", expanded)
+      self.instrumentation.count("heap_pushes", pushes)
+
+  def getSearchStats(self) -> dict:
+    """Returns the counters of the A* Searches run so far.
+
+    Returns:
+        dict: Dictionary containing the number of searches run, the
+        total nodes expanded and heap pushes, and the nodes expanded
+        by the last search.
+    """
+    return dict(self.search_stats)
@@ -0,0 +1,134 @@
+"""
+  This module holds the Clarke-Wright savings heuristic used to solve the
+  capacitated vehicle routing problem of delivering packages from the
+  SupplyDepot.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  SavingsSolver
+    A class that merges single stop trips into multi-stop trips in order
+    of the distance each merge saves.
+"""
+
+import heapq
+from collections import deque
+from src.module_distance_matrix import DistanceMatrix
+
+class SavingsSolver:
+  """
+  A class that solves the capacitated vehicle routing problem with the
+  Clarke-Wright savings heuristic. Every stop starts on its own trip from
+  the SupplyDepot. Trips end at their last stop instead of returning to
+  the SupplyDepot, matching the routes produced elsewhere in the program,
+  so appending the trip starting at stop j to the trip ending at stop i
+  saves `dist(depot, j) - dist(i, j)`.
+
+  Savings are kept in a heap and merges are applied from the largest
+  saving down, skipping those that would break the weight limit or whose
+  stops are no longer at the ends of their trips.
+
+  ....
+
+  Attributes
+  ----------
+  distance_matrix: DistanceMatrix
+    Shortest distances between the SupplyDepot and every stop.
+
+  depot: int
+    Node ID of the SupplyDepot.
+
+  truck_max_weight: int
+    Maximum weight a single truck load can carry.
+
+  max_neighbours: int
+    Number of closest stops each stop is considered for merging with. None
+    considers every pair of stops.
+
+  Methods
+  -------
+  solve(stops: list) -> list
+    Returns the trips as lists of stops in delivery order.
+  """
+
+  distance_matrix: DistanceMatrix = None
+  depot: int = None
+  truck_max_weight: int = None
+  max_neighbours: int = None
+
+  def __init__(self, distance_matrix: DistanceMatrix, depot: int, truck_max_weight: int, \
+    max_neighbours: int = 50) -> None:
+    self.distance_matrix = distance_matrix
+    self.depot = depot
+    self.truck_max_weight = truck_max_weight
+    self.max_neighbours = max_neighbours
+
+  def _build_savings(self, stops: list) -> list:
+    """Builds a heap of the savings of appending one stop's trip to
+    another's, limited to each stop's closest neighbours.
+
+    Args:
+        stops (list): List of DeliveryStops.
+
+    Returns:
+        list: Heap of (-Saving, Stop Index i, Stop Index j) entries.
+    """
+    get_distance = self.distance_matrix.get_distance
+    depot_distances = [get_distance(self.depot, stop.node) for stop in stops]
+    savings = []
+
+    for (index_i, stop_i) in enumerate(stops):
+      distances = ((get_distance(stop_i.node, stop_j.node), index_j) \
+        for (index_j, stop_j) in enumerate(stops) if index_j != index_i)
+      if self.max_neighbours is not None:
+        distances = heapq.nsmallest(self.max_neighbours, distances)
+
+      for (distance, index_j) in distances:
+        saving = depot_distances[index_j] - distance
+        if saving > 0:
+          savings.append((-saving, index_i, index_j))
+
+    heapq.heapify(savings)
+    return savings
+
+  def solve(self, stops: list) -> list:
+    """Merges the trips of the stops in order of decreasing savings.
+
+    Args:
+        stops (list): List of DeliveryStops. Each stop must fit on a
+        truck by itself to be merged with others.
+
+    Returns:
+        list: List of trips, each a list of DeliveryStops in the order
+        they are visited.
+    """
+    # Each trip is a deque of stop indexes, trip_of maps a stop index to its trip
+    trips = [deque([index]) for index in range(len(stops))]
+    trip_of = list(range(len(stops)))
+    trip_weights = [stop.weight for stop in stops]
+    savings = self._build_savings(stops)
+
+    while savings:
+      (_, index_i, index_j) = heapq.heappop(savings)
+      trip_i = trip_of[index_i]
+      trip_j = trip_of[index_j]
+      # Stop i must end its trip and stop j must start a different trip
+      if trip_i == trip_j or trips[trip_i][-1] != index_i or trips[trip_j][0] != index_j:
+        continue
+      if trip_weights[trip_i] + trip_weights[trip_j] > self.truck_max_weight:
+        continue
+
+      # Relabel the stops of the shorter trip only
+      if len(trips[trip_i]) >= len(trips[trip_j]):
+        (kept, merged) = (trip_i, trip_j)
+        trips[trip_i].extend(trips[trip_j])
+      else:
+        (kept, merged) = (trip_j, trip_i)
+        trips[trip_j].extendleft(reversed(trips[trip_i]))
+      for index in trips[merged]:
+        trip_of[index] = kept
+      trip_weights[kept] += trip_weights[merged]
+      trips[merged] = None
+
+    return [[stops[index] for index in trip] for trip in trips if trip is not None]
@@ -0,0 +1,205 @@
+"""
+  This module holds the long-running service that keeps the parsed graph
+  and route caches warm and optimizes package manifests sent to it.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  OptimizationService
+    A class that serves optimized trips for package manifests over a
+    local socket.
+"""
+
+import os
+import json
+import asyncio
+from src.model_data import ParsedData
+from src.module_multistart import create_worker_pool, get_worker_delegator
+
+def _optimize_manifest(packages: dict) -> tuple:
+  """Optimizes the trips of one manifest with the TruckDelegator of the
+  current worker process, whose route caches stay warm across manifests.
+
+  Args:
+      packages (dict): Package IDs and their (Package Type, Goal Node) tuples.
+
+  Returns:
+      tuple: A tuple of the optimized route and its total distance.
+  """
+  truckDelegator = get_worker_delegator()
+  truckDelegator.package_data.clear()
+  truckDelegator.package_data.update(packages)
+  optimized_route = truckDelegator.getOptimizedRoute()
+  return (optimized_route, truckDelegator.getTotalDistance(optimized_route))
+
+class OptimizationService:
+  """
+  A class that serves optimized trips for package manifests over a local
+  TCP socket, so the graph is parsed and validated once instead of once
+  per manifest.
+
+  The protocol is one JSON object per line. A request holds a "packages"
+  object of package IDs and their [Package Type, Goal Node] pairs, and an
+  optional "id" that is echoed back. The response holds the "trips", each
+  with its "trip_id", "packages" and "route", and their "total_distance",
+  or an "error" message if the request is invalid or failed. A request
+  line longer than max_request_size gets an error and ends the connection,
+  as the rest of the line cannot be told apart from the next request.
+
+  Manifests are optimized in a process pool so concurrent requests do not
+  block each other or the event loop. On platforms that fork worker
+  processes the parsed graph is inherited from the service, otherwise it
+  is sent to each worker once when the pool starts. Each worker keeps one
+  TruckDelegator, so its routes and shortest-path tree are computed once
+  and reused by every later manifest.
+
+  ....
+
+  Attributes
+  ----------
+  parsedData: ParsedData
+    Parsed data shared by all requests.
+
+  max_workers: int
+    Number of worker processes.
+
+  max_request_size: int
+    Maximum length of a request line in bytes.
+
+  delegator_options: dict
+    Keyword arguments passed to each worker's TruckDelegator.
+
+  Methods
+  -------
+  optimize(packages: dict) -> dict
+    Returns the optimized trips of a manifest.
+
+  handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter)
+    Answers the requests of one client until it disconnects.
+
+  serve(host: str, port: int)
+    Serves requests until cancelled.
+  """
+
+  parsedData: ParsedData = None
+  max_workers: int = None
+  max_request_size: int = None
+  delegator_options: dict = None
+
+  def __init__(self, parsedData: ParsedData, max_workers: int = None, max_request_size: int = 64 * 2 ** 20, \
+    **delegator_options) -> None:
+    self.parsedData = parsedData
+    self.max_workers = max_workers or os.cpu_count()
+    self.max_request_size = max_request_size
+    self.delegator_options = delegator_options
+    self._executor = None
+
+  def _check_manifest(self, packages) -> dict:
+    """Checks a manifest before it is sent to a worker.
+
+    Raises:
+        ValueError: If the manifest is not an object of package IDs and
+        [Package Type, Goal Node] pairs, or refers to an unknown package
+        type or goal node.
+
+    Returns:
+        dict: Package IDs and their (Package Type, Goal Node) tuples.
+    """
+    if not isinstance(packages, dict):
+      raise ValueError("\"packages\" must be an object of package IDs and [Package Type, Goal Node] pairs")
+    package_types = self.parsedData.get_package_type_data()
+    node_coords = self.parsedData.get_node_data()
+    manifest = dict()
+    for (package_id, package) in packages.items():
+      if not isinstance(package, (list, tuple)) or len(package) != 2 \
+        or not all(isinstance(field, str) for field in package):
+        raise ValueError(f"Package {package_id} must be a [Package Type, Goal Node] pair of strings")
+      (category, goal) = package
+      if category not in package_types:
+        raise ValueError(f"Package {package_id} has unknown package type {category}")
+      if goal not in node_coords:
+        raise ValueError(f"Package {package_id} has unknown goal node {goal}")
+      manifest[package_id] = (category, goal)
+    return manifest
+
+  async def optimize(self, packages: dict) -> dict:
+    """Optimizes the trips of a manifest in a worker process.
+
+    Args:
+        packages (dict): Package IDs and their [Package Type, Goal Node] pairs.
+
+    Raises:
+        ValueError: If the manifest is invalid.
+
+    Returns:
+        dict: A Dictionary of the "trips", each with its "trip_id",
+        "packages" and "route", and their "total_distance".
+    """
+    manifest = self._check_manifest(packages)
+    loop = asyncio.get_running_loop()
+    (optimized_route, total_distance) = await loop.run_in_executor(self._executor, _optimize_manifest, manifest)
+    return {
+      "trips": [{"trip_id": trip_id, "packages": trip_packages, "route": route} \
+        for (trip_id, (trip_packages, route)) in optimized_route.items()],
+      "total_distance": total_distance
+    }
+
+  async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Answers the requests of one client, one JSON object per line,
+    until it disconnects. Requests of a client are answered in order.
+
+    Args:
+        reader (asyncio.StreamReader): Reader of the client's requests.
+        writer (asyncio.StreamWriter): Writer of the responses.
+    """
+    try:
+      while True:
+        try:
+          line = await reader.readline()
+        except ValueError:
+          # The line is over the stream limit and only partly read
+          writer.write(json.dumps({"error": f"Requests must be at most {self.max_request_size} bytes"}).encode() + b"\n")
+          await writer.drain()
+          break
+        if not line:
+          break
+        if not line.strip():
+          continue
+        response = dict()
+        try:
+          request = json.loads(line)
+          if not isinstance(request, dict):
+            raise ValueError("A request must be a JSON object")
+          if "id" in request:
+            response["id"] = request["id"]
+          response.update(await self.optimize(request.get("packages")))
+        except ValueError as e:
+          # Covers malformed JSON too
+          response["error"] = str(e)
+        except Exception as e:
+          # A failed request must not end the connection of the client
+          response["error"] = f"Request failed: {type(e).__name__}: {e}"
+        writer.write(json.dumps(response).encode() + b"\n")
+        await writer.drain()
+    except ConnectionError:
+      pass
+    finally:
+      writer.close()
+
+  async def serve(self, host: str = "127.0.0.1", port: int = 8765) -> None:
+    """Starts the worker processes and serves requests until cancelled.
+
+    Args:
+        host (str, optional): Address to listen on. Defaults to 127.0.0.1,
+        so only local clients can connect.
+        port (int, optional): Port to listen on. Defaults to 8765.
+    """
+    with create_worker_pool(self.parsedData, self.delegator_options, self.max_workers) as executor:
+      self._executor = executor
+      try:
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=self.max_request_size)
+        async with server:
+          await server.serve_forever()
+      finally:
+        self._executor = None
@@ -0,0 +1,151 @@
+"""
+  This module holds the shortest path algorithms shared by the route
+  searcher and the structures precomputed from the graph.
+
+  ....
+
+  Accessible Functions
+  --------------------
+  shortest_path_tree(graph: CompactGraph, root: int, targets: list) -> tuple
+    Runs Dijkstra's Algorithm from a node to every reachable node, or until
+    a set of target nodes is reached.
+
+  repair_shortest_path_tree(graph: CompactGraph, distances: array, parents: array, changed_arcs: list) -> set
+    Repairs a shortest-path tree in place after arcs of the graph changed.
+"""
+
+import math
+import heapq
+from array import array
+from src.model_graph import CompactGraph
+
+def shortest_path_tree(graph: CompactGraph, root: int, targets: list = None) -> tuple:
+  """Runs Dijkstra's Algorithm from a root node ID to every reachable node.
+
+  Args:
+      graph (CompactGraph): Graph to search.
+      root (int): Node ID the tree is rooted at.
+      targets (list, optional): Node IDs after which the search stops once
+      all of them are reached. Only nodes closer to the root than the
+      furthest target are then part of the tree. Defaults to searching
+      every reachable node.
+
+  Returns:
+      tuple: A tuple of 2 arrays indexed by node ID, the shortest
+      distance to each node (infinity if unreachable or not searched)
+      and the parent node ID of each node on its shortest path (-1 for
+      the root and unreachable or not searched nodes).
+  """
+  num_nodes = graph.get_node_count()
+  distances = array('d', [math.inf]) * num_nodes
+  parents = array('q', [-1]) * num_nodes
+  settled = bytearray(num_nodes)
+  neighbours = graph.neighbours
+  remaining_targets = None if targets is None else set(targets)
+
+  distances[root] = 0
+  heap = [(0, root)]
+
+  while heap:
+    (distance, current_node) = heapq.heappop(heap)
+    # Skip stale entries of nodes that were already settled
+    if settled[current_node]:
+      continue
+    settled[current_node] = 1
+    if remaining_targets is not None:
+      remaining_targets.discard(current_node)
+      if not remaining_targets:
+        break
+
+    for (branch, branch_cost) in neighbours(current_node):
+      branch_distance = distance + branch_cost
+      if branch_distance < distances[branch]:
+        distances[branch] = branch_distance
+        parents[branch] = current_node
+        heapq.heappush(heap, (branch_distance, branch))
+
+  # Nodes reached but not settled before stopping may not have their shortest distance yet
+  for (_, node) in heap:
+    if not settled[node]:
+      distances[node] = math.inf
+      parents[node] = -1
+
+  return (distances, parents)
+
+def repair_shortest_path_tree(graph: CompactGraph, distances: array, parents: array, changed_arcs: list) -> set:
+  """Repairs a shortest-path tree built by shortest_path_tree() in place
+  after arcs of the graph were changed, added or removed, instead of
+  rebuilding it.
+
+  Only tree arcs that got longer or were removed can make distances grow,
+  and then only for the subtree below them. Those nodes are cut off and
+  reattached through their cheapest arc from the rest of the tree. Arcs
+  that got shorter or were added are relaxed once. Dijkstra's Algorithm
+  then runs from the nodes that changed, so its cost grows with the part
+  of the tree that changed, not the size of the graph.
+
+  Args:
+      graph (CompactGraph): Graph the tree was built over, with the
+      changes already applied.
+      distances (array): Distance to each node ID, updated in place.
+      parents (array): Parent of each node ID, updated in place.
+      changed_arcs (list): List of (Source, Target, Old Distance, New
+      Distance) tuples of the changed arcs, with None for an arc that did
+      not exist before or no longer exists.
+
+  Returns:
+      set: Node IDs whose distance or parent was repaired.
+  """
+  repaired = set()
+  cut_roots = [target for (source, target, old_weight, new_weight) in changed_arcs \
+    if parents[target] == source and (new_weight is None or new_weight > old_weight)]
+  if cut_roots:
+    children = dict()
+    for (node, parent) in enumerate(parents):
+      if parent >= 0:
+        children.setdefault(parent, []).append(node)
+    stack = cut_roots
+    while stack:
+      node = stack.pop()
+      if node not in repaired:
+        repaired.add(node)
+        stack.extend(children.get(node, ()))
+    for node in repaired:
+      distances[node] = math.inf
+      parents[node] = -1
+
+  heap = []
+  # Cut off nodes rejoin through their cheapest arc from the rest of the tree
+  for node in repaired:
+    for (neighbour, _) in graph.neighbours(node):
+      weight = graph.get_arc_weight(neighbour, node)
+      if weight is not None and distances[neighbour] + weight < distances[node]:
+        distances[node] = distances[neighbour] + weight
+        parents[node] = neighbour
+    if distances[node] < math.inf:
+      heap.append((distances[node], node))
+
+  # Arcs that got shorter or were added may give shorter routes
+  for (source, target, old_weight, new_weight) in changed_arcs:
+    if new_weight is not None and distances[source] + new_weight < distances[target]:
+      distances[target] = distances[source] + new_weight
+      parents[target] = source
+      repaired.add(target)
+      heap.append((distances[target], target))
+
+  heapq.heapify(heap)
+  neighbours = graph.neighbours
+  while heap:
+    (distance, current_node) = heapq.heappop(heap)
+    # Skip stale entries of nodes that were improved since
+    if distance > distances[current_node]:
+      continue
+    for (branch, branch_cost) in neighbours(current_node):
+      branch_distance = distance + branch_cost
+      if branch_distance < distances[branch]:
+        distances[branch] = branch_distance
+        parents[branch] = current_node
+        repaired.add(branch)
+        heapq.heappush(heap, (branch_distance, branch))
+
+  return repaired
@@ -0,0 +1,221 @@
+"""
+  This module holds the spatial index used to find nodes by their
+  coordinates without scanning every node.
+
+  ....
+
+  Accessible Classes
+  ------------------
+  KDTree
+    A class that answers nearest-neighbour queries over 2D points.
+"""
+
+import heapq
+from array import array
+from src.model_graph import CompactGraph
+
+class KDTree:
+  """
+  A class that answers nearest-neighbour queries over 2D points, each
+  with an integer ID, in O(log n) time on average instead of scanning
+  every point.
+
+  The tree is stored implicitly in 3 arrays. The point in the middle of
+  a range of the arrays splits that range, on X at even depths and on Y
+  at odd depths, with the points before it on one side of the split and
+  the points after it on the other. The ranges of one depth are balanced
+  cells of about equal numbers of points, which partition() hands out.
+
+  ....
+
+  Attributes
+  ----------
+  ids: array
+    Array of the ID of each point, in tree order.
+
+  xs: array
+    Array of the X coordinate of each point, in tree order.
+
+  ys: array
+    Array of the Y coordinate of each point, in tree order.
+
+  Methods
+  -------
+  from_graph(graph: CompactGraph) -> KDTree
+    Builds a tree over the coordinates of every node of a graph.
+
+  nearest(x: float, y: float) -> tuple
+    Returns the ID of the closest point and its squared distance.
+
+  k_nearest(x: float, y: float, k: int) -> list
+    Returns the IDs of the k closest points, closest first.
+
+  partition(num_parts: int) -> list
+    Returns the IDs of the points split into spatially compact parts.
+  """
+
+  ids: array = None
+  xs: array = None
+  ys: array = None
+
+  def __init__(self, ids, xs, ys) -> None:
+    """Builds the tree.
+
+    Args:
+        ids (Sequence[int]): ID of each point.
+        xs (Sequence[float]): X coordinate of each point.
+        ys (Sequence[float]): Y coordinate of each point.
+    """
+    points = list(zip(xs, ys, ids))
+    # (Start, End, Depth) of the ranges left to split
+    stack = [(0, len(points), 0)]
+    while stack:
+      (start, end, depth) = stack.pop()
+      if end - start <= 1:
+        continue
+      points[start:end] = sorted(points[start:end], key=lambda point: point[depth % 2])
+      middle = (start + end) // 2
+      stack.append((start, middle, depth + 1))
+      stack.append((middle + 1, end, depth + 1))
+
+    self.xs = array('d', (point[0] for point in points))
+    self.ys = array('d', (point[1] for point in points))
+    self.ids = array('q', (point[2] for point in points))
+
+  @classmethod
+  def from_graph(cls, graph: CompactGraph) -> "KDTree":
+    """Builds a tree over the coordinates of every node of a graph,
+    with node IDs as point IDs.
+
+    Args:
+        graph (CompactGraph): Graph whose nodes are indexed.
+
+    Returns:
+        KDTree: The built tree.
+    """
+    return cls(range(graph.get_node_count()), graph.coords_x, graph.coords_y)
+
+  def __len__(self) -> int:
+    return len(self.ids)
+
+  def nearest(self, x: float, y: float) -> tuple:
+    """Returns the point closest to a location.
+
+    Args:
+        x (float): X coordinate of the location.
+        y (float): Y coordinate of the location.
+
+    Raises:
+        ValueError: If the tree is empty.
+
+    Returns:
+        tuple: A tuple of the ID of the closest point and its squared
+        distance to the location.
+    """
+    if not self.ids:
+      raise ValueError("The spatial index is empty")
+    xs = self.xs
+    ys = self.ys
+    (best_distance, best_position) = (float("inf"), -1)
+    # (Start, End, Axis, Squared Distance to Split) of the ranges left to search
+    stack = [(0, len(xs), 0, 0)]
+    while stack:
+      (start, end, axis, split_bound) = stack.pop()
+      if split_bound >= best_distance:
+        continue
+      while start < end:
+        middle = (start + end) // 2
+        point_x = xs[middle]
+        point_y = ys[middle]
+        squared_distance = (point_x - x) * (point_x - x) + (point_y - y) * (point_y - y)
+        if squared_distance < best_distance:
+          (best_distance, best_position) = (squared_distance, middle)
+        split_distance = (x - point_x) if axis == 0 else (y - point_y)
+        # Descend the near side here, the far side is searched later if it can hold a closer point
+        split_bound = split_distance * split_distance
+        if split_distance < 0:
+          if split_bound < best_distance:
+            stack.append((middle + 1, end, 1 - axis, split_bound))
+          end = middle
+        else:
+          if split_bound < best_distance:
+            stack.append((start, middle, 1 - axis, split_bound))
+          start = middle + 1
+        axis = 1 - axis
+    return (self.ids[best_position], best_distance)
+
+  def k_nearest(self, x: float, y: float, k: int, with_distances: bool = False) -> list:
+    """Returns the k points closest to a location.
+
+    Args:
+        x (float): X coordinate of the location.
+        y (float): Y coordinate of the location.
+        k (int): Number of points returned, fewer if the tree is smaller.
+        with_distances (bool, optional): Return (Squared Distance, ID)
+        tuples instead of IDs. Defaults to False.
+
+    Returns:
+        list: IDs of the closest points, closest first.
+    """
+    xs = self.xs
+    ys = self.ys
+    if k <= 0:
+      return []
+    # Max-heap of (-Squared Distance, Position) of the closest points found so far
+    closest = []
+    # (Start, End, Axis, Squared Distance to Split) of the ranges left to search
+    stack = [(0, len(xs), 0, 0)]
+    while stack:
+      (start, end, axis, split_bound) = stack.pop()
+      # The range can only hold closer points if its split is closer than the furthest point kept
+      if len(closest) == k and split_bound >= -closest[0][0]:
+        continue
+      while start < end:
+        middle = (start + end) // 2
+        squared_distance = (xs[middle] - x) ** 2 + (ys[middle] - y) ** 2
+        if len(closest) < k:
+          heapq.heappush(closest, (-squared_distance, middle))
+        elif squared_distance < -closest[0][0]:
+          heapq.heapreplace(closest, (-squared_distance, middle))
+
+        split_distance = (x - xs[middle]) if axis == 0 else (y - ys[middle])
+        split_bound = split_distance * split_distance
+        # Descend the near side here, the far side is searched later
+        if split_distance < 0:
+          stack.append((middle + 1, end, 1 - axis, split_bound))
+          end = middle
+        else:
+          stack.append((start, middle, 1 - axis, split_bound))
+          start = middle + 1
+        axis = 1 - axis
+
+    closest = sorted((-negative_distance, self.ids[position]) for (negative_distance, position) in closest)
+    if with_distances:
+      return closest
+    return [point_id for (_, point_id) in closest]
+
+  def partition(self, num_parts: int) -> list:
+    """Splits the points into spatially compact parts of about equal
+    size, by splitting the largest cell of the tree until there are
+    enough parts.
+
+    Args:
+        num_parts (int): Number of parts, fewer if there are fewer points.
+
+    Returns:
+        list: List of parts, each a list of point IDs.
+    """
+    if not self.ids:
+      return []
+    # Max-heap of (-Size, Start, End, Splitting Positions) of the cells, each a subtree
+    # of the tree and the splitting points above it that joined it
+    cells = [(-len(self.ids), 0, len(self.ids), [])]
+    # A cell of 1 subtree point cannot be split further
+    while len(cells) < num_parts and cells[0][2] - cells[0][1] > 1:
+      (_, start, end, splitters) = heapq.heappop(cells)
+      middle = (start + end) // 2
+      # The splitting point lies on the border and joins the cell after it
+      heapq.heappush(cells, (start - middle - len(splitters), start, middle, splitters))
+      heapq.heappush(cells, (middle - end, middle + 1, end, [middle]))
+    return [[*(self.ids[position] for position in splitters), *self.ids[start:end]] \
+      for (_, start, end, splitters) in sorted(cells, key=lambda cell: cell[1])]
@@ -0,0 +1,104 @@
+"""
+  This module holds the code that saves arrays to binary files and loads
+  them back as memory-mapped views, so precomputed data can be reused
+  across runs without being parsed again.
+
+  A file consists of a magic string, the length of a JSON header, the
+  JSON header (describing each array and any extra metadata) and the
+  raw data of every array aligned to 8 bytes.
+
+  ....
+
+  Accessible Functions
+  --------------------
+  write_arrays(path: str, metadata: dict, arrays: dict)
+    Saves a set of named arrays and their metadata to a file.
+
+  map_arrays(path: str) -> tuple
+    Memory-maps a file written by write_arrays.
+"""
+
+import json
+import mmap
+import struct
+from array import array
+
+_MAGIC = b"SPARES01"
+# Magic string followed by the length of the JSON header
+_PREFIX = struct.Struct("<8sQ")
+_ALIGNMENT = 8
+# Typecodes whose size is the same on every platform
+_PORTABLE_TYPECODES = {"b": 1, "B": 1, "q": 8, "d": 8}
+
+def _aligned(position: int) -> int:
+  return (position + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+def write_arrays(path: str, metadata: dict, arrays: dict) -> None:
+  """Saves a set of named arrays and their metadata to a file.
+
+  Args:
+      path (str): Path of the file to write.
+      metadata (dict): JSON serializable data saved with the arrays.
+      arrays (dict): Dictionary of array names and their arrays. Arrays
+      must use the 'b', 'B', 'q' or 'd' typecode.
+
+  Raises:
+      ValueError: If an array uses a typecode whose size differs
+      between platforms.
+  """
+  descriptors = []
+  position = 0
+  for name, values in arrays.items():
+    typecode = values.typecode if isinstance(values, array) else values.format
+    if typecode not in _PORTABLE_TYPECODES:
+      raise ValueError(f"Array '{name}' uses unsupported typecode '{typecode}'")
+    position = _aligned(position)
+    descriptors.append({"name": name, "typecode": typecode, "offset": position, "length": len(values)})
+    position += len(values) * _PORTABLE_TYPECODES[typecode]
+
+  header = json.dumps({"metadata": metadata, "arrays": descriptors}).encode("utf-8")
+  data_start = _aligned(_PREFIX.size + len(header))
+
+  with open(path, "wb") as output_file:
+    output_file.write(_PREFIX.pack(_MAGIC, len(header)))
+    output_file.write(header)
+    for descriptor, values in zip(descriptors, arrays.values()):
+      output_file.seek(data_start + descriptor["offset"])
+      output_file.write(memoryview(values).cast("B"))
+    # Pads the file so the last array can always be mapped
+    output_file.truncate(data_start + _aligned(position))
+
+def map_arrays(path: str) -> tuple:
+  """Memory-maps a file written by write_arrays. The arrays are returned
+  as read-only memoryviews, so their data is only read from disk when
+  it is accessed.
+
+  Args:
+      path (str): Path of the file to read.
+
+  Raises:
+      ValueError: If the file was not written by write_arrays.
+
+  Returns:
+      tuple: A tuple of the saved metadata and a dictionary of array
+      names and their memoryviews.
+  """
+  with open(path, "rb") as input_file:
+    mapped = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+  if len(mapped) < _PREFIX.size:
+    raise ValueError(f"'{path}' is not a saved array file")
+  (magic, header_length) = _PREFIX.unpack_from(mapped, 0)
+  if magic != _MAGIC:
+    raise ValueError(f"'{path}' is not a saved array file")
+
+  header = json.loads(mapped[_PREFIX.size:_PREFIX.size + header_length].decode("utf-8"))
+  data_start = _aligned(_PREFIX.size + header_length)
+  buffer = memoryview(mapped)
+
+  arrays = dict()
+  for descriptor in header["arrays"]:
+    start = data_start + descriptor["offset"]
+    end = start + descriptor["length"] * _PORTABLE_TYPECODES[descriptor["typecode"]]
+    arrays[descriptor["name"]] = buffer[start:end].cast(descriptor["typecode"])
+  return (header["metadata"], arrays)
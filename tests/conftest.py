@@ -0,0 +1,64 @@
+"""
+  Shared fixtures of the test suite. Tests run from the repository root
+  with `python -m pytest`.
+"""
+
+import os
+import sys
+import heapq
+import pytest
+
+REPOSITORY_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPOSITORY_PATH)
+
+from src.module_parser import InputParser
+from src.module_data_generator import DataGenerator
+
+SAMPLE_DATA_PATH = os.path.join(REPOSITORY_PATH, "Data", "csv")
+
+def _parse(directory: str):
+  return InputParser(*(os.path.join(directory, name) for name in \
+    ("nodes.csv", "connections.csv", "truck.csv", "package_units.csv", "packages.csv"))).get_parsed_data()
+
+@pytest.fixture(scope="session")
+def sample_data():
+  """Parsed data of the sample dataset in Data/csv."""
+  return _parse(SAMPLE_DATA_PATH)
+
+@pytest.fixture(scope="session")
+def generated_data(tmp_path_factory):
+  """Parsed data of a small generated dataset."""
+  directory = str(tmp_path_factory.mktemp("generated"))
+  DataGenerator(7).write_dataset(directory, 150, 400)
+  return _parse(directory)
+
+@pytest.fixture(params=["sample", "generated"])
+def parsed_data(request):
+  """Parsed data of each dataset in turn."""
+  return request.getfixturevalue(f"{request.param}_data")
+
+def dijkstra(connections, start_node: str) -> dict:
+  """Plain Dijkstra's Algorithm over a dictionary of (Node A, Node B)
+  connections, used as the reference the searchers are checked against.
+
+  Returns:
+      dict: Shortest distance from the start node to every reachable node.
+  """
+  neighbours = dict()
+  for ((node_a, node_b), distance) in connections.items():
+    neighbours.setdefault(node_a, []).append((node_b, distance))
+  distances = {start_node: 0}
+  heap = [(0, start_node)]
+  while heap:
+    (distance, node) = heapq.heappop(heap)
+    if distance > distances[node]:
+      continue
+    for (neighbour, connection_distance) in neighbours.get(node, ()):
+      if distance + connection_distance < distances.get(neighbour, float("inf")):
+        distances[neighbour] = distance + connection_distance
+        heapq.heappush(heap, (distances[neighbour], neighbour))
+  return distances
+
+def route_distance(connections, route: list) -> int:
+  """Returns the distance along a route, failing if it uses a missing connection."""
+  return sum(connections[(node_a, node_b)] for (node_a, node_b) in zip(route, route[1:]))
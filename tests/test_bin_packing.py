@@ -0,0 +1,44 @@
+import random
+from src.module_bin_packing import BinPacker
+from src.module_constraints import TruckDelegator, DelegationStrategies
+
+def best_fit_decreasing(truck_max_weight: int, weights: list) -> list:
+  """Reference best-fit-decreasing that scans every truck for each item."""
+  trucks = []
+  loads = []
+  for index in sorted(range(len(weights)), key=lambda index: -weights[index]):
+    fitting = [truck for truck in range(len(trucks)) if loads[truck] + weights[index] <= truck_max_weight]
+    if fitting:
+      truck = min(fitting, key=lambda truck: (truck_max_weight - loads[truck], truck))
+      trucks[truck].append(index)
+      loads[truck] += weights[index]
+    else:
+      trucks.append([index])
+      loads.append(weights[index])
+  return trucks
+
+def test_packs_into_fewest_trucks():
+  assert BinPacker(10).pack([3, 3, 3, 2, 2, 2, 1, 1, 1, 2]) == [[0, 1, 2, 6], [3, 4, 5, 9, 7, 8]]
+  assert BinPacker(10).pack([]) == []
+
+def test_matches_reference_and_respects_capacity():
+  rng = random.Random(11)
+  for _ in range(500):
+    truck_max_weight = rng.randint(1, 30)
+    weights = [rng.randint(1, truck_max_weight + 2) for _ in range(rng.randint(1, 60))]
+    trucks = BinPacker(truck_max_weight).pack(weights)
+    assert sorted(index for truck in trucks for index in truck) == list(range(len(weights)))
+    for truck in trucks:
+      # Only an item too heavy for any truck goes over, on a truck of its own
+      assert sum(weights[index] for index in truck) <= truck_max_weight or len(truck) == 1
+    assert trucks == best_fit_decreasing(truck_max_weight, weights)
+
+def test_bin_packing_strategy_delivers_every_package_within_capacity(parsed_data):
+  delegator = TruckDelegator(parsed_data, strategy=DelegationStrategies.BIN_PACKING)
+  optimized_route = delegator.getOptimizedRoute()
+  packages = [package_id for (trip_packages, _) in optimized_route.values() for package_id in trip_packages]
+  assert sorted(packages) == sorted(parsed_data.get_package_data())
+  for (trip_packages, route) in optimized_route.values():
+    assert delegator.package_data.get_total_weight(trip_packages) <= delegator.truck_max_weight
+    assert all(delegator.package_data[package_id][1] in route for package_id in trip_packages)
+  assert all(0 < utilization <= 100 for utilization in delegator.getTruckUtilization(optimized_route))
@@ -0,0 +1,22 @@
+import random
+import pytest
+from src.module_clustering import CapacitatedClusterer
+
+@pytest.mark.parametrize("num_points", [4, 9, 40, 300])
+def test_full_nearest_clusters_spill_into_any_cluster_with_room(num_points):
+  rng = random.Random(num_points)
+  xs = [rng.uniform(0, 100) for _ in range(num_points)]
+  ys = [rng.uniform(0, 100) for _ in range(num_points)]
+  # Unit weights always fit, as the clusters are planned below capacity
+  weights = [1] * num_points
+  clusterer = CapacitatedClusterer(capacity=3)
+  clusters = clusterer.cluster(xs, ys, weights)
+  assert sorted(point for points in clusters for point in points) == list(range(num_points))
+  assert all(len(points) <= clusterer.capacity for points in clusters)
+
+def test_two_clusters_do_not_exceed_capacity():
+  # Every point is nearest to the first centroid, the second one must take the overflow
+  xs = [0, 0, 0, 1, 50]
+  ys = [0, 1, 2, 0, 50]
+  clusters = CapacitatedClusterer(capacity=3, fill_ratio=1).cluster(xs, ys, [1] * 5)
+  assert sorted(map(len, clusters)) == [2, 3]
@@ -0,0 +1,105 @@
+import random
+import pytest
+from conftest import dijkstra, route_distance
+from src.module_route_searcher import RouteSearcher, RoutingModes
+from src.module_constraints import TruckDelegator
+
+DEPOT = "SupplyDepot"
+
+def is_open(connections, route: list) -> bool:
+  """Returns True if every connection of a route exists."""
+  return all(arc in connections for arc in zip(route, route[1:]))
+
+def test_shortened_connection_drops_stale_cached_route(sample_data):
+  searcher = RouteSearcher(sample_data)
+  for node in sample_data.get_node_data():
+    searcher.getOptimalRoute(DEPOT, node)
+  assert searcher.getOptimalRoute(DEPOT, "D") == [DEPOT, "L", "D"]
+
+  # D - B is shorter than the straight line between D and B
+  searcher.updateConnections({("D", "B"): 3})
+  route = searcher.getOptimalRoute(DEPOT, "D")
+  assert route == [DEPOT, "A", "B", "D"]
+  assert route_distance(searcher.coord_connections, route) == 14
+
+def test_shortened_connection_reports_affected_trip(sample_data):
+  delegator = TruckDelegator(sample_data)
+  optimized_route = delegator.getOptimizedRoute()
+  affected = delegator.updateConnections({("D", "B"): 3}, optimized_route)
+  distances = dijkstra(delegator.routeSearcher.coord_connections, DEPOT)
+  for (trip_id, (_, route)) in optimized_route.items():
+    if route_distance(delegator.routeSearcher.coord_connections, route) != distances[route[-1]]:
+      assert trip_id in affected
+
+def test_update_returns_changed_arcs_and_keeps_parsed_graph(sample_data):
+  searcher = RouteSearcher(sample_data)
+  old_distance = sample_data.get_connection_data()[("A", "B")]
+  changed_arcs = searcher.updateConnections({("A", "B"): old_distance + 1, ("A", "C"): 4})
+  (a, b, c) = (searcher.graph.get_index(node) for node in "ABC")
+  assert sorted(changed_arcs) == sorted([(a, b, old_distance, old_distance + 1), (b, a, old_distance, old_distance + 1), \
+    (a, c, None, 4), (c, a, None, 4)])
+  assert searcher.updateConnections({("A", "B"): old_distance + 1}) == []
+  assert sample_data.get_connection_data()[("A", "B")] == old_distance
+  assert ("A", "C") not in sample_data.get_connection_data()
+
+def test_both_orientations_of_a_connection_are_merged(sample_data):
+  searcher = RouteSearcher(sample_data)
+  old_distance = sample_data.get_connection_data()[("A", "B")]
+  changed_arcs = searcher.updateConnections({("A", "B"): old_distance + 1, ("B", "A"): old_distance + 1})
+  (a, b) = (searcher.graph.get_index(node) for node in "AB")
+  assert sorted(changed_arcs) == sorted([(a, b, old_distance, old_distance + 1), (b, a, old_distance, old_distance + 1)])
+
+@pytest.mark.parametrize("changes", [{("A", "Z"): 1}, {("A", "B"): 0}, {("A", "C"): None}, \
+  {("A", "B"): 1, ("B", "A"): 2}, {("A", "B"): 1, ("B", "A"): None}])
+def test_invalid_update_raises_value_error(sample_data, changes):
+  with pytest.raises(ValueError):
+    RouteSearcher(sample_data).updateConnections(changes)
+
+def test_random_updates_match_full_recompute(parsed_data):
+  connections = parsed_data.get_connection_data()
+  node_names = list(parsed_data.get_node_data())
+  tree_searcher = RouteSearcher(parsed_data, RoutingModes.SHORTEST_PATH_TREE)
+  tree_searcher.buildShortestPathTree(DEPOT)
+  searcher = RouteSearcher(parsed_data)
+  delegator = TruckDelegator(parsed_data)
+  optimized_route = delegator.getOptimizedRoute()
+  rng = random.Random(3)
+  for _ in range(40):
+    for (start_node, goal_node) in ((DEPOT, rng.choice(node_names)), tuple(rng.sample(node_names, 2))):
+      searcher.getOptimalRoute(start_node, goal_node)
+    current = searcher.coord_connections
+    arcs = [(node_a, node_b) for (node_a, node_b) in current if node_a < node_b]
+    changes = dict()
+    for _ in range(rng.randint(1, 3)):
+      (node_a, node_b) = rng.choice(arcs)
+      choice = rng.random()
+      if choice < 0.2:
+        changes[(node_a, node_b)] = None
+      elif choice < 0.6:
+        changes[(node_a, node_b)] = max(1, int(current[(node_a, node_b)] * rng.uniform(0.2, 1)))
+      elif choice < 0.8:
+        changes[(node_a, node_b)] = int(current[(node_a, node_b)] * rng.uniform(1, 3)) + 1
+      else:
+        # Connections are given in one orientation, as both at once must agree
+        changes[tuple(sorted(rng.sample(node_names, 2)))] = rng.randint(1, 20)
+
+    before = dijkstra(current, DEPOT)
+    optimal_trips = {trip_id for (trip_id, (_, route)) in optimized_route.items() \
+      if is_open(current, route) and route_distance(current, route) == before[route[-1]]}
+    tree_searcher.updateConnections(changes)
+    searcher.updateConnections(changes)
+    affected = delegator.updateConnections(changes, optimized_route)
+
+    current = searcher.coord_connections
+    (_, tree_distances, _) = tree_searcher.shortest_path_tree
+    reference = dijkstra(current, DEPOT)
+    graph = tree_searcher.graph
+    assert {graph.get_name(node): distance for (node, distance) in enumerate(tree_distances) \
+      if distance != float("inf")} == reference
+    for ((start_node, goal_node), route) in searcher.route_cache._routes.items():
+      assert is_open(current, route)
+      assert route_distance(current, route) == dijkstra(current, start_node)[goal_node]
+    for trip_id in optimal_trips:
+      (_, route) = optimized_route[trip_id]
+      if not is_open(current, route) or route_distance(current, route) != reference.get(route[-1]):
+        assert trip_id in affected
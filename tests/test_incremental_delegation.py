@@ -0,0 +1,79 @@
+import random
+import pytest
+from src.module_constraints import TruckDelegator
+
+def check_loads(delegator: TruckDelegator) -> None:
+  """Checks that every package is in exactly one load that can carry it and
+  whose route passes its goal."""
+  loads = delegator.getDelegatedLoads()
+  packages = [package_id for (load_packages, _) in loads.values() for package_id in load_packages]
+  assert sorted(packages) == sorted(delegator.package_data)
+  for (load_packages, route) in loads.values():
+    assert delegator.package_data.get_total_weight(load_packages) <= delegator.truck_max_weight
+    for package_id in load_packages:
+      assert delegator.package_data[package_id][1] in route
+
+def apply_diff(loads: dict, diff: dict) -> dict:
+  loads = dict(loads)
+  loads.update(diff["added"])
+  loads.update(diff["changed"])
+  for load_id in diff["removed"]:
+    del loads[load_id]
+  return loads
+
+def test_add_packages_reports_new_and_changed_loads(sample_data):
+  delegator = TruckDelegator(sample_data)
+  before = delegator.getOptimizedRoute()
+  diff = delegator.addPackages({"New_1": ("S", "A"), "New_2": ("L", "D")})
+  assert diff["removed"] == []
+  assert not set(diff["added"]) & set(before)
+  assert apply_diff(before, diff) == delegator.getDelegatedLoads()
+  assert {"New_1", "New_2"} <= {package_id for (packages, _) in {**diff["added"], **diff["changed"]}.values() \
+    for package_id in packages}
+  check_loads(delegator)
+
+@pytest.mark.parametrize("packages", [
+  {"Pack_1": ("S", "A")},
+  {"New_1": ("X", "A")},
+  {"New_1": ("S", "Nowhere")},
+  {"New_1": ("S", "A"), "New_2": ("S", "Nowhere")}
+])
+def test_invalid_add_raises_value_error_and_changes_nothing(sample_data, packages):
+  delegator = TruckDelegator(sample_data)
+  loads = delegator.getOptimizedRoute()
+  with pytest.raises(ValueError):
+    delegator.addPackages(packages)
+  assert delegator.getDelegatedLoads() == loads
+  assert "New_1" not in delegator.package_data
+
+@pytest.mark.parametrize("package_ids", [["Nowhere"], ["Pack_1", "Nowhere"], ["Pack_1", "Pack_1"]])
+def test_invalid_remove_raises_value_error_and_changes_nothing(sample_data, package_ids):
+  delegator = TruckDelegator(sample_data)
+  loads = delegator.getOptimizedRoute()
+  with pytest.raises(ValueError):
+    delegator.removePackages(package_ids)
+  assert delegator.getDelegatedLoads() == loads
+  assert "Pack_1" in delegator.package_data
+
+def test_remove_every_package_removes_every_load(sample_data):
+  delegator = TruckDelegator(sample_data)
+  loads = delegator.getOptimizedRoute()
+  diff = delegator.removePackages(list(delegator.package_data))
+  assert diff == {"added": dict(), "changed": dict(), "removed": sorted(loads)}
+  assert delegator.getDelegatedLoads() == dict()
+
+def test_random_adds_and_removes_keep_loads_consistent(parsed_data):
+  delegator = TruckDelegator(parsed_data)
+  loads = delegator.getOptimizedRoute()
+  node_names = list(parsed_data.get_node_data())[1:]
+  package_types = list(parsed_data.get_package_type_data())
+  rng = random.Random(5)
+  for step in range(30):
+    if rng.random() < 0.5:
+      diff = delegator.addPackages({f"New_{step}_{index}": (rng.choice(package_types), rng.choice(node_names)) \
+        for index in range(rng.randint(1, 5))})
+    else:
+      diff = delegator.removePackages(rng.sample(list(delegator.package_data), min(3, len(delegator.package_data))))
+    loads = apply_diff(loads, diff)
+    assert loads == delegator.getDelegatedLoads()
+    check_loads(delegator)
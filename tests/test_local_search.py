@@ -0,0 +1,34 @@
+import random
+import pytest
+from src.model_data import DeliveryStop
+from src.module_distance_matrix import DistanceMatrix
+from src.module_local_search import LocalSearchImprover
+
+@pytest.fixture(scope="module")
+def distance_matrix(generated_data):
+  return DistanceMatrix.compute(generated_data.get_graph())
+
+def make_trips(rng: random.Random, num_nodes: int, num_trips: int, weights) -> list:
+  return [[DeliveryStop(rng.randrange(1, num_nodes), [f"P{trip}_{index}"], weight) \
+    for (index, weight) in enumerate(weights(trip))] for trip in range(num_trips)]
+
+def test_improvement_keeps_stops_and_capacity(generated_data, distance_matrix):
+  rng = random.Random(2)
+  trips = make_trips(rng, generated_data.get_graph().get_node_count(), 20, \
+    lambda trip: [rng.randint(1, 3) for _ in range(rng.randint(1, 4))])
+  improver = LocalSearchImprover(distance_matrix, 0, 10, time_budget=5)
+  (improved, report) = improver.improve(trips)
+  assert sorted(stop.packages[0] for trip in improved for stop in trip) == \
+    sorted(stop.packages[0] for trip in trips for stop in trip)
+  assert all(sum(stop.weight for stop in trip) <= 10 for trip in improved)
+  assert report["distance_after"] <= report["distance_before"]
+  assert report["distance_after"] == sum(map(improver.get_trip_distance, improved))
+
+def test_time_budget_holds_when_most_moves_are_infeasible(generated_data, distance_matrix):
+  # Every trip is full and no 2 stops of different trips weigh the same,
+  # so every relocate and swap is rejected by the weight limit
+  rng = random.Random(3)
+  trips = make_trips(rng, generated_data.get_graph().get_node_count(), 1200, \
+    lambda trip: [trip + 1, 5000 - trip - 1])
+  (_, report) = LocalSearchImprover(distance_matrix, 0, 5000, time_budget=0.05).improve(trips)
+  assert report["seconds"] < 1
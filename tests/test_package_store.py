@@ -0,0 +1,15 @@
+import pytest
+
+def test_goals_are_node_ids_of_the_graph(sample_data):
+  store = sample_data.get_package_data()
+  for package_id in store:
+    assert sample_data.graph.node_names[store.get_goal(package_id)] == store[package_id][1]
+
+def test_unknown_goal_is_rejected(sample_data):
+  store = sample_data.get_package_data().copy()
+  num_packages = len(store)
+  with pytest.raises(ValueError, match="New_1"):
+    store["New_1"] = ("S", "Nowhere")
+  assert "New_1" not in store
+  assert len(store) == num_packages
+  assert len(store.goals) == len(store.package_ids)
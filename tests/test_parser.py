@@ -0,0 +1,16 @@
+import os
+import shutil
+import pytest
+from conftest import SAMPLE_DATA_PATH, _parse
+
+def test_unknown_package_goals_on_connected_graph_are_named(tmp_path):
+  directory = str(tmp_path)
+  for name in os.listdir(SAMPLE_DATA_PATH):
+    shutil.copy(os.path.join(SAMPLE_DATA_PATH, name), directory)
+  with open(os.path.join(directory, "packages.csv"), "a") as package_file:
+    package_file.write("Pack_Lost_1,S,Nowhere\nPack_Lost_2,M,Elsewhere\n")
+
+  with pytest.raises(ValueError) as error:
+    _parse(directory)
+  assert "Pack_Lost_1 (Nowhere)" in str(error.value)
+  assert "Pack_Lost_2 (Elsewhere)" in str(error.value)
@@ -0,0 +1,51 @@
+from conftest import dijkstra, route_distance
+from src.module_route_searcher import RouteSearcher, _RouteCache
+
+def test_least_recently_used_route_is_evicted():
+  cache = _RouteCache(2)
+  cache.put("S", "A", ["S", "A"])
+  cache.put("S", "B", ["S", "B"])
+  assert cache.get("S", "A") == ["S", "A"]
+  cache.put("S", "C", ["S", "C"])
+  assert cache.get("S", "B") is None
+  assert cache.get("S", "A") == ["S", "A"]
+  assert cache.get("S", "C") == ["S", "C"]
+  assert cache.get_stats() == {"hits": 3, "misses": 1, "evictions": 1, "size": 2}
+
+def test_zero_size_disables_caching():
+  cache = _RouteCache(0)
+  cache.put("S", "A", ["S", "A"])
+  assert cache.get("S", "A") is None
+  assert cache.get_stats() == {"hits": 0, "misses": 1, "evictions": 0, "size": 0}
+
+def test_clear_and_discard_keep_counters():
+  cache = _RouteCache(4)
+  for goal in "ABC":
+    cache.put("S", goal, ["S", goal])
+  cache.get("S", "A")
+  assert cache.discard(lambda route: route[-1] != "A") == 2
+  assert len(cache) == 1
+  cache.clear()
+  assert cache.get_stats() == {"hits": 1, "misses": 0, "evictions": 0, "size": 0}
+
+def test_searcher_reuses_cached_routes(sample_data):
+  searcher = RouteSearcher(sample_data, cache_size=4)
+  connections = sample_data.get_connection_data()
+  distances = dijkstra(connections, "SupplyDepot")
+  goals = list(sample_data.get_node_data())[1:7]
+  for _ in range(2):
+    for goal in goals:
+      route = searcher.getOptimalRoute("SupplyDepot", goal)
+      assert route_distance(connections, route) == distances[goal]
+  # 6 goals cycled through 4 entries never hit
+  assert searcher.getCacheStats() == {"hits": 0, "misses": 12, "evictions": 8, "size": 4}
+  searches = searcher.getSearchStats()["searches"]
+  assert searcher.getOptimalRoute("SupplyDepot", goals[-1]) == searcher.getOptimalRoute("SupplyDepot", goals[-1])
+  assert searcher.getSearchStats()["searches"] == searches
+  assert searcher.getCacheStats()["hits"] == 2
+
+def test_cached_route_cannot_be_altered_by_caller(sample_data):
+  searcher = RouteSearcher(sample_data)
+  route = searcher.getOptimalRoute("SupplyDepot", "D")
+  route.append("X")
+  assert searcher.getOptimalRoute("SupplyDepot", "D")[-1] == "D"
@@ -0,0 +1,52 @@
+import pytest
+from conftest import dijkstra, route_distance
+from src.module_route_searcher import RouteSearcher, RoutingModes, HeuristicModes
+
+DEPOT = "SupplyDepot"
+
+def make_searcher(parsed_data, mode: str) -> RouteSearcher:
+  if mode == "tree":
+    return RouteSearcher(parsed_data, RoutingModes.SHORTEST_PATH_TREE)
+  if mode == "landmarks":
+    return RouteSearcher(parsed_data, heuristic_mode=HeuristicModes.LANDMARKS, num_landmarks=4)
+  searcher = RouteSearcher(parsed_data)
+  if mode == "contraction-hierarchy":
+    searcher.useContractionHierarchy()
+  return searcher
+
+def find_route(searcher: RouteSearcher, start_node: str, goal_node: str) -> list:
+  if searcher.routing_mode == RoutingModes.SHORTEST_PATH_TREE:
+    return searcher.getRouteFromShortestPathTree(start_node, goal_node)
+  return searcher.getOptimalRoute(start_node, goal_node)
+
+@pytest.mark.parametrize("mode", ["euclidean", "landmarks", "contraction-hierarchy", "tree"])
+def test_routes_match_dijkstra(parsed_data, mode):
+  searcher = make_searcher(parsed_data, mode)
+  connections = parsed_data.get_connection_data()
+  start_nodes = [DEPOT] if mode == "tree" else list(parsed_data.get_node_data())[:5]
+  for start_node in start_nodes:
+    distances = dijkstra(connections, start_node)
+    for goal_node in parsed_data.get_node_data():
+      route = find_route(searcher, start_node, goal_node)
+      assert (route[0], route[-1]) == (start_node, goal_node)
+      assert route_distance(connections, route) == distances[goal_node]
+
+def test_euclidean_heuristic_never_overestimates(sample_data):
+  # Most sample connections are shorter than the straight line between their nodes
+  searcher = RouteSearcher(sample_data)
+  graph = searcher.graph
+  distances = dijkstra(sample_data.get_connection_data(), DEPOT)
+  heuristic = searcher._get_heuristic(graph.get_index(DEPOT))
+  for (node, distance) in distances.items():
+    assert heuristic(graph.get_index(node)) <= distance + 1e-9
+
+def test_package_routes_match_dijkstra(sample_data):
+  connections = sample_data.get_connection_data()
+  distances = dijkstra(connections, DEPOT)
+  for mode in RoutingModes:
+    routes = RouteSearcher(sample_data, mode).getRoutesForEachPackage()
+    assert [package_id for (package_id, _) in routes.values()] == list(sample_data.get_package_data())
+    for (package_id, route) in routes.values():
+      goal = sample_data.get_package_data()[package_id][1]
+      assert route[-1] == goal
+      assert route_distance(connections, route) == distances[goal]
@@ -0,0 +1,59 @@
+import json
+import asyncio
+import pytest
+from src.module_service import OptimizationService
+from src.module_multistart import create_worker_pool
+
+def exchange(parsed_data, lines: list, max_request_size: int = 64 * 2 ** 20) -> list:
+  """Sends request lines to a service and returns the decoded responses,
+  one per line, until the service closes the connection."""
+  service = OptimizationService(parsed_data, max_workers=1, max_request_size=max_request_size)
+
+  async def run() -> list:
+    server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0, limit=max_request_size)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+      (reader, writer) = await asyncio.open_connection("127.0.0.1", port, limit=max_request_size)
+      for line in lines:
+        writer.write(line + b"\n")
+      await writer.drain()
+      writer.write_eof()
+      responses = [json.loads(line) async for line in reader]
+      writer.close()
+      return responses
+
+  with create_worker_pool(parsed_data, dict(), 1) as executor:
+    service._executor = executor
+    return asyncio.run(run())
+
+def test_valid_manifest_is_optimized(sample_data):
+  [response] = exchange(sample_data, [b'{"id": 7, "packages": {"P1": ["S", "A"], "P2": ["L", "D"]}}'])
+  assert response["id"] == 7
+  assert sorted(package for trip in response["trips"] for package in trip["packages"]) == ["P1", "P2"]
+  assert response["total_distance"] > 0
+
+@pytest.mark.parametrize("line", [
+  b'{"packages": {"P1": [["S"], "A"]}}',
+  b'{"packages": {"P1": ["S", {"node": "A"}]}}',
+  b'{"packages": {"P1": ["X", "A"]}}',
+  b'{"packages": {"P1": ["S", "Nowhere"]}}',
+  b'{"packages": [["S", "A"]]}',
+  b'["S", "A"]',
+  b'{"packages": '
+])
+def test_invalid_request_gets_error_and_connection_stays_open(sample_data, line):
+  responses = exchange(sample_data, [line, b'{"id": 2, "packages": {"P1": ["S", "A"]}}'])
+  assert list(responses[0]) == ["error"]
+  assert responses[1]["id"] == 2 and "trips" in responses[1]
+
+def test_large_manifest_is_read(sample_data):
+  nodes = list(sample_data.get_node_data())[1:]
+  packages = {f"P{index}": ["S", nodes[index % len(nodes)]] for index in range(6000)}
+  line = json.dumps({"packages": packages}).encode()
+  assert len(line) > 2 ** 16
+  [response] = exchange(sample_data, [line])
+  assert sum(len(trip["packages"]) for trip in response["trips"]) == 6000
+
+def test_oversized_request_gets_error(sample_data):
+  responses = exchange(sample_data, [b'{"packages": {' + b" " * 4096 + b"}}"], max_request_size=1024)
+  assert list(responses[0]) == ["error"]